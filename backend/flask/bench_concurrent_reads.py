@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from src.server import create_app
+from src.server.config import Config
+
+# Requests sent while the database is being populated, stream ids are drawn
+# at random so that most of them miss the response cache
+API_REQUESTS: list[str] = [
+    "/api/streams/{stream_id}",
+    "/api/streams/cursor?limit=100",
+    "/api/stats/top/tracks?start=2020-01-01",
+    "/api/stats/top/artists",
+    "/api/analytics/group/track_id",
+]
+
+
+def send_requests(
+    app, stop: threading.Event, latencies: list[float], errors: list[str]
+) -> None:
+    """
+    Sends random API_REQUESTS until stop is set, recording the latency of
+    every request and the status of failed ones
+    """
+
+    client = app.test_client()
+    while not stop.is_set():
+        url: str = random.choice(API_REQUESTS).format(
+            stream_id=random.randint(1, 100000)
+        )
+        started: float = time.perf_counter()
+        status_code: int = client.get(url).status_code
+        latencies.append(time.perf_counter() - started)
+        if status_code >= 500:
+            errors.append(f"{status_code} {url}")
+
+
+def report(phase: str, latencies: list[float], errors: list[str], seconds: float):
+    """
+    Prints the throughput and latency percentiles of a phase
+    """
+
+    if not latencies:
+        print(f"{phase}: no requests completed")
+        return
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    print(
+        f"{phase}: {len(latencies)} requests in {seconds:.1f}s "
+        f"({len(latencies) / seconds:.0f}/s), {len(errors)} errors, "
+        f"p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms, "
+        f"max {max(latencies) * 1000:.1f}ms"
+    )
+    for error in sorted(set(errors))[:10]:
+        print(f"  {error}")
+
+
+def run_phase(app, readers: int, until) -> tuple[list[float], list[str], float]:
+    """
+    Runs readers threads sending requests until the until callable returns
+    """
+
+    stop: threading.Event = threading.Event()
+    latencies: list[float] = []
+    errors: list[str] = []
+    threads: list[threading.Thread] = [
+        threading.Thread(target=send_requests, args=(app, stop, latencies, errors))
+        for _ in range(readers)
+    ]
+
+    started: float = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    until()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return latencies, errors, time.perf_counter() - started
+
+
+def main() -> None:
+    """
+    ...
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Measure API latency while the database is being populated"
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=4,
+        help="number of threads sending API requests concurrently",
+    )
+    parser.add_argument(
+        "--baseline-seconds",
+        type=float,
+        default=10.0,
+        help="seconds spent measuring latency before populating, 0 skips it",
+    )
+    parser.add_argument(
+        "--database-uri",
+        default=Config.SQLALCHEMY_DATABASE_URI,
+        help="database the API reads, it has to be the one the command populates",
+    )
+    parser.add_argument(
+        "command",
+        nargs=argparse.REMAINDER,
+        help="populating command run during the measurement, "
+        "defaults to populate_db.py without options",
+    )
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI: str = args.database_uri
+
+    app = create_app(BenchConfig)
+    command: list[str] = args.command or [sys.executable, "populate_db.py"]
+    if command[0] == "--":
+        command = command[1:]
+
+    if args.baseline_seconds > 0:
+        report(
+            "idle",
+            *run_phase(app, args.readers, lambda: time.sleep(args.baseline_seconds)),
+        )
+
+    process: subprocess.Popen = subprocess.Popen(command)
+    report("populating", *run_phase(app, args.readers, process.wait))
+    if process.returncode:
+        sys.exit(f"{' '.join(command)} failed with status {process.returncode}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+
+import flask_migrate
+from sqlalchemy import event
+
+from src.server import create_app
+from src.server.config import Config
+from src.server.extensions import db
+from src.models.models import Streams
+from src.utils.populate_db.populator import POPULATE_PHASES, Populator
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+
+from populate_db import positive_float
+
+# Steps of create_streams measured on their own, nested under it
+CREATE_STREAMS_STEPS: tuple[str, ...] = (
+    "update_daily_stats",
+    "update_hourly_stats",
+    "update_sessions",
+)
+
+# Measurements compared with the baseline, and how much a phase has to take
+# at least more than in the baseline to be reported, so that the noise of
+# phases taking a few milliseconds is not
+COMPARED_MEASUREMENTS: dict[str, float] = {
+    "seconds": 0.5,
+    "statements": 10,
+    "peak_rss_mb": 20.0,
+}
+
+
+def reset_peak_rss() -> None:
+    """
+    Starts measuring the peak resident set size of the process from its
+    current size, which Linux allows by writing 5 to clear_refs
+    """
+
+    with contextlib.suppress(OSError):
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as file:
+            file.write("5")
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of the process since it was last
+    reset, or since it started where it can not be reset
+    """
+
+    with contextlib.suppress(OSError):
+        with open("/proc/self/status", "r", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+
+    # Kilobytes on Linux, bytes on macOS
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+class PhaseMeter:
+    """
+    Measures the wall time, rows written, SQL statements and peak RSS of the
+    populate phases, which may be nested in one another
+    """
+
+    def __init__(self) -> None:
+        """
+        ...
+        """
+
+        self.statements: int = 0
+        self.rows: int = 0
+        # The row count of a statement returning rows is only known once they
+        # have been fetched, so it is read when the next statement runs
+        self.pending_cursor = None
+        # Phases being measured, innermost last, with their starting counters
+        # and the peak RSS they reached before their nested phases reset it
+        self.open_phases: list[dict] = []
+        self.phases: list[dict] = []
+
+    def count_statement(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        """
+        Counts a statement run by an engine, and the rows it wrote
+        """
+
+        self.collect_rows()
+        self.statements += 1
+        if not statement.lstrip()[:6].upper() == "SELECT":
+            self.pending_cursor = cursor
+
+    def collect_rows(self) -> None:
+        """
+        Adds the rows written by the last statement
+        """
+
+        if self.pending_cursor is not None:
+            self.rows += max(self.pending_cursor.rowcount, 0)
+            self.pending_cursor = None
+
+    def measure(self, phase: str, function: Callable) -> Callable:
+        """
+        Returns function measured as phase every time it is called
+        """
+
+        def measured(*args, **kwargs):
+            self.start(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stop()
+
+        return measured
+
+    def start(self, phase: str) -> None:
+        """
+        ...
+        """
+
+        self.collect_rows()
+        current_peak: float = peak_rss_mb()
+        for open_phase in self.open_phases:
+            open_phase["peak_rss_mb"] = max(open_phase["peak_rss_mb"], current_peak)
+
+        # Reported in the order phases start, nested ones after their parent
+        result: dict = {"phase": phase, "depth": len(self.open_phases)}
+        self.phases.append(result)
+        self.open_phases.append(
+            {
+                "result": result,
+                "statements": self.statements,
+                "rows": self.rows,
+                "peak_rss_mb": 0.0,
+                "started": time.perf_counter(),
+            }
+        )
+        reset_peak_rss()
+
+    def stop(self) -> None:
+        """
+        ...
+        """
+
+        seconds: float = time.perf_counter() - self.open_phases[-1]["started"]
+        self.collect_rows()
+        open_phase: dict = self.open_phases.pop()
+        peak: float = max(open_phase["peak_rss_mb"], peak_rss_mb())
+        if self.open_phases:
+            parent: dict = self.open_phases[-1]
+            parent["peak_rss_mb"] = max(parent["peak_rss_mb"], peak)
+
+        rows: int = self.rows - open_phase["rows"]
+        open_phase["result"].update(
+            seconds=round(seconds, 3),
+            rows=rows,
+            rows_per_second=round(rows / seconds) if seconds > 0 else 0,
+            statements=self.statements - open_phase["statements"],
+            peak_rss_mb=round(peak, 1),
+        )
+
+
+def run_scale(
+    streams: int,
+    tracks: int,
+    relinked: int,
+    args: argparse.Namespace,
+) -> dict:
+    """
+    Populates a new database from a synthetic export of streams plays and
+    returns the measurements of every phase
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        streams_file_path: str = os.path.join(directory, "input")
+        started: float = time.perf_counter()
+        write_stream_files(
+            streams_file_path, streams, tracks, relinked=relinked, seed=args.seed
+        )
+        generate_seconds: float = time.perf_counter() - started
+
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI: str = (
+                f"sqlite:///{os.path.join(directory, 'data.db')}"
+            )
+
+        app = create_app(BenchConfig)
+        meter: PhaseMeter = PhaseMeter()
+        client: FakeSpotifyClient = FakeSpotifyClient(latency=args.latency)
+
+        with app.app_context():
+            flask_migrate.upgrade(
+                directory=os.path.join(os.path.dirname(__file__), "migrations")
+            )
+
+            for engine in db.engines.values():
+                event.listen(engine, "after_cursor_execute", meter.count_statement)
+
+            with contextlib.ExitStack() as stack:
+                # Progress bars and phase logs of the populator are left out
+                if not args.verbose:
+                    output = stack.enter_context(
+                        open(os.devnull, "w", encoding="UTF-8")
+                    )
+                    stack.enter_context(contextlib.redirect_stdout(output))
+                    stack.enter_context(contextlib.redirect_stderr(output))
+
+                meter.start("total")
+                # Export files are loaded when the populator is created
+                populator: Populator = meter.measure("load_stream_objects", Populator)(
+                    None,
+                    streams_file_path,
+                    streaming=args.streaming,
+                    workers=args.workers,
+                    fetch_workers=args.fetch_workers,
+                    requests_per_second=args.requests_per_second,
+                    stats_timezone=app.config["STATS_TIMEZONE"],
+                    spotify_client=client,
+                )
+                for phase in POPULATE_PHASES + CREATE_STREAMS_STEPS:
+                    setattr(
+                        populator,
+                        phase,
+                        meter.measure(phase, getattr(populator, phase)),
+                    )
+                populator.populate_db()
+                meter.stop()
+
+            for engine in db.engines.values():
+                event.remove(engine, "after_cursor_execute", meter.count_statement)
+
+            ingested_streams: int = db.session.query(db.func.count(Streams.id)).scalar()
+            db.session.remove()
+
+    return {
+        "streams": streams,
+        "tracks": tracks,
+        "relinked": relinked,
+        "latency": args.latency,
+        "generate_seconds": round(generate_seconds, 3),
+        "ingested_streams": ingested_streams,
+        "api_calls": client.calls,
+        "phases": meter.phases,
+    }
+
+
+def report(result: dict) -> None:
+    """
+    Prints the measurements of a scale as a table
+    """
+
+    print(
+        f"\n{result['streams']} plays of {result['tracks']} tracks, "
+        f"{result['relinked']} relinked, {result['latency']}s API latency "
+        f"(export written in {result['generate_seconds']:.1f}s)"
+    )
+    print(
+        f"{'phase':<32}{'seconds':>10}{'rows':>10}{'rows/s':>10}"
+        f"{'statements':>12}{'peak RSS MB':>13}"
+    )
+    for phase in result["phases"]:
+        print(
+            f"{'  ' * phase['depth'] + phase['phase']:<32}"
+            f"{phase['seconds']:>10.2f}{phase['rows']:>10}"
+            f"{phase['rows_per_second']:>10}{phase['statements']:>12}"
+            f"{phase['peak_rss_mb']:>13.1f}"
+        )
+    print(
+        f"{result['ingested_streams']} streams ingested, "
+        f"API calls {', '.join(f'{k} {v}' for k, v in result['api_calls'].items())}"
+    )
+
+
+def find_regressions(
+    results: list[dict], baseline: list[dict], tolerance: float
+) -> list[str]:
+    """
+    Returns a description of every measurement of a phase that grew by more
+    than tolerance since the baseline run of the same scale
+    """
+
+    regressions: list[str] = []
+    baseline_scales: dict[tuple, dict] = {
+        (result["streams"], result["tracks"], result["relinked"]): result
+        for result in baseline
+    }
+    for result in results:
+        baseline_result: dict | None = baseline_scales.get(
+            (result["streams"], result["tracks"], result["relinked"])
+        )
+        if baseline_result is None:
+            continue
+
+        if result["ingested_streams"] != baseline_result["ingested_streams"]:
+            regressions.append(
+                f"{result['streams']} plays: {result['ingested_streams']} streams "
+                f"ingested instead of {baseline_result['ingested_streams']}"
+            )
+
+        baseline_phases: dict[str, dict] = {
+            phase["phase"]: phase for phase in baseline_result["phases"]
+        }
+        for phase in result["phases"]:
+            baseline_phase: dict | None = baseline_phases.get(phase["phase"])
+            if baseline_phase is None:
+                continue
+
+            for measurement, slack in COMPARED_MEASUREMENTS.items():
+                value: float = phase[measurement]
+                baseline_value: float = baseline_phase[measurement]
+                if (
+                    value > baseline_value * (1 + tolerance)
+                    and value - baseline_value > slack
+                ):
+                    regressions.append(
+                        f"{result['streams']} plays, {phase['phase']}: "
+                        f"{measurement} {value} against {baseline_value}"
+                    )
+
+    return regressions
+
+
+def main() -> None:
+    """
+    ...
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Measure each populate phase on synthetic exports of several "
+        "sizes, with a fake Spotify API client"
+    )
+    parser.add_argument(
+        "--scales",
+        type=lambda value: [int(scale) for scale in value.split(",")],
+        default=[1000, 10000, 100000],
+        help="comma separated numbers of plays in the exports populated from",
+    )
+    parser.add_argument(
+        "--tracks-ratio",
+        type=float,
+        default=0.1,
+        help="number of distinct tracks of an export per play",
+    )
+    parser.add_argument(
+        "--relinked-ratio",
+        type=float,
+        default=0.01,
+        help="share of the tracks also played under a relinked URI",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the exports, the same seed writes the same exports",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds every fake Spotify API call takes",
+    )
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument(
+        "--streaming",
+        action="store_true",
+        help="parse the export files incrementally to keep memory use constant",
+    )
+    loading.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes used to parse the export files, "
+        "their memory is not part of the peak RSS",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=1,
+        help="number of fake Spotify API calls made concurrently",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=positive_float,
+        default=1e6,
+        help="average rate fake Spotify API calls are limited to, "
+        "unlimited by default",
+    )
+    parser.add_argument(
+        "--output",
+        help="file the measurements are written to as JSON, to be used as a baseline",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="JSON file written by --output of an earlier run, exits with an "
+        "error if a phase got slower or issued more statements than in it",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="share by which a measurement may exceed the baseline",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="show the output of the populator",
+    )
+    args = parser.parse_args()
+
+    results: list[dict] = []
+    for streams in args.scales:
+        tracks: int = max(1, int(streams * args.tracks_ratio))
+        result: dict = run_scale(
+            streams, tracks, int(tracks * args.relinked_ratio), args
+        )
+        report(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="UTF-8") as file:
+            baseline: list[dict] = json.load(file)
+
+        regressions: list[str] = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(f"{len(regressions)} regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""link tracks and albums to genres
+
+Revision ID: 196d12cd5d1f
+Revises: 9c9cb0c83ccc
+Create Date: 2026-10-18 20:12:19.654781
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '196d12cd5d1f'
+down_revision = '9c9cb0c83ccc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backfill the genre links the populator now makes from the artist links
+    # that are already in the database
+    op.execute(
+        "INSERT OR IGNORE INTO genres_albums (genre_id, album_id) "
+        "SELECT genres_artists.genre_id, artists_albums.album_id FROM genres_artists "
+        "JOIN artists_albums ON artists_albums.artist_id = genres_artists.artist_id"
+    )
+    op.execute(
+        "INSERT OR IGNORE INTO genres_tracks (genre_id, track_id) "
+        "SELECT genres_artists.genre_id, artists_tracks.track_id FROM genres_artists "
+        "JOIN artists_tracks ON artists_tracks.artist_id = genres_artists.artist_id "
+        "UNION SELECT genres_artists.genre_id, tracks.id FROM genres_artists "
+        "JOIN artists_albums ON artists_albums.artist_id = genres_artists.artist_id "
+        "JOIN tracks ON tracks.album_id = artists_albums.album_id"
+    )
+
+
+def downgrade():
+    pass
@@ -0,0 +1,36 @@
+"""add search index
+
+Revision ID: 9c9cb0c83ccc
+Revises: 48f13bf99005
+Create Date: 2026-10-18 20:09:31.459362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c9cb0c83ccc'
+down_revision = '48f13bf99005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Prefix indexes keep autocomplete on the first letters of a word fast
+    op.execute(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "name, entity_type UNINDEXED, entity_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')"
+    )
+
+    # Backfill the index from the records that are already in the database
+    for table in ("tracks", "albums", "artists", "labels", "genres"):
+        op.execute(
+            "INSERT INTO search_index (name, entity_type, entity_id) "
+            f"SELECT name, '{table}', id FROM {table} WHERE name IS NOT NULL"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE search_index")
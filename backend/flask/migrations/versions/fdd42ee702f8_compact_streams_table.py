@@ -0,0 +1,116 @@
+"""compact streams table
+
+Revision ID: fdd42ee702f8
+Revises: 9e9a4be533b4
+Create Date: 2026-10-18 20:39:07.144000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fdd42ee702f8'
+down_revision = '9e9a4be533b4'
+branch_labels = None
+depends_on = None
+
+
+# SQLite can not change the type of a column in place, so streams is rebuilt
+# as a new table in either direction, with the same constraints and indexes
+def streams_constraints():
+    return (
+        sa.ForeignKeyConstraint(['album_id'], ['albums.id'], ),
+        sa.ForeignKeyConstraint(['track_id'], ['tracks.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('stream_date', 'track_id', 'ms_played', name='uq_streams_natural_key'),
+    )
+
+
+def create_streams_indexes():
+    with op.batch_alter_table('streams', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_streams_album_id'), ['album_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_streams_stream_date'), ['stream_date'], unique=False)
+        batch_op.create_index('ix_streams_track_id_stream_date', ['track_id', 'stream_date'], unique=False)
+
+
+def upgrade():
+    op.create_table('reasons',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.execute(
+        "INSERT INTO reasons (name) "
+        "SELECT reason_start FROM streams UNION SELECT reason_end FROM streams"
+    )
+
+    op.create_table('compact_streams',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('track_id', sa.Integer(), nullable=False),
+    sa.Column('album_id', sa.Integer(), nullable=False),
+    sa.Column('stream_date', sa.Integer(), nullable=False),
+    sa.Column('ms_played', sa.Integer(), nullable=False),
+    sa.Column('ratio_played', sa.Numeric(asdecimal=False), nullable=False),
+    sa.Column('reason_start_id', sa.Integer(), nullable=False),
+    sa.Column('reason_end_id', sa.Integer(), nullable=False),
+    sa.Column('shuffle', sa.Boolean(), nullable=False),
+    sa.Column('created_date', sa.Integer(), nullable=False),
+    sa.Column('modified_date', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['reason_end_id'], ['reasons.id'], ),
+    sa.ForeignKeyConstraint(['reason_start_id'], ['reasons.id'], ),
+    *streams_constraints()
+    )
+    # Dates become epoch seconds, names are read from the tracks and albums
+    # and reasons from the reasons dictionary
+    op.execute(
+        "INSERT INTO compact_streams SELECT streams.id, track_id, album_id, "
+        "CAST(strftime('%s', stream_date) AS INTEGER), ms_played, ratio_played, "
+        "reason_starts.id, reason_ends.id, shuffle, "
+        "CAST(strftime('%s', created_date) AS INTEGER), "
+        "CAST(strftime('%s', modified_date) AS INTEGER) FROM streams "
+        "JOIN reasons AS reason_starts ON reason_starts.name = streams.reason_start "
+        "JOIN reasons AS reason_ends ON reason_ends.name = streams.reason_end "
+        "ORDER BY streams.id"
+    )
+    # Dropped before the rename, which would otherwise point the foreign keys
+    # of sessions at the old table
+    op.drop_table('streams')
+    op.rename_table('compact_streams', 'streams')
+    create_streams_indexes()
+
+
+def downgrade():
+    op.create_table('text_streams',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('track_id', sa.Integer(), nullable=False),
+    sa.Column('track_name', sa.String(), nullable=True),
+    sa.Column('album_id', sa.Integer(), nullable=False),
+    sa.Column('album_name', sa.String(), nullable=True),
+    sa.Column('stream_date', sa.DateTime(), nullable=False),
+    sa.Column('ms_played', sa.Integer(), nullable=False),
+    sa.Column('ratio_played', sa.Numeric(asdecimal=False), nullable=False),
+    sa.Column('reason_start', sa.String(), nullable=False),
+    sa.Column('reason_end', sa.String(), nullable=False),
+    sa.Column('shuffle', sa.Boolean(), nullable=False),
+    sa.Column('created_date', sa.DateTime(), nullable=False),
+    sa.Column('modified_date', sa.DateTime(), nullable=False),
+    *streams_constraints()
+    )
+    op.execute(
+        "INSERT INTO text_streams SELECT streams.id, track_id, tracks.name, "
+        "streams.album_id, tracks.album_name, "
+        "strftime('%Y-%m-%d %H:%M:%S.000000', stream_date, 'unixepoch'), "
+        "ms_played, ratio_played, reason_starts.name, reason_ends.name, shuffle, "
+        "strftime('%Y-%m-%d %H:%M:%S.000000', streams.created_date, 'unixepoch'), "
+        "strftime('%Y-%m-%d %H:%M:%S.000000', streams.modified_date, 'unixepoch') "
+        "FROM streams JOIN tracks ON tracks.id = streams.track_id "
+        "JOIN reasons AS reason_starts ON reason_starts.id = streams.reason_start_id "
+        "JOIN reasons AS reason_ends ON reason_ends.id = streams.reason_end_id "
+        "ORDER BY streams.id"
+    )
+    op.drop_table('streams')
+    op.rename_table('text_streams', 'streams')
+    create_streams_indexes()
+    op.drop_table('reasons')
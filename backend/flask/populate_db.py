@@ -1,11 +1,27 @@
 #!/usr/bin/env python3
 
 
+import argparse
 import os
+import sys
 
-from src.utils.populate_db.populator import Populator
+from src.utils.populate_db.populator import InterruptedRunError, Populator
+from src.utils.snapshot import SNAPSHOT_FORMATS, write_generation_snapshot
 
 from src.server import create_app
+from src.server.extensions import http_cache
+
+
+def positive_float(value: str) -> float:
+    """
+    Parses a command line argument that has to be a positive number
+    """
+
+    number: float = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+
+    return number
 
 
 def main() -> None:
@@ -13,6 +29,58 @@ def main() -> None:
     ...
     """
 
+    parser = argparse.ArgumentParser(
+        description="Populate the database from endsong.json files"
+    )
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument(
+        "--streaming",
+        action="store_true",
+        help="parse the export files incrementally to keep memory use constant",
+    )
+    loading.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes used to parse the export files, 0 uses every core",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=1,
+        help="number of Spotify API requests sent concurrently",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=positive_float,
+        default=10.0,
+        help="average rate Spotify API requests are limited to",
+    )
+    parser.add_argument(
+        "--cache",
+        default=os.path.abspath("./data/spotify_cache.db"),
+        help="file Spotify API responses are cached in",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always request metadata from the Spotify API",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run from its last committed batch",
+    )
+    parser.add_argument(
+        "--snapshot-formats",
+        nargs="*",
+        choices=tuple(SNAPSHOT_FORMATS),
+        default=list(SNAPSHOT_FORMATS),
+        help="formats of the snapshots the API serves, written once populated, "
+        "none skips them",
+    )
+    args = parser.parse_args()
+
     # Path to file that contains client_id / client_secret
     auth_file_path = os.path.abspath("./auth.txt")
     # Path holding all endsong.json files
@@ -20,9 +88,31 @@ def main() -> None:
 
     app = create_app()
     with app.app_context():
-        populator = Populator(auth_file_path, streams_file_path)
+        try:
+            populator = Populator(
+                auth_file_path,
+                streams_file_path,
+                streaming=args.streaming,
+                workers=args.workers,
+                fetch_workers=args.fetch_workers,
+                requests_per_second=args.requests_per_second,
+                cache_file_path=None if args.no_cache else args.cache,
+                resume=args.resume,
+                stats_timezone=app.config["STATS_TIMEZONE"],
+            )
+        except InterruptedRunError as error:
+            sys.exit(f"{error}, run again with --resume to finish it")
         populator.populate_db()
 
+        # The API only serves snapshots, so they are written once populated
+        current = http_cache.current_generation()
+        for snapshot_format in args.snapshot_formats:
+            write_generation_snapshot(
+                app.config["SNAPSHOT_FOLDER"],
+                snapshot_format,
+                current[0] if current is not None else 0,
+            )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import os
+
+from src.utils.snapshot import (
+    SNAPSHOT_BATCH_SIZE,
+    SNAPSHOT_FORMATS,
+    write_generation_snapshot,
+    write_snapshot,
+)
+
+from src.server import create_app
+from src.server.extensions import http_cache
+
+
+def main() -> None:
+    """
+    ...
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Write a columnar snapshot of the database partitioned by year"
+    )
+    parser.add_argument(
+        "--output",
+        help="folder the snapshot replaces, holding one year=YYYY folder per year, "
+        "defaults to the snapshot of the current data generation the API serves",
+    )
+    parser.add_argument(
+        "--format",
+        choices=tuple(SNAPSHOT_FORMATS),
+        default="parquet",
+        help="write Parquet files, or Arrow IPC files that can be memory mapped",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=SNAPSHOT_BATCH_SIZE,
+        help="number of streams read from the database and written at a time",
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.output is not None:
+            output_folder: str = args.output
+            write_snapshot(
+                output_folder, snapshot_format=args.format, batch_size=args.batch_size
+            )
+        else:
+            current = http_cache.current_generation()
+            output_folder = write_generation_snapshot(
+                app.config["SNAPSHOT_FOLDER"],
+                args.format,
+                current[0] if current is not None else 0,
+                batch_size=args.batch_size,
+            )
+
+    for name in sorted(os.listdir(output_folder)):
+        print(os.path.join(output_folder, name))
+
+
+if __name__ == "__main__":
+    main()
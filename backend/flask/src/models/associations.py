@@ -15,6 +15,7 @@ genres_artists = db.Table(
         db.Integer,
         db.ForeignKey("artists.id"),
         primary_key=True,
+        index=True,
         nullable=False,
     ),
 )
@@ -34,6 +35,7 @@ genres_albums = db.Table(
         db.Integer,
         db.ForeignKey("albums.id"),
         primary_key=True,
+        index=True,
         nullable=False,
     ),
 )
@@ -53,6 +55,7 @@ genres_tracks = db.Table(
         db.Integer,
         db.ForeignKey("tracks.id"),
         primary_key=True,
+        index=True,
         nullable=False,
     ),
 )
@@ -72,6 +75,7 @@ artists_tracks = db.Table(
         db.Integer,
         db.ForeignKey("tracks.id"),
         primary_key=True,
+        index=True,
         nullable=False,
     ),
 )
@@ -91,13 +95,15 @@ artists_albums = db.Table(
         db.Integer,
         db.ForeignKey("albums.id"),
         primary_key=True,
+        index=True,
         nullable=False,
     ),
 )
 
-# Association table for many to many relationship between artists and streams
-artists_streams = db.Table(
-    "artists_streams",
+# Association table between tracks and the artists of the track and of its album,
+# the artists every stream of the track is credited to
+stream_artists = db.Table(
+    "stream_artists",
     db.Column(
         "artist_id",
         db.Integer,
@@ -106,10 +112,11 @@ artists_streams = db.Table(
         nullable=False,
     ),
     db.Column(
-        "stream_id",
+        "track_id",
         db.Integer,
-        db.ForeignKey("streams.id"),
+        db.ForeignKey("tracks.id"),
         primary_key=True,
+        index=True,
         nullable=False,
     ),
 )
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from src.server.extensions import db
 from src.models.associations import (
     genres_artists,
@@ -6,8 +6,9 @@ from src.models.associations import (
     genres_tracks,
     artists_tracks,
     artists_albums,
-    artists_streams,
+    stream_artists,
 )
+from src.models.types import EpochDateTime
 
 
 class TrackUris(db.Model):
@@ -17,41 +18,139 @@ class TrackUris(db.Model):
     uri = db.Column(db.String, nullable=False, unique=True)
 
     # Many to one relationship to tracks
-    track_id = db.Column(db.Integer, db.ForeignKey("tracks.id"), nullable=False)
+    track_id = db.Column(
+        db.Integer, db.ForeignKey("tracks.id"), nullable=False, index=True
+    )
     track = db.relationship("Tracks", back_populates="uris")
 
 
+class Reasons(db.Model):
+    __tablename__: str = "reasons"
+
+    # Dictionary of the few distinct reason_start and reason_end values
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name: str = db.Column(db.String, nullable=False, unique=True)
+
+
 class Streams(db.Model):
     __tablename__: str = "streams"
+    # Natural key of a play, makes re-ingesting an export file idempotent
+    __table_args__ = (
+        db.UniqueConstraint(
+            "stream_date", "track_id", "ms_played", name="uq_streams_natural_key"
+        ),
+        # Artist and genre filters select many tracks, their date windows are
+        # ranges of this index instead of lookups of every stream of the tracks
+        db.Index("ix_streams_track_id_stream_date", "track_id", "stream_date"),
+    )
 
     id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
-    # Many to one relationship to tracks
+    # Many to one relationship to tracks, the name is read from the track
     track_id = db.Column(db.Integer, db.ForeignKey("tracks.id"), nullable=False)
-    track_name: str = db.Column(db.String)
     track = db.relationship("Tracks", back_populates="streams")
 
-    # Many to one relationship to albums
-    album_id = db.Column(db.Integer, db.ForeignKey("albums.id"), nullable=False)
-    album_name: str = db.Column(db.String)
+    # Many to one relationship to albums, the name is read from the album
+    album_id = db.Column(
+        db.Integer, db.ForeignKey("albums.id"), nullable=False, index=True
+    )
     album = db.relationship("Albums", back_populates="streams")
 
-    # Many to many relationship with artists using artists_streams association table
+    # Many to many relationship with artists through the track, using
+    # stream_artists association table
     artists = db.relationship(
-        "Artists", secondary=artists_streams, back_populates="streams"
+        "Artists",
+        secondary=stream_artists,
+        primaryjoin=lambda: Streams.track_id == stream_artists.c.track_id,
+        secondaryjoin=lambda: Artists.id == stream_artists.c.artist_id,
+        back_populates="streams",
+        viewonly=True,
     )
 
-    stream_date: datetime = db.Column(db.DateTime, nullable=False)
+    # Ordered by (stream_date, id) as SQLite appends the rowid to every index
+    stream_date: datetime = db.Column(EpochDateTime, nullable=False, index=True)
     ms_played: int = db.Column(db.Integer, nullable=False)
     ratio_played: float = db.Column(db.Numeric(asdecimal=False), nullable=False)
-    reason_start: str = db.Column(db.String, nullable=False)
-    reason_end: str = db.Column(db.String, nullable=False)
+
+    # Reasons are stored as ids of the reasons dictionary, and read by name
+    reason_start_id: int = db.Column(
+        db.Integer, db.ForeignKey("reasons.id"), nullable=False
+    )
+    reason_start = db.column_property(
+        db.select(Reasons.name)
+        .where(Reasons.id == reason_start_id)
+        .correlate_except(Reasons)
+        .scalar_subquery()
+    )
+    reason_end_id: int = db.Column(
+        db.Integer, db.ForeignKey("reasons.id"), nullable=False
+    )
+    reason_end = db.column_property(
+        db.select(Reasons.name)
+        .where(Reasons.id == reason_end_id)
+        .correlate_except(Reasons)
+        .scalar_subquery()
+    )
     shuffle: bool = db.Column(db.Boolean, nullable=False)
 
+    created_date: datetime = db.Column(EpochDateTime, nullable=False)
+    modified_date: datetime = db.Column(EpochDateTime, nullable=False)
+
+
+class IngestedFiles(db.Model):
+    __tablename__: str = "ingested_files"
+
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Path of the export file relative to the input folder
+    path: str = db.Column(db.String, nullable=False, unique=True)
+    size: int = db.Column(db.Integer, nullable=False)
+    content_hash: str = db.Column(db.String, nullable=False, index=True)
+    row_count: int = db.Column(db.Integer, nullable=False)
+
     created_date: datetime = db.Column(db.DateTime, nullable=False)
     modified_date: datetime = db.Column(db.DateTime, nullable=False)
 
 
+class PopulateCheckpoints(db.Model):
+    __tablename__: str = "populate_checkpoints"
+
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Name of a populate phase, or "populate_db" for the run as a whole
+    phase: str = db.Column(db.String, nullable=False, unique=True)
+    completed: bool = db.Column(db.Boolean, nullable=False, default=False)
+    # Phase specific progress marker, e.g. the last stream id before create_streams
+    position: int = db.Column(db.Integer)
+
+    created_date: datetime = db.Column(db.DateTime, nullable=False)
+    modified_date: datetime = db.Column(db.DateTime, nullable=False)
+
+
+class PendingWork(db.Model):
+    __tablename__: str = "pending_work"
+
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Populate phase that will process the key: albums, artists, labels or genres
+    phase: str = db.Column(db.String, nullable=False)
+    # Album / artist uri or label / genre name waiting to be created
+    key: str = db.Column(db.String, nullable=False)
+    # Table and id of the record to link once the key has been created
+    record_type: str = db.Column(db.String, nullable=False)
+    record_id: int = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (db.Index("ix_pending_work_phase_key", "phase", "key"),)
+
+
+class DataGeneration(db.Model):
+    __tablename__: str = "data_generation"
+
+    # Single row table, bumped by the populator whenever it commits data the
+    # API serves, so cached API responses can be validated against it
+    id: int = db.Column(db.Integer, primary_key=True)
+    generation: int = db.Column(db.Integer, nullable=False)
+
+    modified_date: datetime = db.Column(db.DateTime, nullable=False)
+
+
 class Tracks(db.Model):
     __tablename__: str = "tracks"
 
@@ -62,7 +161,7 @@ class Tracks(db.Model):
     uris = db.relationship("TrackUris", back_populates="track")
 
     # Many to one relationship to albums
-    album_id = db.Column(db.Integer, db.ForeignKey("albums.id"))
+    album_id = db.Column(db.Integer, db.ForeignKey("albums.id"), index=True)
     album_name: str = db.Column(db.String)
     album = db.relationship("Albums", back_populates="tracks")
 
@@ -99,7 +198,9 @@ class Tracks(db.Model):
     valence: float = db.Column(db.Numeric(asdecimal=False))
 
     created_date: datetime = db.Column(db.DateTime, nullable=False)
-    modified_date: datetime = db.Column(db.DateTime, nullable=False)
+    # Stamped again when the audio features are set, the similarity index
+    # loads the tracks modified since its last refresh
+    modified_date: datetime = db.Column(db.DateTime, nullable=False, index=True)
 
 
 class Albums(db.Model):
@@ -123,7 +224,7 @@ class Albums(db.Model):
     genres = db.relationship("Genres", secondary=genres_albums, back_populates="albums")
 
     # Many to one relationship to labels
-    label_id = db.Column(db.Integer, db.ForeignKey("labels.id"))
+    label_id = db.Column(db.Integer, db.ForeignKey("labels.id"), index=True)
     label = db.relationship("Labels", back_populates="albums")
 
     album_type: str = db.Column(db.String, nullable=False)
@@ -154,9 +255,15 @@ class Artists(db.Model):
         "Albums", secondary=artists_albums, back_populates="artists"
     )
 
-    # Many to many relationship with streams using artists_streams association table
+    # Many to many relationship with streams through their tracks, using
+    # stream_artists association table
     streams = db.relationship(
-        "Streams", secondary=artists_streams, back_populates="artists"
+        "Streams",
+        secondary=stream_artists,
+        primaryjoin=lambda: Artists.id == stream_artists.c.artist_id,
+        secondaryjoin=lambda: Streams.track_id == stream_artists.c.track_id,
+        back_populates="artists",
+        viewonly=True,
     )
 
     # Many to many relationship with genres using genres_artists association table
@@ -199,3 +306,132 @@ class Genres(db.Model):
 
     # Many to many relationship with albums using genres_tracks association table
     tracks = db.relationship("Tracks", secondary=genres_tracks, back_populates="genres")
+
+
+class TrackDailyStats(db.Model):
+    __tablename__: str = "track_daily_stats"
+
+    # UTC day the streams were played on
+    day: date = db.Column(db.Date, primary_key=True)
+    track_id: int = db.Column(db.Integer, db.ForeignKey("tracks.id"), primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+    skips: int = db.Column(db.Integer, nullable=False)
+
+
+class AlbumDailyStats(db.Model):
+    __tablename__: str = "album_daily_stats"
+
+    # UTC day the streams were played on
+    day: date = db.Column(db.Date, primary_key=True)
+    album_id: int = db.Column(db.Integer, db.ForeignKey("albums.id"), primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+    skips: int = db.Column(db.Integer, nullable=False)
+
+
+class ArtistDailyStats(db.Model):
+    __tablename__: str = "artist_daily_stats"
+
+    # UTC day the streams were played on
+    day: date = db.Column(db.Date, primary_key=True)
+    artist_id: int = db.Column(
+        db.Integer, db.ForeignKey("artists.id"), primary_key=True
+    )
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+    skips: int = db.Column(db.Integer, nullable=False)
+
+
+class GenreDailyStats(db.Model):
+    __tablename__: str = "genre_daily_stats"
+
+    # UTC day the streams were played on
+    day: date = db.Column(db.Date, primary_key=True)
+    genre_id: int = db.Column(db.Integer, db.ForeignKey("genres.id"), primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+    skips: int = db.Column(db.Integer, nullable=False)
+
+
+class HourlyStats(db.Model):
+    __tablename__: str = "hourly_stats"
+
+    # Hour the streams were played in, local to STATS_TIMEZONE
+    hour: datetime = db.Column(db.DateTime, primary_key=True)
+    shuffle: bool = db.Column(db.Boolean, primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+
+
+class AlbumHourlyStats(db.Model):
+    __tablename__: str = "album_hourly_stats"
+
+    # The primary keys start with the album, so a series of one album is an
+    # index range
+    album_id: int = db.Column(db.Integer, db.ForeignKey("albums.id"), primary_key=True)
+    # Hour the streams were played in, local to STATS_TIMEZONE
+    hour: datetime = db.Column(db.DateTime, primary_key=True)
+    shuffle: bool = db.Column(db.Boolean, primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+
+
+class ArtistHourlyStats(db.Model):
+    __tablename__: str = "artist_hourly_stats"
+
+    artist_id: int = db.Column(
+        db.Integer, db.ForeignKey("artists.id"), primary_key=True
+    )
+    # Hour the streams were played in, local to STATS_TIMEZONE
+    hour: datetime = db.Column(db.DateTime, primary_key=True)
+    shuffle: bool = db.Column(db.Boolean, primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+
+
+class GenreHourlyStats(db.Model):
+    __tablename__: str = "genre_hourly_stats"
+
+    genre_id: int = db.Column(db.Integer, db.ForeignKey("genres.id"), primary_key=True)
+    # Hour the streams were played in, local to STATS_TIMEZONE
+    hour: datetime = db.Column(db.DateTime, primary_key=True)
+    shuffle: bool = db.Column(db.Boolean, primary_key=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+
+
+class Sessions(db.Model):
+    __tablename__: str = "sessions"
+
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    # A stream is played from stream_date - ms_played until stream_date, a
+    # session spans its streams and ends once nothing is played for a while
+    start_date: datetime = db.Column(db.DateTime, nullable=False, index=True)
+    # Sessions ending near newly ingested streams are the ones recomputed
+    end_date: datetime = db.Column(db.DateTime, nullable=False, index=True)
+
+    plays: int = db.Column(db.Integer, nullable=False)
+    ms_played: int = db.Column(db.Integer, nullable=False)
+    skips: int = db.Column(db.Integer, nullable=False)
+
+    # Many to one relationship to the stream and track the session started with
+    first_stream_id: int = db.Column(
+        db.Integer, db.ForeignKey("streams.id"), nullable=False
+    )
+    first_track_id: int = db.Column(
+        db.Integer, db.ForeignKey("tracks.id"), nullable=False
+    )
+    first_track = db.relationship("Tracks")
+    last_stream_id: int = db.Column(
+        db.Integer, db.ForeignKey("streams.id"), nullable=False
+    )
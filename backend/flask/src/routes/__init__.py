@@ -1,7 +1,13 @@
 from flask import Blueprint, Flask
 from flask_restx import Api, Resource
 
+from src.routes.analytics import api as analytics_api
+from src.routes.search import api as search_api
+from src.routes.sessions import api as sessions_api
+from src.routes.snapshots import api as snapshots_api
+from src.routes.stats import api as stats_api
 from src.routes.streams import api as streams_api
+from src.routes.tracks import api as tracks_api
 
 
 def register_blueprints(app: Flask) -> None:
@@ -10,3 +16,9 @@ def register_blueprints(app: Flask) -> None:
     app.register_blueprint(blueprint=blueprint)
 
     api.add_namespace(streams_api)
+    api.add_namespace(stats_api)
+    api.add_namespace(analytics_api)
+    api.add_namespace(snapshots_api)
+    api.add_namespace(tracks_api)
+    api.add_namespace(sessions_api)
+    api.add_namespace(search_api)
@@ -0,0 +1,209 @@
+import calendar
+import datetime
+
+from flask_restx import Namespace, Resource, fields, inputs
+from src.server.extensions import analytics, http_cache
+from src.models.types import EPOCH
+from src.routes.streams import utc_datetime
+from src.utils.analytics import (
+    BUCKET_SECONDS,
+    GROUP_COLUMNS,
+    HISTOGRAM_COLUMNS,
+    group_by,
+    histogram,
+    time_buckets,
+)
+
+api = Namespace(
+    name="analytics",
+    description="Aggregates computed in memory over a columnar copy of the streams",
+)
+
+group_model = api.model(
+    name="AnalyticsGroup",
+    model={
+        "key": fields.Raw(
+            required=True,
+            attribute="key",
+            description="The track id, album id or reason the streams share",
+        ),
+        "plays": fields.Integer(
+            required=True,
+            attribute="plays",
+            description="The number of streams in the window",
+        ),
+        "ms_played": fields.Integer(
+            required=True,
+            attribute="ms_played",
+            description="The total time streamed in the window in milliseconds",
+        ),
+        "mean_ratio_played": fields.Float(
+            required=True,
+            attribute="mean_ratio_played",
+            description="The mean ratio of the track streamed 0.0 -> 1.0",
+        ),
+    },
+)
+
+histogram_model = api.model(
+    name="AnalyticsHistogram",
+    model={
+        "counts": fields.List(
+            fields.Integer, description="The number of streams in each bin"
+        ),
+        "edges": fields.List(
+            fields.Float, description="The edges of the bins, one more than counts"
+        ),
+    },
+)
+
+bucket_model = api.model(
+    name="AnalyticsBucket",
+    model={
+        "start": fields.DateTime(
+            required=True,
+            attribute="start",
+            description="The datetime the bucket starts at in UTC",
+        ),
+        "plays": fields.Integer(
+            required=True,
+            attribute="plays",
+            description="The number of streams in the bucket",
+        ),
+        "ms_played": fields.Integer(
+            required=True,
+            attribute="ms_played",
+            description="The total time streamed in the bucket in milliseconds",
+        ),
+    },
+)
+
+
+def epoch_seconds(value: datetime.datetime | None) -> int | None:
+    """
+    Converts a naive UTC datetime to seconds since the Unix epoch
+    """
+
+    return calendar.timegm(value.utctimetuple()) if value is not None else None
+
+
+window_parser = api.parser()
+window_parser.add_argument(
+    "start",
+    type=utc_datetime,
+    location="args",
+    help="Only count streams played at or after this UTC date",
+)
+window_parser.add_argument(
+    "end",
+    type=utc_datetime,
+    location="args",
+    help="Only count streams played before this UTC date",
+)
+
+group_parser = window_parser.copy()
+group_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 1000),
+    default=10,
+    location="args",
+    help="The maximum number of groups to return",
+)
+group_parser.add_argument(
+    "order",
+    choices=("plays", "ms_played"),
+    default="plays",
+    location="args",
+    help="Rank groups by number of streams or by time streamed",
+)
+
+histogram_parser = window_parser.copy()
+histogram_parser.add_argument(
+    "bins",
+    type=inputs.int_range(1, 1000),
+    default=10,
+    location="args",
+    help="The number of equal width bins",
+)
+
+time_buckets_parser = window_parser.copy()
+time_buckets_parser.add_argument(
+    "bucket",
+    choices=tuple(BUCKET_SECONDS),
+    default="day",
+    location="args",
+    help="The width of the buckets, weeks start on Mondays",
+)
+time_buckets_parser.add_argument(
+    "track_id", type=int, location="args", help="Only count streams of this track"
+)
+time_buckets_parser.add_argument(
+    "album_id", type=int, location="args", help="Only count streams of this album"
+)
+
+
+@api.route("/group/<string:column>")
+@api.param(name="column", description=f"One of {', '.join(GROUP_COLUMNS)}")
+class AnalyticsGroupResource(Resource):
+    @http_cache.cached
+    @api.expect(group_parser)
+    @api.marshal_list_with(group_model)
+    def get(self, column):
+        if column not in GROUP_COLUMNS:
+            api.abort(404, f"{column} is not one of {', '.join(GROUP_COLUMNS)}")
+
+        args = group_parser.parse_args()
+        return group_by(
+            analytics.columns,
+            column,
+            start=epoch_seconds(args["start"]),
+            end=epoch_seconds(args["end"]),
+            order=args["order"],
+            limit=args["limit"],
+        )
+
+
+@api.route("/histogram/<string:column>")
+@api.param(name="column", description=f"One of {', '.join(HISTOGRAM_COLUMNS)}")
+class AnalyticsHistogramResource(Resource):
+    @http_cache.cached
+    @api.expect(histogram_parser)
+    @api.marshal_with(histogram_model)
+    def get(self, column):
+        if column not in HISTOGRAM_COLUMNS:
+            api.abort(404, f"{column} is not one of {', '.join(HISTOGRAM_COLUMNS)}")
+
+        args = histogram_parser.parse_args()
+        return histogram(
+            analytics.columns,
+            column,
+            bins=args["bins"],
+            start=epoch_seconds(args["start"]),
+            end=epoch_seconds(args["end"]),
+        )
+
+
+@api.route("/time-buckets")
+class AnalyticsTimeBucketsResource(Resource):
+    @http_cache.cached
+    @api.expect(time_buckets_parser)
+    @api.marshal_list_with(bucket_model)
+    def get(self):
+        args = time_buckets_parser.parse_args()
+        buckets = time_buckets(
+            analytics.columns,
+            bucket=args["bucket"],
+            start=epoch_seconds(args["start"]),
+            end=epoch_seconds(args["end"]),
+            track_id=args["track_id"],
+            album_id=args["album_id"],
+        )
+
+        # Naive UTC datetimes, formatted like the dates of every other route
+        return [
+            {
+                **bucket,
+                "start": EPOCH + datetime.timedelta(seconds=bucket["start"]),
+            }
+            for bucket in buckets
+        ]
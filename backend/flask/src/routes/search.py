@@ -0,0 +1,123 @@
+from flask_restx import Namespace, Resource, fields, inputs
+from src.server.extensions import db, http_cache
+from src.utils.search import (
+    SEARCH_CANDIDATES,
+    SEARCH_ENTITY_TYPES,
+    SEARCH_QUERY,
+    build_match_query,
+)
+
+api = Namespace(
+    name="search",
+    description="Ranked prefix search over the names of tracks, albums, artists, "
+    "labels and genres",
+)
+
+search_result_model = api.model(
+    name="SearchResult",
+    model={
+        "type": fields.String(
+            required=True,
+            attribute="entity_type",
+            description="The kind of object found, one of "
+            f"{', '.join(SEARCH_ENTITY_TYPES)}",
+        ),
+        "id": fields.Integer(
+            required=True, attribute="entity_id", description="The id of the object"
+        ),
+        "name": fields.String(
+            required=True, attribute="name", description="The name of the object"
+        ),
+        "rank": fields.Float(
+            required=True,
+            attribute="rank",
+            description="The bm25 rank of the match, lower is more relevant",
+        ),
+    },
+)
+
+search_results_model = api.model(
+    name="SearchResults",
+    model={
+        "query": fields.String(
+            required=True, attribute="query", description="The query searched for"
+        ),
+        "items": fields.List(fields.Nested(search_result_model)),
+    },
+)
+
+search_parser = api.parser()
+search_parser.add_argument(
+    "q",
+    type=str,
+    required=True,
+    location="args",
+    help="Words the names must contain, the last letters of each word may be "
+    "left out",
+)
+search_parser.add_argument(
+    "type",
+    type=str,
+    action="split",
+    location="args",
+    help="Comma separated kinds of objects to search, all of them by default",
+)
+search_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 100),
+    default=10,
+    location="args",
+    help="The maximum number of results to return",
+)
+
+
+@api.route("/")
+class SearchResource(Resource):
+    @http_cache.cached
+    @api.expect(search_parser)
+    @api.marshal_with(search_results_model)
+    def get(self):
+        args = search_parser.parse_args()
+
+        match: str | None = build_match_query(args["q"])
+        if match is None:
+            api.abort(400, "q must contain at least one letter or digit")
+
+        query: str = SEARCH_QUERY
+        parameters: dict = {
+            "match": match,
+            "candidates": SEARCH_CANDIDATES,
+            "limit": args["limit"],
+        }
+        if args["type"]:
+            entity_types: list[str] = list(dict.fromkeys(args["type"]))
+            unknown: list[str] = [
+                entity_type
+                for entity_type in entity_types
+                if entity_type not in SEARCH_ENTITY_TYPES
+            ]
+            if unknown:
+                api.abort(
+                    400,
+                    f"Unknown type {', '.join(unknown)}, expected any of "
+                    f"{', '.join(SEARCH_ENTITY_TYPES)}",
+                )
+
+            query += " AND entity_type IN ({})".format(
+                ", ".join(f":type_{pos}" for pos in range(len(entity_types)))
+            )
+            parameters.update(
+                (f"type_{pos}", entity_type)
+                for pos, entity_type in enumerate(entity_types)
+            )
+
+        return {
+            "query": args["q"],
+            "items": db.session.execute(
+                db.text(
+                    f"SELECT * FROM ({query} LIMIT :candidates) "
+                    "ORDER BY rank, entity_type, entity_id LIMIT :limit"
+                ),
+                parameters,
+            ).all(),
+        }
@@ -0,0 +1,153 @@
+from flask_restx import Namespace, Resource, fields, inputs
+from src.server.extensions import db, http_cache
+from src.models.models import Sessions
+from src.routes.streams import decode_cursor, encode_cursor, utc_datetime
+
+api = Namespace(
+    name="sessions",
+    description="Runs of streams played without a long pause in between",
+)
+
+sessions_model = api.model(
+    name="Sessions",
+    model={
+        "id": fields.Integer(
+            required=True, attribute="id", description="the id of session"
+        ),
+        "start_date": fields.DateTime(
+            required=True,
+            attribute="start_date",
+            description="The datetime the first stream of the session started in UTC",
+        ),
+        "end_date": fields.DateTime(
+            required=True,
+            attribute="end_date",
+            description="The datetime the last stream of the session ended in UTC",
+        ),
+        "duration_ms": fields.Integer(
+            required=True,
+            attribute=lambda session: int(
+                (session.end_date - session.start_date).total_seconds() * 1000
+            ),
+            description="The time between the start and end of the session in "
+            "milliseconds",
+        ),
+        "plays": fields.Integer(
+            required=True,
+            attribute="plays",
+            description="The number of streams in the session",
+        ),
+        "ms_played": fields.Integer(
+            required=True,
+            attribute="ms_played",
+            description="The total time streamed in the session in milliseconds",
+        ),
+        "skips": fields.Integer(
+            required=True,
+            attribute="skips",
+            description="The number of streams in the session ended by skipping",
+        ),
+        "first_stream_id": fields.Integer(
+            required=True,
+            attribute="first_stream_id",
+            description="the id of the stream the session started with",
+        ),
+        "first_track_id": fields.Integer(
+            required=True,
+            attribute="first_track_id",
+            description="the id of the track the session started with",
+        ),
+        "first_track_name": fields.String(
+            attribute="first_track.name",
+            description="the name of the track the session started with",
+        ),
+        "last_stream_id": fields.Integer(
+            required=True,
+            attribute="last_stream_id",
+            description="the id of the stream the session ended with",
+        ),
+    },
+)
+
+sessions_page_model = api.model(
+    name="SessionsPage",
+    model={
+        "limit": fields.Integer(
+            required=True,
+            attribute="limit",
+            description="The maximum number of sessions returned in this page",
+        ),
+        "items": fields.List(fields.Nested(sessions_model)),
+        "next_cursor": fields.String(
+            attribute="next_cursor",
+            description="The cursor of the next page, null on the last page",
+        ),
+    },
+)
+
+sessions_parser = api.parser()
+sessions_parser.add_argument(
+    "cursor", type=str, location="args", help="The next_cursor of the previous page"
+)
+sessions_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 1000),
+    default=100,
+    location="args",
+    help="The maximum number of sessions to return",
+)
+sessions_parser.add_argument(
+    "start",
+    type=utc_datetime,
+    location="args",
+    help="Only return sessions started at or after this UTC date",
+)
+sessions_parser.add_argument(
+    "end",
+    type=utc_datetime,
+    location="args",
+    help="Only return sessions started before this UTC date",
+)
+
+
+@api.route("/")
+class SessionsListResource(Resource):
+    @http_cache.cached
+    @api.expect(sessions_parser)
+    @api.marshal_with(sessions_page_model)
+    def get(self):
+        args = sessions_parser.parse_args()
+
+        query = db.session.query(Sessions).options(db.joinedload(Sessions.first_track))
+        if args["start"] is not None:
+            query = query.filter(Sessions.start_date >= args["start"])
+        if args["end"] is not None:
+            query = query.filter(Sessions.start_date < args["end"])
+
+        if args["cursor"] is not None:
+            try:
+                start_date, session_id = decode_cursor(args["cursor"])
+            except ValueError as error:
+                api.abort(400, str(error))
+
+            # Same keyset condition as the stream cursor, on (start_date, id)
+            query = query.filter(
+                Sessions.start_date >= start_date,
+                db.or_(Sessions.start_date > start_date, Sessions.id > session_id),
+            )
+
+        sessions = (
+            query.order_by(Sessions.start_date, Sessions.id)
+            .limit(args["limit"] + 1)
+            .all()
+        )
+
+        return {
+            "limit": args["limit"],
+            "items": sessions[: args["limit"]],
+            "next_cursor": encode_cursor(
+                sessions[args["limit"] - 1].start_date, sessions[args["limit"] - 1].id
+            )
+            if len(sessions) > args["limit"]
+            else None,
+        }
@@ -0,0 +1,156 @@
+import os
+from collections.abc import Callable
+
+from flask import current_app, send_file
+from flask_restx import Namespace, Resource, fields
+from src.server.extensions import http_cache
+from src.utils.snapshot import SNAPSHOT_FORMATS, latest_snapshot
+
+api = Namespace(
+    name="snapshots",
+    description="Columnar snapshots of the streams joined with their tracks, "
+    "albums, artists and genres, one file per year",
+)
+
+# Times a request reads the current snapshot when a writer removes it meanwhile
+SNAPSHOT_READ_ATTEMPTS: int = 3
+
+# Media type of the files of every snapshot format
+SNAPSHOT_MIMETYPES: dict[str, str] = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+snapshot_file_model = api.model(
+    name="SnapshotFile",
+    model={
+        "year": fields.Integer(
+            required=True,
+            attribute="year",
+            description="The UTC year of the streams in the file",
+        ),
+        "size": fields.Integer(
+            required=True, attribute="size", description="The size of the file in bytes"
+        ),
+    },
+)
+
+snapshot_model = api.model(
+    name="Snapshot",
+    model={
+        "format": fields.String(
+            required=True, attribute="format", description="Either parquet or arrow"
+        ),
+        "generation": fields.Integer(
+            required=True,
+            attribute="generation",
+            description="The data generation the snapshot was written from, "
+            "older than the current one until its snapshot is written",
+        ),
+        "files": fields.List(fields.Nested(snapshot_file_model)),
+    },
+)
+
+snapshot_parser = api.parser()
+snapshot_parser.add_argument(
+    "format",
+    choices=tuple(SNAPSHOT_FORMATS),
+    default="parquet",
+    location="args",
+    help="Parquet files, or Arrow IPC files that can be memory mapped",
+)
+
+
+def current_snapshot(snapshot_format: str) -> tuple[int, str]:
+    """
+    Returns the newest snapshot written up to the current data generation and
+    its generation, aborting with 404 if none was written yet.
+
+    Snapshots are written after populating the database or by snapshot_db.py,
+    so requests only ever read them.
+    """
+
+    current = http_cache.current_generation()
+    snapshot = latest_snapshot(
+        current_app.config["SNAPSHOT_FOLDER"],
+        snapshot_format,
+        current[0] if current is not None else 0,
+    )
+    if snapshot is None:
+        api.abort(404, f"No {snapshot_format} snapshot was written yet")
+
+    return snapshot
+
+
+def read_snapshot(snapshot_format: str, read: Callable[[int, str], object]) -> object:
+    """
+    Returns read called with the generation and folder of the current
+    snapshot, aborting with 404 if none was written yet.
+
+    Writers remove older snapshots once a newer one is written, so read is
+    called again with the newer snapshot if its files vanish meanwhile.
+    """
+
+    for _ in range(SNAPSHOT_READ_ATTEMPTS):
+        generation, folder = current_snapshot(snapshot_format)
+        try:
+            return read(generation, folder)
+        except FileNotFoundError:
+            continue
+
+    api.abort(404, f"The {snapshot_format} snapshot was removed while it was read")
+
+
+@api.route("/")
+class SnapshotsResource(Resource):
+    # Not cached by generation, since a snapshot of the current generation
+    # can be written after an older one was listed
+    @api.expect(snapshot_parser)
+    @api.marshal_with(snapshot_model)
+    def get(self):
+        args = snapshot_parser.parse_args()
+        extension: str = SNAPSHOT_FORMATS[args["format"]]
+
+        def list_files(generation: int, folder: str) -> dict:
+            files: list[dict] = []
+            for name in sorted(os.listdir(folder)):
+                file_path = os.path.join(folder, name, f"streams.{extension}")
+                files.append(
+                    {
+                        "year": int(name.removeprefix("year=")),
+                        "size": os.path.getsize(file_path),
+                    }
+                )
+
+            return {"format": args["format"], "generation": generation, "files": files}
+
+        return read_snapshot(args["format"], list_files)
+
+
+@api.route("/<int:year>")
+@api.param(name="year", description="The UTC year of the streams")
+class SnapshotFileResource(Resource):
+    @api.expect(snapshot_parser)
+    @api.produces(list(SNAPSHOT_MIMETYPES.values()))
+    def get(self, year):
+        args = snapshot_parser.parse_args()
+        extension: str = SNAPSHOT_FORMATS[args["format"]]
+
+        def send_year(generation: int, folder: str):
+            file_path = os.path.join(folder, f"year={year}", f"streams.{extension}")
+            # A removed folder is retried, a missing year within it is not
+            if os.path.isdir(folder) and not os.path.isfile(file_path):
+                api.abort(404, f"No streams were played in {year}")
+
+            # The file is opened here, so a snapshot removed afterwards is
+            # still sent whole. The ETag is the generation, so clients
+            # revalidate against new data
+            return send_file(
+                file_path,
+                mimetype=SNAPSHOT_MIMETYPES[args["format"]],
+                as_attachment=True,
+                download_name=f"streams-{year}.{extension}",
+                etag=f"{args['format']}-{generation}-{year}",
+            )
+
+        return read_snapshot(args["format"], send_year)
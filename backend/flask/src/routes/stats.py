@@ -0,0 +1,405 @@
+import datetime
+import zoneinfo
+
+from flask import current_app
+from flask_restx import Namespace, Resource, fields, inputs
+from src.server.extensions import db, http_cache
+from src.models.models import (
+    Tracks,
+    Albums,
+    Artists,
+    Genres,
+    TrackDailyStats,
+    AlbumDailyStats,
+    ArtistDailyStats,
+    GenreDailyStats,
+    HourlyStats,
+    AlbumHourlyStats,
+    ArtistHourlyStats,
+    GenreHourlyStats,
+)
+
+api = Namespace(
+    name="stats", description="Listening statistics summed over a window of days"
+)
+
+# The entity model and daily rollup model behind every kind of top list
+TOP_KINDS: dict[str, tuple[db.Model, db.Model, str]] = {
+    "tracks": (Tracks, TrackDailyStats, "track_id"),
+    "albums": (Albums, AlbumDailyStats, "album_id"),
+    "artists": (Artists, ArtistDailyStats, "artist_id"),
+    "genres": (Genres, GenreDailyStats, "genre_id"),
+}
+
+# The hourly rollup model behind every filter of series and heatmaps
+HOURLY_FILTERS: dict[str, db.Model] = {
+    "album_id": AlbumHourlyStats,
+    "artist_id": ArtistHourlyStats,
+    "genre_id": GenreHourlyStats,
+}
+
+# SQLite datetime modifiers turning an hour into the start of its bucket,
+# weeks start on Mondays
+SERIES_BUCKETS: dict[str, tuple[str, ...]] = {
+    "hour": (),
+    "day": ("start of day",),
+    "week": ("start of day", "-6 days", "weekday 1"),
+    "month": ("start of month",),
+}
+
+top_item_model = api.model(
+    name="TopItem",
+    model={
+        "id": fields.Integer(
+            required=True,
+            attribute="id",
+            description="The id of the track, album, artist or genre",
+        ),
+        "name": fields.String(
+            required=True,
+            attribute="name",
+            description="The name of the track, album, artist or genre",
+        ),
+        "plays": fields.Integer(
+            required=True,
+            attribute="plays",
+            description="The number of streams in the window",
+        ),
+        "ms_played": fields.Integer(
+            required=True,
+            attribute="ms_played",
+            description="The total time streamed in the window in milliseconds",
+        ),
+        "skips": fields.Integer(
+            required=True,
+            attribute="skips",
+            description="The number of streams in the window ended by skipping",
+        ),
+    },
+)
+
+top_list_model = api.model(
+    name="TopList",
+    model={
+        "kind": fields.String(
+            required=True,
+            attribute="kind",
+            description="One of tracks, albums, artists or genres",
+        ),
+        "start": fields.Date(
+            attribute="start", description="The first day of the window, if any"
+        ),
+        "end": fields.Date(
+            attribute="end", description="The day after the window, if any"
+        ),
+        "items": fields.List(fields.Nested(top_item_model)),
+    },
+)
+
+top_parser = api.parser()
+top_parser.add_argument(
+    "start",
+    type=inputs.date_from_iso8601,
+    location="args",
+    help="Only count streams played on or after this UTC day",
+)
+top_parser.add_argument(
+    "end",
+    type=inputs.date_from_iso8601,
+    location="args",
+    help="Only count streams played before this UTC day",
+)
+top_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 1000),
+    default=10,
+    location="args",
+    help="The maximum number of items to return",
+)
+top_parser.add_argument(
+    "order",
+    choices=("plays", "ms_played"),
+    default="plays",
+    location="args",
+    help="Rank items by number of streams or by time streamed",
+)
+
+
+@api.route("/top/<string:kind>")
+@api.param(name="kind", description="One of tracks, albums, artists or genres")
+class TopResource(Resource):
+    @http_cache.cached
+    @api.expect(top_parser)
+    @api.marshal_with(top_list_model)
+    def get(self, kind):
+        if kind not in TOP_KINDS:
+            api.abort(404, f"{kind} is not one of {', '.join(TOP_KINDS)}")
+
+        args = top_parser.parse_args()
+        model, stats_model, key = TOP_KINDS[kind]
+        stats_key = getattr(stats_model, key)
+
+        plays = db.func.sum(stats_model.plays).label("plays")
+        ms_played = db.func.sum(stats_model.ms_played).label("ms_played")
+        query = (
+            db.session.query(
+                model.id,
+                model.name,
+                plays,
+                ms_played,
+                db.func.sum(stats_model.skips).label("skips"),
+            )
+            .join(model, model.id == stats_key)
+            .group_by(stats_key)
+        )
+        # The rollup primary keys start with day, so a window is an index range
+        if args["start"] is not None:
+            query = query.filter(stats_model.day >= args["start"])
+        if args["end"] is not None:
+            query = query.filter(stats_model.day < args["end"])
+
+        ranking = plays if args["order"] == "plays" else ms_played
+        items = query.order_by(ranking.desc(), model.id).limit(args["limit"]).all()
+
+        return {
+            "kind": kind,
+            "start": args["start"],
+            "end": args["end"],
+            "items": items,
+        }
+
+
+series_item_model = api.model(
+    name="SeriesItem",
+    model={
+        "start": fields.DateTime(
+            required=True,
+            attribute="start",
+            description="The local datetime the bucket starts at",
+        ),
+        "plays": fields.Integer(
+            required=True,
+            attribute="plays",
+            description="The number of streams in the bucket",
+        ),
+        "ms_played": fields.Integer(
+            required=True,
+            attribute="ms_played",
+            description="The total time streamed in the bucket in milliseconds",
+        ),
+    },
+)
+
+series_model = api.model(
+    name="Series",
+    model={
+        "timezone": fields.String(
+            required=True,
+            attribute="timezone",
+            description="The time zone buckets are local to",
+        ),
+        "bucket": fields.String(
+            required=True,
+            attribute="bucket",
+            description="One of hour, day, week or month",
+        ),
+        "items": fields.List(fields.Nested(series_item_model)),
+    },
+)
+
+heatmap_cell_model = api.model(
+    name="HeatmapCell",
+    model={
+        "weekday": fields.Integer(
+            required=True,
+            attribute="weekday",
+            description="The local day of the week, 0 for Monday to 6 for Sunday",
+        ),
+        "hour": fields.Integer(
+            required=True,
+            attribute="hour",
+            description="The local hour of the day, 0 -> 23",
+        ),
+        "plays": fields.Integer(
+            required=True,
+            attribute="plays",
+            description="The number of streams in the hour",
+        ),
+        "ms_played": fields.Integer(
+            required=True,
+            attribute="ms_played",
+            description="The total time streamed in the hour in milliseconds",
+        ),
+    },
+)
+
+heatmap_model = api.model(
+    name="Heatmap",
+    model={
+        "timezone": fields.String(
+            required=True,
+            attribute="timezone",
+            description="The time zone weekdays and hours are local to",
+        ),
+        "cells": fields.List(
+            fields.Nested(heatmap_cell_model),
+            description="Every hour of every weekday, Monday 0:00 first",
+        ),
+    },
+)
+
+
+def local_datetime(value: str) -> datetime.datetime:
+    """
+    Parses an ISO 8601 date or datetime into a naive datetime local to
+    STATS_TIMEZONE, the time zone the hourly stats are keyed in. Dates and
+    datetimes without an offset are already local.
+    """
+
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError as error:
+        raise ValueError(f"{value} is not an ISO 8601 date or datetime") from error
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(
+            zoneinfo.ZoneInfo(current_app.config["STATS_TIMEZONE"])
+        ).replace(tzinfo=None)
+
+    return parsed
+
+
+local_datetime.__schema__ = {"type": "string", "format": "date-time"}
+
+hourly_parser = api.parser()
+hourly_parser.add_argument(
+    "start",
+    type=local_datetime,
+    location="args",
+    help="Only count streams played at or after this local hour",
+)
+hourly_parser.add_argument(
+    "end",
+    type=local_datetime,
+    location="args",
+    help="Only count streams played before this local hour",
+)
+hourly_parser.add_argument(
+    "shuffle",
+    type=inputs.boolean,
+    location="args",
+    help="Only count streams played with or without shuffle",
+)
+for hourly_filter in HOURLY_FILTERS:
+    hourly_parser.add_argument(
+        hourly_filter,
+        type=int,
+        location="args",
+        help=f"Only count streams of this {hourly_filter.removesuffix('_id')}, "
+        "at most one of album_id, artist_id and genre_id can be given",
+    )
+
+series_parser = hourly_parser.copy()
+series_parser.add_argument(
+    "bucket",
+    choices=tuple(SERIES_BUCKETS),
+    default="day",
+    location="args",
+    help="The width of the buckets, weeks start on Mondays",
+)
+
+
+def hourly_filters(args: dict) -> tuple[db.Model, list]:
+    """
+    Returns the hourly rollup model matching the filters of args, and the
+    conditions restricting its rows to them
+    """
+
+    filters: list[str] = [name for name in HOURLY_FILTERS if args[name] is not None]
+    if len(filters) > 1:
+        api.abort(400, f"Only one of {', '.join(HOURLY_FILTERS)} can be given")
+
+    model: db.Model = HOURLY_FILTERS[filters[0]] if filters else HourlyStats
+    # The primary keys start with the entity and then the hour, so filters and
+    # windows are index ranges
+    conditions: list = [getattr(model, name) == args[name] for name in filters]
+    if args["start"] is not None:
+        conditions.append(model.hour >= args["start"])
+    if args["end"] is not None:
+        conditions.append(model.hour < args["end"])
+    if args["shuffle"] is not None:
+        conditions.append(model.shuffle == args["shuffle"])
+
+    return model, conditions
+
+
+@api.route("/series")
+class SeriesResource(Resource):
+    @http_cache.cached
+    @api.expect(series_parser)
+    @api.marshal_with(series_model)
+    def get(self):
+        args = series_parser.parse_args()
+        model, conditions = hourly_filters(args)
+
+        start = db.type_coerce(
+            db.func.datetime(model.hour, *SERIES_BUCKETS[args["bucket"]]),
+            db.DateTime,
+        ).label("start")
+        items = db.session.execute(
+            db.select(
+                start,
+                db.func.sum(model.plays).label("plays"),
+                db.func.sum(model.ms_played).label("ms_played"),
+            )
+            .where(*conditions)
+            .group_by(start)
+            .order_by(start)
+        ).all()
+
+        return {
+            "timezone": current_app.config["STATS_TIMEZONE"],
+            "bucket": args["bucket"],
+            "items": items,
+        }
+
+
+@api.route("/heatmap")
+class HeatmapResource(Resource):
+    @http_cache.cached
+    @api.expect(hourly_parser)
+    @api.marshal_with(heatmap_model)
+    def get(self):
+        args = hourly_parser.parse_args()
+        model, conditions = hourly_filters(args)
+
+        # SQLite numbers weekdays from Sunday, the heatmap from Monday
+        weekday = (db.cast(db.func.strftime("%w", model.hour), db.Integer) + 6) % 7
+        hour = db.cast(db.func.strftime("%H", model.hour), db.Integer)
+        sums: dict[tuple[int, int], tuple[int, int]] = {
+            (cell_weekday, cell_hour): (plays, ms_played)
+            for cell_weekday, cell_hour, plays, ms_played in db.session.execute(
+                db.select(
+                    weekday,
+                    hour,
+                    db.func.sum(model.plays),
+                    db.func.sum(model.ms_played),
+                )
+                .where(*conditions)
+                .group_by(weekday, hour)
+            )
+        }
+
+        return {
+            "timezone": current_app.config["STATS_TIMEZONE"],
+            "cells": [
+                {
+                    "weekday": cell_weekday,
+                    "hour": cell_hour,
+                    "plays": sums.get((cell_weekday, cell_hour), (0, 0))[0],
+                    "ms_played": sums.get((cell_weekday, cell_hour), (0, 0))[1],
+                }
+                for cell_weekday in range(7)
+                for cell_hour in range(24)
+            ],
+        }
@@ -1,6 +1,19 @@
-from flask_restx import Namespace, Resource, fields
-from src.server.extensions import db
-from src.models.models import Streams
+import base64
+import binascii
+import csv
+import datetime
+import functools
+import io
+import json
+import zlib
+from collections.abc import Iterator
+
+from flask import Response, request, stream_with_context
+from flask_restx import Namespace, Resource, fields, inputs
+from src.server.extensions import db, http_cache
+from src.models.associations import genres_tracks, stream_artists
+from src.models.models import Reasons, Streams
+from src.models.types import EPOCH
 
 api = Namespace(
     name="streams", description="Individual records of a track being played"
@@ -87,17 +100,436 @@ streams_page_model = api.model(
     },
 )
 
+streams_cursor_page_model = api.model(
+    name="StreamsCursorPage",
+    model={
+        "limit": fields.Integer(
+            required=True,
+            attribute="limit",
+            description="The maximum number of streams returned in this page",
+        ),
+        "items": fields.List(fields.Nested(streams_model)),
+        "next_cursor": fields.String(
+            attribute="next_cursor",
+            description="The cursor of the next page, null on the last page",
+        ),
+        "total": fields.Integer(
+            attribute="total",
+            description="The number of streams matching the filters, if requested",
+        ),
+    },
+)
+
+
+def utc_datetime(value: str) -> datetime.datetime:
+    """
+    Parses an ISO 8601 date or datetime into a naive UTC datetime
+    """
+
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError as error:
+        raise ValueError(f"{value} is not an ISO 8601 date or datetime") from error
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    return parsed
+
+
+utc_datetime.__schema__ = {"type": "string", "format": "date-time"}
+
+
+def artist_tracks(artist_id: int):
+    """
+    Returns the ids of the tracks whose streams are credited to an artist, the
+    tracks of the artist and the tracks of its albums
+    """
+
+    return db.select(stream_artists.c.track_id).where(
+        stream_artists.c.artist_id == artist_id
+    )
+
+
+def genre_tracks(genre_id: int):
+    """
+    Returns the ids of the tracks of a genre, which are linked by the populator
+    to the genres of their artists and of the artists of their album
+    """
+
+    return db.select(genres_tracks.c.track_id).where(
+        genres_tracks.c.genre_id == genre_id
+    )
+
+
+def encode_cursor(position_date: datetime.datetime, position_id: int) -> str:
+    """
+    Encodes a (date, id) keyset position, such as the (stream_date, id) of a
+    stream, as an opaque cursor
+    """
+
+    position = json.dumps([position_date.isoformat(), position_id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """
+    Decodes a cursor made by encode_cursor, raising ValueError if it is invalid
+    """
+
+    try:
+        stream_date, stream_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.datetime.fromisoformat(stream_date), int(stream_id)
+    except (binascii.Error, TypeError, ValueError) as error:
+        raise ValueError(f"{cursor} is not a valid cursor") from error
+
+
+streams_cursor_parser = api.parser()
+streams_cursor_parser.add_argument(
+    "cursor", type=str, location="args", help="The next_cursor of the previous page"
+)
+streams_cursor_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 1000),
+    default=1000,
+    location="args",
+    help="The maximum number of streams to return",
+)
+streams_cursor_parser.add_argument(
+    "start",
+    type=utc_datetime,
+    location="args",
+    help="Only return streams played at or after this UTC date",
+)
+streams_cursor_parser.add_argument(
+    "end",
+    type=utc_datetime,
+    location="args",
+    help="Only return streams played before this UTC date",
+)
+streams_cursor_parser.add_argument(
+    "artist_id",
+    type=int,
+    location="args",
+    help="Only return streams of tracks by this artist or from its albums",
+)
+streams_cursor_parser.add_argument(
+    "genre_id",
+    type=int,
+    location="args",
+    help="Only return streams of tracks by artists of this genre",
+)
+streams_cursor_parser.add_argument(
+    "total",
+    type=inputs.boolean,
+    default=False,
+    location="args",
+    help="Count the streams matching the filters, this scans every match",
+)
+
+# Rows fetched from the database and written to the response at a time
+EXPORT_CHUNK_SIZE: int = 5000
+
+# Fields of an exported stream, in the order of the CSV columns
+EXPORT_FIELDS: tuple[str, ...] = (
+    "id",
+    "track_id",
+    "album_id",
+    "stream_date",
+    "ms_played",
+    "ratio_played",
+    "reason_start",
+    "reason_end",
+    "shuffle",
+    "created_date",
+    "modified_date",
+)
+
+# Fastest zlib level, it compresses exports almost as well as the default one
+EXPORT_GZIP_LEVEL: int = 1
+
+EXPORT_MIMETYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+streams_export_parser = api.parser()
+streams_export_parser.add_argument(
+    "format",
+    choices=tuple(EXPORT_MIMETYPES),
+    default="ndjson",
+    location="args",
+    help="Export one JSON object per line, or CSV with a header row",
+)
+streams_export_parser.add_argument(
+    "start",
+    type=utc_datetime,
+    location="args",
+    help="Only export streams played at or after this UTC date",
+)
+streams_export_parser.add_argument(
+    "end",
+    type=utc_datetime,
+    location="args",
+    help="Only export streams played before this UTC date",
+)
+streams_export_parser.add_argument(
+    "artist_id",
+    type=int,
+    location="args",
+    help="Only export streams of tracks by this artist or from its albums",
+)
+streams_export_parser.add_argument(
+    "genre_id",
+    type=int,
+    location="args",
+    help="Only export streams of tracks by artists of this genre",
+)
+
+# Encodes export rows like the API encodes streams_model, minus the spaces
+EXPORT_ENCODER: json.JSONEncoder = json.JSONEncoder(separators=(",", ":"))
+
+SECONDS_PER_DAY: int = 86400
+
+
+@functools.cache
+def export_day(days: int) -> str:
+    """
+    Formats a number of days since the epoch as an ISO 8601 date
+    """
+
+    return (EPOCH + datetime.timedelta(days=days)).date().isoformat()
+
+
+@functools.cache
+def export_time(seconds: int) -> str:
+    """
+    Formats a number of seconds since midnight as an ISO 8601 time
+    """
+
+    return "%02d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def export_date(seconds: int) -> str:
+    """
+    Formats epoch seconds as the naive ISO 8601 datetime fields.DateTime
+    formats a UTC datetime as
+    """
+
+    return (
+        f"{export_day(seconds // SECONDS_PER_DAY)}"
+        f"T{export_time(seconds % SECONDS_PER_DAY)}"
+    )
+
+
+def export_rows(chunk: list[tuple], reasons: dict[int, str]) -> list[tuple]:
+    """
+    Converts raw export rows to the values streams_model marshals streams to,
+    in the order of EXPORT_FIELDS.
+
+    Rows hold the stored SQLite values, dates are epoch seconds, reasons are
+    ids of reasons, shuffle is 0 or 1 and ratio_played may be an integer.
+    Dates are formatted without going through datetime per row, split into
+    their day and time of day, there are few enough of both to format each
+    once.
+    """
+
+    return [
+        (
+            stream_id,
+            track_id,
+            album_id,
+            export_date(stream_date),
+            ms_played,
+            float(ratio_played),
+            reasons[reason_start],
+            reasons[reason_end],
+            bool(shuffle),
+            export_date(created_date),
+            export_date(modified_date),
+        )
+        for (
+            stream_id,
+            track_id,
+            album_id,
+            stream_date,
+            ms_played,
+            ratio_played,
+            reason_start,
+            reason_end,
+            shuffle,
+            created_date,
+            modified_date,
+        ) in chunk
+    ]
+
+
+def export_chunks(
+    chunks: Iterator[list[tuple]], export_format: str, reasons: dict[int, str]
+) -> Iterator[str]:
+    """
+    Formats chunks of raw export rows as NDJSON lines, encoded like the API
+    encodes streams_model, or as CSV records
+    """
+
+    if export_format == "csv":
+        booleans: dict[bool, str] = {False: "false", True: "true"}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(EXPORT_FIELDS)
+        for chunk in chunks:
+            writer.writerows(
+                row[:8] + (booleans[row[8]],) + row[9:]
+                for row in export_rows(chunk, reasons)
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for chunk in chunks:
+        yield "".join(
+            [
+                EXPORT_ENCODER.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+                for row in export_rows(chunk, reasons)
+            ]
+        )
+
+
+def gzip_chunks(chunks: Iterator[str]) -> Iterator[bytes]:
+    """
+    Compresses a stream of text chunks into a single gzip stream
+    """
+
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed: bytes = compressor.compress(chunk.encode())
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
 
 @api.route("/")
 class StreamsListResource(Resource):
+    @http_cache.cached
     @api.marshal_with(streams_page_model)
     def get(self):
         return db.paginate(db.session.query(Streams), per_page=1000)
 
 
+@api.route("/cursor")
+class StreamsCursorResource(Resource):
+    @http_cache.cached
+    @api.expect(streams_cursor_parser)
+    @api.marshal_with(streams_cursor_page_model)
+    def get(self):
+        args = streams_cursor_parser.parse_args()
+
+        query = db.session.query(Streams)
+        if args["start"] is not None:
+            query = query.filter(Streams.stream_date >= args["start"])
+        if args["end"] is not None:
+            query = query.filter(Streams.stream_date < args["end"])
+        if args["artist_id"] is not None:
+            query = query.filter(Streams.track_id.in_(artist_tracks(args["artist_id"])))
+        if args["genre_id"] is not None:
+            query = query.filter(Streams.track_id.in_(genre_tracks(args["genre_id"])))
+
+        total = query.count() if args["total"] else None
+
+        if args["cursor"] is not None:
+            try:
+                stream_date, stream_id = decode_cursor(args["cursor"])
+            except ValueError as error:
+                api.abort(400, str(error))
+
+            # Keyset condition on (stream_date, id), written so that the first
+            # term can be answered from an index range on stream_date
+            query = query.filter(
+                Streams.stream_date >= stream_date,
+                db.or_(Streams.stream_date > stream_date, Streams.id > stream_id),
+            )
+
+        streams = (
+            query.order_by(Streams.stream_date, Streams.id)
+            .limit(args["limit"] + 1)
+            .all()
+        )
+
+        return {
+            "limit": args["limit"],
+            "items": streams[: args["limit"]],
+            "next_cursor": encode_cursor(
+                streams[args["limit"] - 1].stream_date, streams[args["limit"] - 1].id
+            )
+            if len(streams) > args["limit"]
+            else None,
+            "total": total,
+        }
+
+
+@api.route("/export")
+class StreamsExportResource(Resource):
+    @api.expect(streams_export_parser)
+    @api.produces(list(EXPORT_MIMETYPES.values()))
+    def get(self):
+        args = streams_export_parser.parse_args()
+
+        # A Core select run on the connection returns plain tuples, and the
+        # coerced columns skip the per row conversion of their stored values
+        query = db.select(
+            Streams.id,
+            Streams.track_id,
+            Streams.album_id,
+            db.type_coerce(Streams.stream_date, db.Integer),
+            Streams.ms_played,
+            db.type_coerce(Streams.ratio_played, db.Float),
+            Streams.reason_start_id,
+            Streams.reason_end_id,
+            db.type_coerce(Streams.shuffle, db.Integer),
+            db.type_coerce(Streams.created_date, db.Integer),
+            db.type_coerce(Streams.modified_date, db.Integer),
+        ).order_by(Streams.stream_date, Streams.id)
+        if args["start"] is not None:
+            query = query.where(Streams.stream_date >= args["start"])
+        if args["end"] is not None:
+            query = query.where(Streams.stream_date < args["end"])
+        if args["artist_id"] is not None:
+            query = query.where(Streams.track_id.in_(artist_tracks(args["artist_id"])))
+        if args["genre_id"] is not None:
+            query = query.where(Streams.track_id.in_(genre_tracks(args["genre_id"])))
+
+        reasons: dict[int, str] = dict(
+            db.session.execute(db.select(Reasons.id, Reasons.name)).all()
+        )
+
+        def generate() -> Iterator[str]:
+            result = (
+                db.session.connection()
+                .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+                .execute(query)
+            )
+            yield from export_chunks(result.partitions(), args["format"], reasons)
+
+        headers: dict[str, str] = {
+            "Content-Disposition": f"attachment; filename=streams.{args['format']}",
+            "Vary": "Accept-Encoding",
+        }
+        chunks = stream_with_context(generate())
+        if "gzip" in request.accept_encodings:
+            headers["Content-Encoding"] = "gzip"
+            chunks = gzip_chunks(chunks)
+
+        return Response(
+            chunks, mimetype=EXPORT_MIMETYPES[args["format"]], headers=headers
+        )
+
+
 @api.route("/<int:stream_id>")
 @api.param(name="stream_id", description="The id of a stream object")
 class StreamsResource(Resource):
+    @http_cache.cached
     @api.marshal_with(streams_model)
     def get(self, stream_id):
         stream = db.session.query(Streams).filter(Streams.id == stream_id).first()
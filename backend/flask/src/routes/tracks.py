@@ -0,0 +1,101 @@
+from flask_restx import Namespace, Resource, fields, inputs
+from src.server.extensions import http_cache, similarity
+from src.utils.similarity import MAX_BATCH_SIZE
+
+api = Namespace(name="tracks", description="Tracks and the tracks that sound alike")
+
+similar_track_model = api.model(
+    name="SimilarTrack",
+    model={
+        "id": fields.Integer(
+            required=True, attribute="id", description="The id of the similar track"
+        ),
+        "name": fields.String(
+            required=True,
+            attribute="name",
+            description="The name of the similar track",
+        ),
+        "distance": fields.Float(
+            required=True,
+            attribute="distance",
+            description="The distance between the scaled audio features of the "
+            "tracks, 0.0 for identical features",
+        ),
+    },
+)
+
+similar_tracks_model = api.model(
+    name="SimilarTracks",
+    model={
+        "track_id": fields.Integer(
+            required=True, attribute="track_id", description="The id of the track"
+        ),
+        "similar": fields.List(fields.Nested(similar_track_model)),
+    },
+)
+
+similar_parser = api.parser()
+similar_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 100),
+    default=10,
+    location="args",
+    help="The number of similar tracks to return",
+)
+
+similar_batch_parser = similar_parser.copy()
+similar_batch_parser.add_argument(
+    "ids",
+    type=int,
+    action="split",
+    required=True,
+    location="args",
+    help=f"Comma separated ids of at most {MAX_BATCH_SIZE} tracks",
+)
+
+
+def find_similar(track_ids: list[int], limit: int) -> list[dict]:
+    """
+    Returns the tracks most similar to each of track_ids, aborting with a 404
+    if any of them is unknown or has no audio features
+    """
+
+    features = similarity.features
+    missing: list[int] = [
+        track_id for track_id in track_ids if track_id not in features.rows
+    ]
+    if missing:
+        api.abort(
+            404,
+            f"No audio features for track {', '.join(map(str, missing))}",
+        )
+
+    return [
+        {"track_id": track_id, "similar": similar}
+        for track_id, similar in zip(track_ids, features.similar(track_ids, limit))
+    ]
+
+
+@api.route("/<int:track_id>/similar")
+@api.param(name="track_id", description="The id of a track object")
+class SimilarTracksResource(Resource):
+    @http_cache.cached
+    @api.expect(similar_parser)
+    @api.marshal_with(similar_tracks_model)
+    def get(self, track_id):
+        args = similar_parser.parse_args()
+        return find_similar([track_id], args["limit"])[0]
+
+
+@api.route("/similar")
+class SimilarTracksBatchResource(Resource):
+    @http_cache.cached
+    @api.expect(similar_batch_parser)
+    @api.marshal_list_with(similar_tracks_model)
+    def get(self):
+        args = similar_batch_parser.parse_args()
+        track_ids: list[int] = list(dict.fromkeys(args["ids"]))
+        if len(track_ids) > MAX_BATCH_SIZE:
+            api.abort(400, f"At most {MAX_BATCH_SIZE} tracks can be queried at once")
+
+        return find_similar(track_ids, args["limit"])
@@ -1,8 +1,9 @@
 from flask import Flask
 from flask_cors import CORS
 from src.routes import register_blueprints
-from .extensions import db, migrate
+from .extensions import db, migrate, analytics, http_cache, similarity
 from .config import Config
+from src.utils.storage import apply_pragmas, configure_read_bind
 
 
 def create_app(config=Config) -> Flask:
@@ -10,9 +11,14 @@ def create_app(config=Config) -> Flask:
 
     app.config.from_object(obj=config)
 
+    configure_read_bind(app=app)
     db.init_app(app=app)
+    apply_pragmas(app=app, db=db)
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     migrate.init_app(app=app, db=db)
+    analytics.init_app(app=app, db=db)
+    http_cache.init_app(app=app, db=db)
+    similarity.init_app(app=app, db=db)
     CORS(app=app)
 
     register_blueprints(app)
@@ -6,3 +6,49 @@ class Config(object):
     PROJECT_ROOT: str = os.path.abspath(os.path.join(APP_DIR, os.pardir))
 
     SQLALCHEMY_DATABASE_URI: str = "sqlite:///data.db"
+
+    # SQLite lets a single connection write at a time, so the default engine,
+    # used by the populator and migrations, queues writers on one connection
+    SQLALCHEMY_ENGINE_OPTIONS: dict = {
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": 60,
+    }
+
+    # API requests read through their own engine, they never wait on writers
+    # thanks to WAL journaling, so its pool is sized for concurrent requests
+    SQLALCHEMY_READ_ENGINE_OPTIONS: dict = {
+        "pool_size": 8,
+        "max_overflow": 8,
+        "pool_timeout": 10,
+    }
+
+    # Applied to every new SQLite connection of both engines
+    SQLITE_PRAGMAS: dict[str, str | int] = {
+        # Readers keep reading the last commit while a write transaction runs
+        "journal_mode": "WAL",
+        # Only the WAL checkpoints are synced, commits may be lost on power loss
+        # but the database cannot be corrupted
+        "synchronous": "NORMAL",
+        # Page cache of 64 MiB per connection
+        "cache_size": -64 * 1024,
+        # Database pages read through a 256 MiB memory map instead of read calls
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        # Milliseconds a connection waits for a lock before failing
+        "busy_timeout": 30000,
+    }
+
+    # Time zone of the hours listening heatmaps and series are bucketed by, it
+    # is applied by the populator, so the hourly stats tables have to be
+    # emptied for a new value to be applied to the streams already ingested
+    STATS_TIMEZONE: str = "UTC"
+
+    # Maximum number of API responses kept for the current data generation
+    RESPONSE_CACHE_SIZE: int = 1024
+
+    # Folder populate_db.py and snapshot_db.py write snapshots to, and the
+    # API serves the newest one of
+    SNAPSHOT_FOLDER: str = os.path.abspath(
+        os.path.join(PROJECT_ROOT, os.pardir, "data", "snapshots")
+    )
@@ -1,5 +1,13 @@
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from src.utils.analytics import StreamAnalytics
+from src.utils.http_cache import HttpCache
+from src.utils.search import include_object
+from src.utils.similarity import TrackSimilarity
+from src.utils.storage import RoutingSession
 
-db: SQLAlchemy = SQLAlchemy()
-migrate: Migrate = Migrate(compare_type=True)
+db: SQLAlchemy = SQLAlchemy(session_options={"class_": RoutingSession})
+migrate: Migrate = Migrate(compare_type=True, include_object=include_object)
+analytics: StreamAnalytics = StreamAnalytics()
+http_cache: HttpCache = HttpCache()
+similarity: TrackSimilarity = TrackSimilarity()
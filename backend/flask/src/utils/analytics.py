@@ -0,0 +1,375 @@
+"""
+In-memory columnar copy of the streams table for vectorized aggregate queries
+"""
+
+import copy
+import functools
+import threading
+from collections.abc import Callable
+
+import numpy as np
+from flask import Flask, current_app
+from flask_sqlalchemy import SQLAlchemy
+
+from src.utils.http_cache import data_generation
+
+# Width in seconds of the fixed size buckets time_buckets can group streams by
+BUCKET_SECONDS: dict[str, int] = {
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+# The Unix epoch was a Thursday, weeks are shifted to start on Mondays
+WEEK_OFFSET_SECONDS: int = 3 * 24 * 60 * 60
+
+# Columns streams can be grouped by, and numeric columns they can be binned by
+GROUP_COLUMNS: tuple[str, ...] = ("track_id", "album_id", "reason_start", "reason_end")
+HISTOGRAM_COLUMNS: tuple[str, ...] = ("ms_played", "ratio_played")
+
+# Names of the per stream arrays of StreamColumns
+ARRAY_COLUMNS: tuple[str, ...] = (
+    "id",
+    "stream_date",
+    "track_id",
+    "album_id",
+    "ms_played",
+    "ratio_played",
+    "reason_start",
+    "reason_end",
+)
+
+# Rows read from the database per fetch when loading the columns
+LOAD_CHUNK_SIZE: int = 100000
+
+# Answers kept per loaded copy of the streams before they are all dropped
+MAX_CACHED_RESULTS: int = 1024
+
+
+class StreamColumns:
+    """
+    Typed NumPy arrays holding one entry per stream, ordered by stream_date so
+    that a window of time is a contiguous slice of every array.
+
+    reason_start and reason_end are dictionary encoded, their codes index the
+    matching list of categories.
+    """
+
+    def __init__(self) -> None:
+        """
+        ...
+        """
+
+        self.id: np.ndarray = np.empty(0, dtype=np.int64)
+        # Seconds since the Unix epoch in UTC
+        self.stream_date: np.ndarray = np.empty(0, dtype=np.int64)
+        self.track_id: np.ndarray = np.empty(0, dtype=np.int32)
+        self.album_id: np.ndarray = np.empty(0, dtype=np.int32)
+        self.ms_played: np.ndarray = np.empty(0, dtype=np.int32)
+        self.ratio_played: np.ndarray = np.empty(0, dtype=np.float32)
+        self.reason_start: np.ndarray = np.empty(0, dtype=np.int16)
+        self.reason_end: np.ndarray = np.empty(0, dtype=np.int16)
+        self.categories: dict[str, list[str]] = {"reason_start": [], "reason_end": []}
+
+        # Highest stream id loaded, streams above it are loaded on refresh
+        self.last_id: int = 0
+        # Answers of the query functions, valid as long as these columns are
+        self.results: dict[tuple, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def copy(self) -> "StreamColumns":
+        """
+        Returns a copy that can be appended to while this one is being read
+        """
+
+        columns: StreamColumns = copy.copy(self)
+        columns.categories = {
+            column: list(categories) for column, categories in self.categories.items()
+        }
+        columns.results = {}
+        return columns
+
+    def append(self, rows: list[tuple]) -> None:
+        """
+        Appends rows of (id, epoch seconds, track_id, album_id, ms_played,
+        ratio_played, reason_start, reason_end) to the columns
+        """
+
+        if not rows:
+            return
+
+        ids, dates, track_ids, album_ids, ms_played, ratios, starts, ends = zip(*rows)
+        new_columns: dict[str, np.ndarray] = {
+            "id": np.array(ids, dtype=np.int64),
+            "stream_date": np.array(dates, dtype=np.int64),
+            "track_id": np.array(track_ids, dtype=np.int32),
+            "album_id": np.array(album_ids, dtype=np.int32),
+            "ms_played": np.array(ms_played, dtype=np.int32),
+            "ratio_played": np.array(ratios, dtype=np.float32),
+            "reason_start": self.encode("reason_start", starts),
+            "reason_end": self.encode("reason_end", ends),
+        }
+
+        new_dates: np.ndarray = new_columns["stream_date"]
+        in_order: bool = bool(np.all(new_dates[1:] >= new_dates[:-1])) and (
+            not len(self) or self.stream_date[-1] <= new_dates[0]
+        )
+        for column in ARRAY_COLUMNS:
+            setattr(
+                self,
+                column,
+                np.concatenate([getattr(self, column), new_columns[column]]),
+            )
+
+        # Streams are inserted mostly in chronological order, so this is rare
+        if not in_order:
+            order: np.ndarray = np.argsort(self.stream_date, kind="stable")
+            for column in ARRAY_COLUMNS:
+                setattr(self, column, getattr(self, column)[order])
+
+        self.last_id = max(self.last_id, int(new_columns["id"].max()))
+
+    def encode(self, column: str, values: tuple[str, ...]) -> np.ndarray:
+        """
+        Returns the dictionary codes of values, adding unseen ones to the categories
+        """
+
+        categories: list[str] = self.categories[column]
+        codes: dict[str, int] = {value: code for code, value in enumerate(categories)}
+        for value in dict.fromkeys(values):
+            if value not in codes:
+                codes[value] = len(categories)
+                categories.append(value)
+
+        return np.fromiter(
+            (codes[value] for value in values), dtype=np.int16, count=len(values)
+        )
+
+    def window(self, start: int | None = None, end: int | None = None) -> slice:
+        """
+        Returns the slice of the streams played in [start, end) epoch seconds
+        """
+
+        return slice(
+            int(np.searchsorted(self.stream_date, start)) if start is not None else 0,
+            int(np.searchsorted(self.stream_date, end)) if end is not None else None,
+        )
+
+
+class StreamAnalytics:
+    """
+    Flask extension keeping a StreamColumns copy of the streams table per app.
+
+    Streams are only ever appended by the populator, which bumps the data
+    generation when it commits them, so the copy is refreshed whenever the
+    generation changes and only the newer rows are loaded. Responses are
+    cached by generation, so they are never computed from a copy older than
+    the generation they are cached under.
+    """
+
+    def __init__(self, app: Flask | None = None, db: SQLAlchemy | None = None) -> None:
+        """
+        ...
+        """
+
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app: Flask, db: SQLAlchemy) -> None:
+        """
+        ...
+        """
+
+        app.extensions["analytics"] = {
+            "db": db,
+            "columns": StreamColumns(),
+            # Data generation the columns were refreshed at
+            "generation": None,
+            "lock": threading.Lock(),
+        }
+
+    @property
+    def columns(self) -> StreamColumns:
+        """
+        The up to date columns of the current app
+        """
+
+        state: dict = current_app.extensions["analytics"]
+        # Read before refreshing, so the columns are at least as new as it
+        current = data_generation(state["db"])
+        generation: int | None = current[0] if current is not None else None
+
+        with state["lock"]:
+            # Without a generation, only the highest stream id is checked
+            if generation is None or generation != state["generation"]:
+                state["columns"] = self.refresh(state["db"], state["columns"])
+                state["generation"] = generation
+
+            return state["columns"]
+
+    def refresh(self, db: SQLAlchemy, columns: StreamColumns) -> StreamColumns:
+        """
+        Returns columns with every stream inserted since they were loaded,
+        or freshly loaded ones if streams were removed in the meantime
+        """
+
+        last_id: int = (
+            db.session.execute(db.text("SELECT max(id) FROM streams")).scalar() or 0
+        )
+        if last_id < columns.last_id:
+            columns = StreamColumns()
+        if last_id == columns.last_id:
+            return columns
+
+        # Queries still running keep reading the columns they were handed
+        columns = columns.copy()
+        result = db.session.execute(
+            db.text(
+                "SELECT streams.id, stream_date, track_id, album_id, ms_played, "
+                "ratio_played, reason_starts.name, reason_ends.name FROM streams "
+                "JOIN reasons AS reason_starts "
+                "ON reason_starts.id = streams.reason_start_id "
+                "JOIN reasons AS reason_ends ON reason_ends.id = streams.reason_end_id "
+                "WHERE streams.id > :last_id ORDER BY streams.id"
+            ),
+            {"last_id": columns.last_id},
+        )
+        while rows := result.fetchmany(LOAD_CHUNK_SIZE):
+            columns.append(rows)
+
+        return columns
+
+
+def cached_result(function: Callable) -> Callable:
+    """
+    Memoizes a query function on the StreamColumns it is called with, so that
+    repeated questions are answered without scanning the arrays again.
+
+    The returned answers are shared and must not be modified.
+    """
+
+    @functools.wraps(function)
+    def wrapper(columns: StreamColumns, *args, **kwargs):
+        key: tuple = (function.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in columns.results:
+            if len(columns.results) >= MAX_CACHED_RESULTS:
+                columns.results.clear()
+            columns.results[key] = function(columns, *args, **kwargs)
+
+        return columns.results[key]
+
+    return wrapper
+
+
+@cached_result
+def group_by(
+    columns: StreamColumns,
+    column: str,
+    start: int | None = None,
+    end: int | None = None,
+    order: str = "plays",
+    limit: int = 10,
+) -> list[dict]:
+    """
+    Returns the values of column with the most plays or ms_played in the window,
+    along with their plays, ms_played, and mean ratio_played
+    """
+
+    window: slice = columns.window(start, end)
+    keys: np.ndarray = getattr(columns, column)[window]
+    if not len(keys):
+        return []
+
+    plays: np.ndarray = np.bincount(keys)
+    ms_played: np.ndarray = np.bincount(keys, weights=columns.ms_played[window])
+    ratio_played: np.ndarray = np.bincount(keys, weights=columns.ratio_played[window])
+
+    ranking: np.ndarray = plays if order == "plays" else ms_played
+    # Only played keys are ranked, unplayed ones would tie with played keys
+    # of no ms_played
+    candidates: np.ndarray = np.flatnonzero(plays)
+    limit = min(limit, len(candidates))
+    top: np.ndarray = candidates[
+        np.argpartition(-ranking[candidates], limit - 1)[:limit]
+    ]
+    # Ties are broken by the smallest key, matching the SQL top lists
+    top = top[np.lexsort((top, -ranking[top]))]
+
+    categories: list[str] | None = columns.categories.get(column)
+    return [
+        {
+            "key": categories[key] if categories is not None else int(key),
+            "plays": int(plays[key]),
+            "ms_played": int(ms_played[key]),
+            "mean_ratio_played": float(ratio_played[key] / plays[key]),
+        }
+        for key in top
+    ]
+
+
+@cached_result
+def histogram(
+    columns: StreamColumns,
+    column: str,
+    bins: int = 10,
+    start: int | None = None,
+    end: int | None = None,
+) -> dict:
+    """
+    Returns the counts of streams in the window falling in each of bins equal
+    width bins of column, with the bins edges
+    """
+
+    values: np.ndarray = getattr(columns, column)[columns.window(start, end)]
+    counts, edges = np.histogram(values, bins=bins)
+
+    return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+
+@cached_result
+def time_buckets(
+    columns: StreamColumns,
+    bucket: str = "day",
+    start: int | None = None,
+    end: int | None = None,
+    track_id: int | None = None,
+    album_id: int | None = None,
+) -> list[dict]:
+    """
+    Returns the plays and ms_played of every non empty hour, day or week of the
+    window, optionally of a single track or album, keyed by the bucket start
+    in epoch seconds
+    """
+
+    window: slice = columns.window(start, end)
+    stream_dates: np.ndarray = columns.stream_date[window]
+    ms_played: np.ndarray = columns.ms_played[window]
+    if track_id is not None or album_id is not None:
+        selected: np.ndarray = np.ones(len(stream_dates), dtype=bool)
+        if track_id is not None:
+            selected &= columns.track_id[window] == track_id
+        if album_id is not None:
+            selected &= columns.album_id[window] == album_id
+        stream_dates, ms_played = stream_dates[selected], ms_played[selected]
+
+    if not len(stream_dates):
+        return []
+
+    width: int = BUCKET_SECONDS[bucket]
+    offset: int = WEEK_OFFSET_SECONDS if bucket == "week" else 0
+    # Stream dates are sorted, so the first one falls in the first bucket
+    first: int = (int(stream_dates[0]) + offset) // width
+    buckets: np.ndarray = (stream_dates + offset) // width - first
+    plays: np.ndarray = np.bincount(buckets)
+    ms_played_sums: np.ndarray = np.bincount(buckets, weights=ms_played)
+
+    return [
+        {
+            "start": (first + int(position)) * width - offset,
+            "plays": int(plays[position]),
+            "ms_played": int(ms_played_sums[position]),
+        }
+        for position in np.flatnonzero(plays)
+    ]
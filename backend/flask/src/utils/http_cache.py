@@ -0,0 +1,138 @@
+"""
+Conditional GET and server side response caching tied to the data generation
+"""
+
+import collections
+import datetime
+import functools
+import threading
+from collections.abc import Callable
+
+from flask import Flask, Response, current_app, request
+from flask_restx.utils import unpack
+from flask_sqlalchemy import SQLAlchemy
+
+
+def data_generation(db: SQLAlchemy) -> tuple[int, datetime.datetime] | None:
+    """
+    Returns the data generation and when it was bumped, or None if the
+    populator never committed to the database
+    """
+
+    row = db.session.execute(
+        db.text("SELECT generation, modified_date FROM data_generation WHERE id = 1")
+    ).first()
+    if row is None:
+        return None
+
+    generation, modified_date = row
+    return generation, datetime.datetime.fromisoformat(str(modified_date)).replace(
+        tzinfo=datetime.timezone.utc
+    )
+
+
+class HttpCache:
+    """
+    Flask extension validating and caching GET responses against the data
+    generation the populator bumps whenever it commits.
+
+    Responses carry an ETag and Last-Modified taken from the generation, so
+    matching If-None-Match or If-Modified-Since requests are answered with a
+    304 without running the view. Other successful responses are kept in a
+    least recently used cache of at most RESPONSE_CACHE_SIZE entries, which is
+    emptied as soon as the generation changes.
+    """
+
+    def __init__(self, app: Flask | None = None, db: SQLAlchemy | None = None) -> None:
+        """
+        ...
+        """
+
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app: Flask, db: SQLAlchemy) -> None:
+        """
+        ...
+        """
+
+        app.config.setdefault("RESPONSE_CACHE_SIZE", 1024)
+        app.extensions["http_cache"] = {
+            "db": db,
+            "generation": None,
+            "responses": collections.OrderedDict(),
+            "lock": threading.Lock(),
+        }
+
+    def current_generation(self) -> tuple[int, datetime.datetime] | None:
+        """
+        Returns the data generation and when it was bumped, or None if the
+        populator never committed to the database
+        """
+
+        return data_generation(current_app.extensions["http_cache"]["db"])
+
+    def cached(self, view: Callable) -> Callable:
+        """
+        Decorates the get method of a Resource, above its marshalling decorator
+        """
+
+        @functools.wraps(view)
+        def wrapper(resource, *args, **kwargs):
+            current: tuple[int, datetime.datetime] | None = self.current_generation()
+            if current is None:
+                return view(resource, *args, **kwargs)
+
+            generation, modified_date = current
+            headers: dict[str, str] = {
+                "ETag": f'"{generation}"',
+                "Last-Modified": modified_date.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                # Clients may keep responses but have to revalidate them
+                "Cache-Control": "no-cache",
+            }
+
+            if request.if_none_match:
+                not_modified: bool = request.if_none_match.contains(str(generation))
+            else:
+                not_modified = (
+                    request.if_modified_since is not None
+                    and modified_date.replace(microsecond=0)
+                    <= request.if_modified_since
+                )
+            if not_modified:
+                return Response(status=304, headers=headers)
+
+            state: dict = current_app.extensions["http_cache"]
+            key: str = request.full_path
+            with state["lock"]:
+                if state["generation"] != generation:
+                    state["responses"].clear()
+                    state["generation"] = generation
+
+                cached_response: tuple[bytes, str] | None = state["responses"].get(key)
+                if cached_response is not None:
+                    state["responses"].move_to_end(key)
+
+            if cached_response is None:
+                data, code, view_headers = unpack(view(resource, *args, **kwargs))
+                response: Response = resource.api.make_response(
+                    data, code, {**view_headers, **headers}
+                )
+                if code != 200:
+                    return response
+
+                max_size: int = current_app.config["RESPONSE_CACHE_SIZE"]
+                with state["lock"]:
+                    responses: collections.OrderedDict = state["responses"]
+                    # Only cache what was computed from the generation of the ETag
+                    if state["generation"] == generation:
+                        responses[key] = (response.get_data(), response.mimetype)
+                        if len(responses) > max_size:
+                            responses.popitem(last=False)
+
+                return response
+
+            body, mimetype = cached_response
+            return Response(body, status=200, mimetype=mimetype, headers=headers)
+
+        return wrapper
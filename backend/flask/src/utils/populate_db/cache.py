@@ -0,0 +1,219 @@
+"""
+Persistent cache of Spotify Web API responses
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+# Default number of seconds a cached object stays valid for, per entity type
+DEFAULT_TTLS: dict[str, float] = {
+    "tracks": 30 * 24 * 60 * 60,
+    "albums": 30 * 24 * 60 * 60,
+    "artists": 7 * 24 * 60 * 60,
+    "audio_features": 365 * 24 * 60 * 60,
+}
+
+
+class ResponseCache:
+    """
+    SQLite backed store of API objects keyed by entity type and URI, with a
+    time to live per entity type and least recently used eviction once it
+    holds more than max_entries objects
+    """
+
+    def __init__(
+        self,
+        cache_file_path: str,
+        ttls: dict[str, float] | None = None,
+        max_entries: int = 1_000_000,
+    ) -> None:
+        """
+        ...
+        """
+
+        self.ttls: dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries: int = max_entries
+        self.hits: dict[str, int] = {kind: 0 for kind in self.ttls}
+        self.misses: dict[str, int] = {kind: 0 for kind in self.ttls}
+
+        # The Fetcher calls the cache from several threads
+        self.lock: threading.Lock = threading.Lock()
+        self.connection: sqlite3.Connection = sqlite3.connect(
+            cache_file_path, check_same_thread=False
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "kind TEXT NOT NULL, "
+            "uri TEXT NOT NULL, "
+            "body TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, uri))"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_accessed_at "
+            "ON responses (accessed_at)"
+        )
+        self.connection.commit()
+
+        # Kept up to date by put_many, so batches never count the whole table
+        (self.count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM responses"
+        ).fetchone()
+
+    def get_many(self, kind: str, uris: list[str]) -> dict[str, Any]:
+        """
+        Returns the fresh cached objects of the given uris, missing ones are left out
+        """
+
+        now: float = time.time()
+        oldest: float = now - self.ttls[kind]
+        uris = list(dict.fromkeys(uris))
+        found: dict[str, Any] = {}
+
+        with self.lock:
+            for pos in range(0, len(uris), 500):
+                uris_batch: list[str] = uris[pos : pos + 500]
+                placeholders: str = ", ".join("?" * len(uris_batch))
+                rows = self.connection.execute(
+                    "SELECT uri, body FROM responses WHERE kind = ? "
+                    f"AND fetched_at >= ? AND uri IN ({placeholders})",
+                    (kind, oldest, *uris_batch),
+                )
+                found.update((uri, json.loads(body)) for uri, body in rows)
+
+            self.connection.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE kind = ? AND uri = ?",
+                [(now, kind, uri) for uri in found],
+            )
+            self.connection.commit()
+
+            self.hits[kind] += len(found)
+            self.misses[kind] += len(uris) - len(found)
+
+        return found
+
+    def put_many(self, kind: str, objects: dict[str, Any]) -> None:
+        """
+        Stores objects keyed by uri and evicts the least recently used ones
+        """
+
+        now: float = time.time()
+
+        rows: list[tuple] = [
+            (json.dumps(api_object), now, now, kind, uri)
+            for uri, api_object in objects.items()
+        ]
+
+        with self.lock:
+            self.connection.executemany(
+                "UPDATE responses SET body = ?, fetched_at = ?, accessed_at = ? "
+                "WHERE kind = ? AND uri = ?",
+                rows,
+            )
+            # Only the objects that were not cached yet are inserted
+            changes: int = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO responses (body, fetched_at, accessed_at, "
+                "kind, uri) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.count += self.connection.total_changes - changes
+
+            if self.count > self.max_entries:
+                self.connection.execute(
+                    "DELETE FROM responses WHERE rowid IN ("
+                    "SELECT rowid FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (self.count - self.max_entries,),
+                )
+                self.count = self.max_entries
+            self.connection.commit()
+
+    def stats(self) -> str:
+        """
+        Returns a one line summary of the hits and misses per entity type
+        """
+
+        return ", ".join(
+            f"{kind} {self.hits[kind]} hits / {self.misses[kind]} misses"
+            for kind in self.ttls
+        )
+
+
+class CachedSpotifyClient:
+    """
+    Wraps a Spotify client so that tracks, albums, artists and audio_features
+    only request the URIs that are not already in a ResponseCache
+    """
+
+    def __init__(self, client: Any, cache: ResponseCache) -> None:
+        """
+        ...
+        """
+
+        self.client: Any = client
+        self.cache: ResponseCache = cache
+
+    def tracks(self, uris: list[str], market: str | None = None) -> dict | None:
+        """
+        ...
+        """
+
+        objects: list | None = self.fetch(
+            "tracks", uris, lambda missing: self.client.tracks(missing, market=market)
+        )
+        return {"tracks": objects} if objects is not None else None
+
+    def albums(self, uris: list[str], market: str | None = None) -> dict | None:
+        """
+        ...
+        """
+
+        objects: list | None = self.fetch(
+            "albums", uris, lambda missing: self.client.albums(missing, market=market)
+        )
+        return {"albums": objects} if objects is not None else None
+
+    def artists(self, uris: list[str]) -> dict | None:
+        """
+        ...
+        """
+
+        objects: list | None = self.fetch("artists", uris, self.client.artists)
+        return {"artists": objects} if objects is not None else None
+
+    def audio_features(self, uris: list[str]) -> list | None:
+        """
+        ...
+        """
+
+        return self.fetch("audio_features", uris, self.client.audio_features)
+
+    def fetch(
+        self, kind: str, uris: list[str], request: Callable[[list[str]], Any]
+    ) -> list | None:
+        """
+        Returns the objects of uris in order, requesting only the cache misses.
+
+        Objects are cached under the URI they were requested with, since the
+        API may answer with a relinked URI.
+        """
+
+        found: dict[str, Any] = self.cache.get_many(kind, uris)
+        missing: list[str] = [uri for uri in dict.fromkeys(uris) if uri not in found]
+        if missing:
+            response = request(missing)
+            if response is None:
+                return None
+
+            fetched: dict[str, Any] = dict(
+                zip(missing, response[kind] if isinstance(response, dict) else response)
+            )
+            self.cache.put_many(kind, fetched)
+            found.update(fetched)
+
+        return [found.get(uri) for uri in uris]
@@ -0,0 +1,173 @@
+"""
+Concurrent, rate limited access to the Spotify Web API
+"""
+
+import collections
+import datetime
+import email.utils
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import spotipy
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket that lets at most rate requests per second
+    through on average, with bursts of up to capacity requests
+    """
+
+    def __init__(self, rate: float, capacity: int | None = None) -> None:
+        """
+        ...
+        """
+
+        if not rate > 0:
+            raise ValueError(f"rate must be a positive number, not {rate}")
+
+        self.rate: float = rate
+        self.capacity: float = float(capacity or max(1, int(rate)))
+        self.tokens: float = self.capacity
+        self.updated: float = time.monotonic()
+        # Every request is held back until then after a 429 response
+        self.paused_until: float = 0.0
+        self.lock: threading.Lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a request is allowed to be sent
+        """
+
+        while True:
+            with self.lock:
+                now: float = time.monotonic()
+                if now < self.paused_until:
+                    wait: float = self.paused_until - now
+                else:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated) * self.rate
+                    )
+                    self.updated = now
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        return
+                    wait = (1.0 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds back every request for the next seconds and empties the bucket
+        """
+
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+def retry_after_seconds(retry_after: str | None) -> float | None:
+    """
+    Returns the seconds to wait given by a Retry-After header, which holds
+    either a number of seconds or an HTTP date, or None if it is missing or
+    cannot be parsed
+    """
+
+    if retry_after is None:
+        return None
+
+    try:
+        seconds: float = float(retry_after)
+    except ValueError:
+        try:
+            retry_date: datetime.datetime = email.utils.parsedate_to_datetime(
+                retry_after
+            )
+        except (TypeError, ValueError):
+            return None
+        if retry_date.tzinfo is None:
+            retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+        seconds = (
+            retry_date - datetime.datetime.now(datetime.timezone.utc)
+        ).total_seconds()
+
+    if not math.isfinite(seconds):
+        return None
+
+    return max(0.0, seconds)
+
+
+class Fetcher:
+    """
+    Sends batched Spotify API calls from a bounded thread pool, honouring a
+    request rate limit and the Retry-After header of 429 responses.
+
+    The client is whatever object the calls are bound to, so a fake client
+    or a spotipy client pointed at a local server can be used in place of
+    the real API.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        requests_per_second: float = 10.0,
+        max_retries: int = 5,
+    ) -> None:
+        """
+        ...
+        """
+
+        self.workers: int = max(1, workers)
+        self.bucket: TokenBucket = TokenBucket(requests_per_second)
+        self.max_retries: int = max_retries
+
+    def call(self, function: Callable[[Any], Any], batch: Any) -> Any:
+        """
+        Calls function with batch, retrying on 429 and 5xx responses
+        """
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return function(batch)
+            except spotipy.SpotifyException as error:
+                retryable: bool = error.http_status == 429 or error.http_status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+
+                # Exponential backoff unless the response says how long to wait
+                retry_after: float | None = retry_after_seconds(
+                    (error.headers or {}).get("Retry-After")
+                )
+                self.bucket.pause(
+                    retry_after if retry_after is not None else 2.0**attempt
+                )
+
+        raise AssertionError("unreachable")
+
+    def map(
+        self, function: Callable[[Any], Any], batches: Iterable[Any]
+    ) -> Iterator[Any]:
+        """
+        Yields function(batch) for every batch in the order of batches, keeping
+        at most twice as many requests in flight as there are workers
+        """
+
+        if self.workers == 1:
+            for batch in batches:
+                yield self.call(function, batch)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending: collections.deque[Future] = collections.deque()
+
+            for batch in batches:
+                pending.append(executor.submit(self.call, function, batch))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
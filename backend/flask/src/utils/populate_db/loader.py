@@ -0,0 +1,171 @@
+"""
+Readers for the endsong*.json files found in a Spotify extended streaming history export
+"""
+
+import datetime
+import functools
+import glob
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+
+# Number of characters read from an export file at a time when streaming it
+READ_BLOCK_SIZE: int = 1 << 16
+
+_decoder: json.JSONDecoder = json.JSONDecoder()
+_whitespace: str = " \t\n\r"
+
+# A stream object reduced to the fields used when creating Streams:
+# (spotify_track_uri, stream_date, ms_played, reason_start, reason_end, shuffle)
+StreamRecord = tuple[str, datetime.datetime, int, str, str, bool]
+
+
+def list_stream_files(streams_file_path: str) -> list[str]:
+    """
+    Returns the paths of every export file in streams_file_path, in a stable order
+    """
+
+    return sorted(glob.glob(os.path.join(streams_file_path, "*.json")))
+
+
+def hash_stream_file(file_path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of the content of an export file
+    """
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def iter_stream_objects(file_path: str) -> Iterator[dict]:
+    """
+    Yields the stream objects of a single export file one at a time.
+
+    The file is expected to hold a top level JSON array of objects and is read
+    in blocks of READ_BLOCK_SIZE characters, so only the object currently being
+    decoded is held in memory. Raises ValueError if the file is not a JSON array.
+    """
+
+    with open(file_path, "r", encoding="UTF-8") as json_file:
+        buffer: str = ""
+        pos: int = 0
+        eof: bool = False
+        started: bool = False
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _whitespace:
+                pos += 1
+
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError(
+                        f"{file_path} ended before the JSON array was closed"
+                    )
+                buffer, pos = json_file.read(READ_BLOCK_SIZE), 0
+                eof = not buffer
+                continue
+
+            char: str = buffer[pos]
+            if not started:
+                if char != "[":
+                    raise ValueError(f"{file_path} does not contain a JSON array")
+                started = True
+                pos += 1
+                continue
+            if char == "]":
+                return
+            if char == ",":
+                pos += 1
+                continue
+
+            try:
+                stream_object, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The object straddles the end of the buffer, read another block
+                block: str = json_file.read(READ_BLOCK_SIZE)
+                eof = not block
+                buffer, pos = buffer[pos:] + block, 0
+                continue
+
+            pos = end
+            yield stream_object
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_day(day: str) -> datetime.datetime:
+    return datetime.datetime.strptime(day, "%Y-%m-%d")
+
+
+def parse_ts(ts: str) -> datetime.datetime:
+    """
+    Parses an export timestamp such as "2020-01-31T23:59:59Z".
+
+    Plays cluster on a few thousand distinct days, so the date part is parsed
+    once per day and cached, and only the time of day is converted per play.
+    """
+
+    if len(ts) != 20 or ts[10] != "T" or ts[19] != "Z":
+        return datetime.datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ")
+
+    return _parse_day(ts[:10]).replace(
+        hour=int(ts[11:13]), minute=int(ts[14:16]), second=int(ts[17:19])
+    )
+
+
+def normalize_stream_object(stream_object: dict) -> StreamRecord | None:
+    """
+    Reduces a stream object to a StreamRecord, or None if it was not a track play
+    """
+
+    if stream_object["spotify_track_uri"] is None:
+        return None
+
+    return (
+        stream_object["spotify_track_uri"],
+        parse_ts(stream_object["ts"]),
+        stream_object["ms_played"],
+        stream_object["reason_start"],
+        stream_object["reason_end"],
+        stream_object["shuffle"],
+    )
+
+
+def iter_stream_records(file_path: str) -> Iterator[StreamRecord]:
+    """
+    Yields the StreamRecords of a single export file one at a time
+    """
+
+    for stream_object in iter_stream_objects(file_path):
+        stream_record: StreamRecord | None = normalize_stream_object(stream_object)
+        if stream_record is not None:
+            yield stream_record
+
+
+def load_stream_file(file_path: str) -> tuple[set[str], list[StreamRecord]] | None:
+    """
+    Parses a whole export file into its set of track URIs and its StreamRecords.
+
+    Meant to be run in worker processes, so an invalid file returns None
+    instead of raising.
+    """
+
+    try:
+        with open(file_path, "r", encoding="UTF-8") as json_file:
+            json_data: list = json.load(json_file)
+    except ValueError:
+        return None
+
+    stream_records: list[StreamRecord] = [
+        stream_record
+        for stream_record in map(normalize_stream_object, json_data)
+        if stream_record is not None
+    ]
+
+    return {stream_record[0] for stream_record in stream_records}, stream_records
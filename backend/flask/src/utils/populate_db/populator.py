@@ -2,16 +2,30 @@
 ...
 """
 
-import glob
-import json
 import os
 import sys
+import time
 import datetime
+import functools
+import zoneinfo
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
+import requests
 import spotipy
 import tqdm
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from src.server.extensions import db
+from src.models.associations import (
+    artists_albums,
+    artists_tracks,
+    genres_albums,
+    genres_artists,
+    genres_tracks,
+    stream_artists,
+)
 from src.models.models import (
     TrackUris,
     Tracks,
@@ -19,26 +33,101 @@ from src.models.models import (
     Artists,
     Labels,
     Genres,
+    Reasons,
     Streams,
+    IngestedFiles,
+    PopulateCheckpoints,
+    PendingWork,
+    DataGeneration,
+    TrackDailyStats,
+    AlbumDailyStats,
+    ArtistDailyStats,
+    GenreDailyStats,
+    HourlyStats,
+    AlbumHourlyStats,
+    ArtistHourlyStats,
+    GenreHourlyStats,
+    Sessions,
+)
+from src.utils.populate_db.cache import CachedSpotifyClient, ResponseCache
+from src.utils.populate_db.fetcher import Fetcher
+from src.utils.populate_db.loader import (
+    StreamRecord,
+    hash_stream_file,
+    iter_stream_objects,
+    iter_stream_records,
+    list_stream_files,
+    load_stream_file,
+)
+from src.utils.populate_db.sessions import SESSION_GAP_SECONDS, find_sessions
+from src.utils.search import search_index, search_index_rows
+
+# Number of Stream rows materialized and inserted at a time
+STREAMS_CHUNK_SIZE: int = 10000
+
+# reason_end of a stream that was skipped, counted as skips in the daily stats
+SKIP_REASON_END: str = "fwdbtn"
+
+# Every UTC offset is a multiple of 15 minutes, so streams are grouped by UTC
+# quarter hour before being added to the hour of their local time
+QUARTER_HOUR_SECONDS: int = 15 * 60
+
+# Methods populate_db runs in order, each one checkpointed once it completes
+POPULATE_PHASES: tuple[str, ...] = (
+    "process_loaded_track_uris",
+    "process_loaded_album_uris",
+    "process_loaded_artist_uris",
+    "process_loaded_label_names",
+    "process_loaded_genre_names",
+    "link_artists",
+    "link_genres",
+    "get_track_features",
+    "create_streams",
 )
 
 
+class InterruptedRunError(Exception):
+    """
+    Raised when a populate run starts without resume while a previous run
+    was interrupted, as it would ingest streams twice
+    """
+
+
+def print_phase_rate(phase: str, rows: int, seconds: float) -> None:
+    """
+    Prints how many rows a populate phase handled and how fast it went
+    """
+
+    rate: float = rows / seconds if seconds > 0 else 0.0
+    print(f"{phase}: {rows} rows in {seconds:.2f}s ({rate:.0f} rows/s)")
+
+
 class Populator:
     """
     ...
     """
 
-    def __init__(self, auth_file_path: str, streams_file_path: str) -> None:
+    def __init__(
+        self,
+        auth_file_path: str | None,
+        streams_file_path: str,
+        streaming: bool = False,
+        workers: int = 1,
+        fetch_workers: int = 1,
+        requests_per_second: float = 10.0,
+        cache_file_path: str | None = None,
+        resume: bool = False,
+        stats_timezone: str = "UTC",
+        spotify_client=None,
+    ) -> None:
         """
         ...
         """
 
-        self.loaded_stream_objects = []
+        self.loaded_stream_records: list[StreamRecord] = []
+        # Export files to ingest, mapped to their (size, content hash, row count)
+        self.loaded_stream_files: dict[str, tuple[int, str, int]] = {}
         self.loaded_track_uris: set[str] = set()
-        self.loaded_album_uris: dict[str, list[Tracks]] = {}
-        self.loaded_artist_uris: dict[str, tuple[list[Tracks], list[Albums]]] = {}
-        self.loaded_label_names: dict[str, list[Albums]] = {}
-        self.loaded_genre_names: dict[str, list[Artists]] = {}
 
         self.current_trackuri_records: dict[str, Tracks] = {
             trackuri.uri: trackuri.track
@@ -56,11 +145,43 @@ class Populator:
         self.current_genre_records: dict[str, Genres] = {
             genre.name: genre for genre in db.session.query(Genres).all()
         }
+        self.current_reason_ids: dict[str, int] = dict(
+            db.session.query(Reasons.name, Reasons.id).all()
+        )
 
-        self.new_trackuri_records: list[TrackUris] = []
+        # Track URIs and pending work waiting to be saved with the current batch
+        # once their records have been given ids
+        self.new_trackuri_records: list[tuple[str, Tracks]] = []
+        self.new_pending_work: list[tuple[str, str, Tracks | Albums | Artists]] = []
 
         self.auth_file_path: str = auth_file_path
         self.streams_file_path: str = streams_file_path
+        # When streaming, stream records are re-read from disk by create_streams
+        # instead of being held in loaded_stream_records
+        self.streaming: bool = streaming
+        # Number of processes export files are parsed with, 0 uses every core
+        self.workers: int = workers or os.cpu_count() or 1
+
+        if self.streaming and self.workers > 1:
+            raise ValueError("streaming and parallel loading can not be combined")
+
+        # Spotify API responses are kept in this file when set
+        self.cache_file_path: str | None = cache_file_path
+        # Client the Spotify API is called through, one is built from the
+        # credentials in auth_file_path unless it is given, like a fake client
+        # answering without network access
+        self.sp_client = spotify_client
+        # Continue an interrupted run from its checkpoints and pending work
+        self.resume: bool = resume
+        # Time zone the hourly stats are bucketed in
+        self.stats_timezone: zoneinfo.ZoneInfo = zoneinfo.ZoneInfo(stats_timezone)
+
+        self.fetcher: Fetcher = Fetcher(
+            workers=fetch_workers, requests_per_second=requests_per_second
+        )
+
+        if not self.resume and self.get_checkpoint("populate_db", create=False):
+            raise InterruptedRunError("A previous populate run was interrupted")
 
         self.create_spotify_client()
         self.load_stream_objects()
@@ -70,19 +191,33 @@ class Populator:
         ...
         """
 
-        with open(file=self.auth_file_path, mode="r", encoding="ascii") as file:
-            client_id, client_secret = file.readlines()
+        if self.sp_client is None:
+            with open(file=self.auth_file_path, mode="r", encoding="ascii") as file:
+                client_id, client_secret = file.readlines()
 
-        client_id: str = client_id.rstrip()
-        client_secret: str = client_secret.rstrip()
+            client_id: str = client_id.rstrip()
+            client_secret: str = client_secret.rstrip()
 
-        auth_manager = spotipy.oauth2.SpotifyOAuth(
-            client_id=client_id,
-            client_secret=client_secret,
-            redirect_uri="http://example.com/",
-        )
+            auth_manager = spotipy.oauth2.SpotifyOAuth(
+                client_id=client_id,
+                client_secret=client_secret,
+                redirect_uri="http://example.com/",
+            )
 
-        self.sp_client = spotipy.Spotify(auth_manager=auth_manager, language="ja")
+            # The Fetcher is the only layer retrying requests, so the session
+            # has no retrying adapter and 429 responses keep their Retry-After
+            self.sp_client = spotipy.Spotify(
+                auth_manager=auth_manager,
+                language="ja",
+                requests_session=requests.Session(),
+                retries=0,
+                status_retries=0,
+            )
+
+        if self.cache_file_path is not None:
+            self.sp_client = CachedSpotifyClient(
+                self.sp_client, ResponseCache(self.cache_file_path)
+            )
 
     def load_stream_objects(self) -> None:
         """
@@ -92,24 +227,142 @@ class Populator:
         if not os.path.exists(self.streams_file_path):
             sys.exit(f"input_path {self.streams_file_path} does not exist")
 
+        stream_file_paths: list[str] = self.find_unseen_stream_files()
+
         print("\nLoading Track URIs and Stream objects")
-        for current_file_path in tqdm.tqdm(
-            glob.glob(self.streams_file_path + "/*.json")
-        ):
-            with open(current_file_path, "r", encoding="UTF-8") as json_file:
+        if self.streaming:
+            for current_file_path in tqdm.tqdm(stream_file_paths):
+                row_count: int = 0
                 try:
-                    json_data: list = json.load(json_file)
+                    for stream_object in iter_stream_objects(current_file_path):
+                        if stream_object["spotify_track_uri"] is not None:
+                            self.loaded_track_uris.add(
+                                stream_object["spotify_track_uri"]
+                            )
+                            row_count += 1
                 except ValueError:
                     print(f"{current_file_path} is not a valid JSON file")
                     continue
 
-                self.loaded_stream_objects.extend(json_data)
+                self.add_loaded_stream_file(current_file_path, row_count)
+            return
 
-                self.loaded_track_uris.update(
-                    stream_object["spotify_track_uri"]
-                    for stream_object in json_data
-                    if stream_object["spotify_track_uri"] is not None
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                self.merge_loaded_stream_files(
+                    stream_file_paths,
+                    executor.map(load_stream_file, stream_file_paths),
                 )
+        else:
+            self.merge_loaded_stream_files(
+                stream_file_paths, map(load_stream_file, stream_file_paths)
+            )
+
+    def find_unseen_stream_files(self) -> list[str]:
+        """
+        Returns the export files whose content has not been ingested before
+        """
+
+        ingested_hashes: set[str] = {
+            content_hash
+            for (content_hash,) in db.session.query(IngestedFiles.content_hash)
+        }
+
+        self.unseen_stream_files: dict[str, tuple[int, str]] = {}
+        skipped_file_count: int = 0
+        for current_file_path in list_stream_files(self.streams_file_path):
+            content_hash: str = hash_stream_file(current_file_path)
+            if content_hash in ingested_hashes:
+                skipped_file_count += 1
+                continue
+
+            self.unseen_stream_files[current_file_path] = (
+                os.path.getsize(current_file_path),
+                content_hash,
+            )
+
+        print(
+            f"\nFound {len(self.unseen_stream_files)} new or changed export files, "
+            f"skipping {skipped_file_count} already ingested"
+        )
+
+        return list(self.unseen_stream_files)
+
+    def add_loaded_stream_file(self, file_path: str, row_count: int) -> None:
+        """
+        Remembers a successfully loaded export file so it can be added to the
+        ingestion manifest once its streams are saved
+        """
+
+        size, content_hash = self.unseen_stream_files[file_path]
+        self.loaded_stream_files[file_path] = (size, content_hash, row_count)
+
+    def merge_loaded_stream_files(
+        self,
+        stream_file_paths: list[str],
+        results: Iterable[tuple[set[str], list[StreamRecord]] | None],
+    ) -> None:
+        """
+        Merges the per file results of load_stream_file in file order
+        """
+
+        for current_file_path, result in zip(
+            stream_file_paths, tqdm.tqdm(results, total=len(stream_file_paths))
+        ):
+            if result is None:
+                print(f"{current_file_path} is not a valid JSON file")
+                continue
+
+            track_uris, stream_records = result
+            self.loaded_track_uris.update(track_uris)
+            self.loaded_stream_records.extend(stream_records)
+            self.add_loaded_stream_file(current_file_path, len(stream_records))
+
+    def iter_loaded_stream_records(self) -> Iterator[StreamRecord]:
+        """
+        Yields every loaded stream record, reading them back from disk when streaming
+        """
+
+        if not self.streaming:
+            yield from self.loaded_stream_records
+            return
+
+        for current_file_path in self.loaded_stream_files:
+            try:
+                yield from iter_stream_records(current_file_path)
+            except ValueError:
+                continue
+
+    def record_ingested_files(self) -> None:
+        """
+        Adds the loaded export files to the ingestion manifest, replacing the
+        entries of files that changed since they were last ingested
+        """
+
+        now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
+
+        for current_file_path, (
+            size,
+            content_hash,
+            row_count,
+        ) in self.loaded_stream_files.items():
+            path: str = os.path.relpath(current_file_path, self.streams_file_path)
+            ingested_file: IngestedFiles | None = (
+                db.session.query(IngestedFiles)
+                .filter(IngestedFiles.path == path)
+                .first()
+            )
+
+            if ingested_file is None:
+                ingested_file = IngestedFiles(path=path, created_date=now)
+                db.session.add(ingested_file)
+
+            ingested_file.size = size
+            ingested_file.content_hash = content_hash
+            ingested_file.row_count = row_count
+            ingested_file.modified_date = now
+
+        db.session.commit()
 
     def process_loaded_track_uris(self) -> None:
         """
@@ -120,22 +373,32 @@ class Populator:
             self.loaded_track_uris - self.current_trackuri_records.keys()
         )
 
-        print("\nProcessing loaded Track URIs")
-        for pos in tqdm.tqdm(range(0, len(unseen_track_uris), 50)):
-            self.process_unseen_track_uris_batch(unseen_track_uris[pos : pos + 50])
+        unseen_track_uris_batches: list[list[str]] = [
+            unseen_track_uris[pos : pos + 50]
+            for pos in range(0, len(unseen_track_uris), 50)
+        ]
 
-        db.session.bulk_save_objects(self.new_trackuri_records)
-        db.session.commit()
+        print("\nProcessing loaded Track URIs")
+        for unseen_track_uris_batch, track_objects in tqdm.tqdm(
+            zip(
+                unseen_track_uris_batches,
+                self.fetcher.map(
+                    functools.partial(self.sp_client.tracks, market="JP"),
+                    unseen_track_uris_batches,
+                ),
+            ),
+            total=len(unseen_track_uris_batches),
+        ):
+            self.process_unseen_track_uris_batch(unseen_track_uris_batch, track_objects)
 
     def process_unseen_track_uris_batch(
-        self, unseen_track_uris_batch: list[str]
+        self, unseen_track_uris_batch: list[str], track_objects: dict | None
     ) -> None:
         """
         ...
         """
 
-        # List of 50 Track objects returned by spotify API
-        track_objects = self.sp_client.tracks(unseen_track_uris_batch, market="JP")
+        # track_objects holds the list of 50 Track objects returned by spotify API
         if track_objects is None:
             return
 
@@ -152,10 +415,7 @@ class Populator:
                         unseen_track_uri
                     ] = self.current_trackuri_records[track_uri]
                     self.new_trackuri_records.append(
-                        TrackUris(
-                            uri=unseen_track_uri,
-                            track_id=self.current_trackuri_records[unseen_track_uri].id,
-                        )
+                        (unseen_track_uri, self.current_trackuri_records[track_uri])
                     )
                 continue
 
@@ -174,21 +434,17 @@ class Populator:
                 modified_date=datetime.datetime.now(datetime.timezone.utc),
             )
             db.session.add(new_track_record)
-            db.session.commit()
 
             self.current_trackuri_records[track_uri] = new_track_record
-            self.new_trackuri_records.append(
-                TrackUris(
-                    uri=track_uri,
-                    track_id=new_track_record.id,
-                )
-            )
+            self.new_trackuri_records.append((track_uri, new_track_record))
+            # A relinked URI seen before the URI it resolves to is saved along
+            # with it, or its streams would not find their track
+            if unseen_track_uri != track_uri:
+                self.current_trackuri_records[unseen_track_uri] = new_track_record
+                self.new_trackuri_records.append((unseen_track_uri, new_track_record))
 
             if album is None:
-                if album_uri not in self.loaded_album_uris:
-                    self.loaded_album_uris[album_uri] = []
-
-                self.loaded_album_uris[album_uri].append(new_track_record)
+                self.queue_pending_work("albums", album_uri, new_track_record)
 
             for track_object_artist in track_object["artists"]:
                 track_artist_uri: str = track_object_artist["uri"]
@@ -197,40 +453,55 @@ class Populator:
                 )
 
                 if track_artist is None:
-                    if track_artist_uri not in self.loaded_artist_uris:
-                        self.loaded_artist_uris[track_artist_uri] = ([], [])
-
-                    self.loaded_artist_uris[track_artist_uri][0].append(
-                        new_track_record
+                    self.queue_pending_work(
+                        "artists", track_artist_uri, new_track_record
                     )
                     continue
 
                 track_artist.tracks.append(new_track_record)
 
+        self.commit_batch()
+
     def process_loaded_album_uris(self) -> None:
         """
         ...
         """
 
         unseen_album_uris: list[tuple[str, list[Tracks]]] = list(
-            self.loaded_album_uris.items()
+            self.load_pending_work("albums").items()
         )
 
+        unseen_album_uris_batches: list[list[tuple[str, list[Tracks]]]] = [
+            unseen_album_uris[pos : pos + 20]
+            for pos in range(0, len(unseen_album_uris), 20)
+        ]
+
         print("\nProcessing loaded Album URIs")
-        for pos in tqdm.tqdm(range(0, len(unseen_album_uris), 20)):
-            self.process_unseen_album_uris_batch(unseen_album_uris[pos : pos + 20])
+        for unseen_album_uris_batch, album_objects in tqdm.tqdm(
+            zip(
+                unseen_album_uris_batches,
+                self.fetcher.map(
+                    functools.partial(self.sp_client.albums, market="JP"),
+                    (
+                        [album_uri for (album_uri, _) in unseen_album_uris_batch]
+                        for unseen_album_uris_batch in unseen_album_uris_batches
+                    ),
+                ),
+            ),
+            total=len(unseen_album_uris_batches),
+        ):
+            self.process_unseen_album_uris_batch(unseen_album_uris_batch, album_objects)
 
     def process_unseen_album_uris_batch(
-        self, unseen_album_uris_batch: list[tuple[str, list[Tracks]]]
+        self,
+        unseen_album_uris_batch: list[tuple[str, list[Tracks]]],
+        album_objects: dict | None,
     ) -> None:
         """
         ...
         """
 
-        # List of 20 Album objects returned by spotify API
-        album_objects = self.sp_client.albums(
-            [album_uri for (album_uri, _) in unseen_album_uris_batch], market="JP"
-        )
+        # album_objects holds the list of 20 Album objects returned by spotify API
         if album_objects is None:
             return
 
@@ -259,18 +530,13 @@ class Populator:
                 modified_date=datetime.datetime.now(datetime.timezone.utc),
             )
             db.session.add(new_album_record)
-            db.session.commit()
 
             for track in tracks:
                 track.album_name = new_album_record.name
                 new_album_record.tracks.append(track)
-            db.session.commit()
 
             if label is None and label_name is not None:
-                if label_name not in self.loaded_label_names:
-                    self.loaded_label_names[label_name] = []
-
-                self.loaded_label_names[label_name].append(new_album_record)
+                self.queue_pending_work("labels", label_name, new_album_record)
 
             for album_object_artist in album_object["artists"]:
                 album_artist_uri: str = album_object_artist["uri"]
@@ -279,42 +545,68 @@ class Populator:
                 )
 
                 if album_artist is None:
-                    if album_artist_uri not in self.loaded_artist_uris:
-                        self.loaded_artist_uris[album_artist_uri] = ([], [])
-
-                    self.loaded_artist_uris[album_artist_uri][1].append(
-                        new_album_record
+                    self.queue_pending_work(
+                        "artists", album_artist_uri, new_album_record
                     )
                     continue
 
                 album_artist.albums.append(new_album_record)
-                db.session.commit()
+
+        self.commit_batch(
+            "albums", [album_uri for (album_uri, _) in unseen_album_uris_batch]
+        )
 
     def process_loaded_artist_uris(self) -> None:
         """
         ...
         """
 
-        unseen_artist_uris: list[tuple[str, tuple[list[Tracks], list[Albums]]]] = list(
-            self.loaded_artist_uris.items()
-        )
+        unseen_artist_uris: list[tuple[str, tuple[list[Tracks], list[Albums]]]] = [
+            (
+                artist_uri,
+                (
+                    [record for record in records if isinstance(record, Tracks)],
+                    [record for record in records if isinstance(record, Albums)],
+                ),
+            )
+            for artist_uri, records in self.load_pending_work("artists").items()
+        ]
+
+        unseen_artist_uris_batches: list[
+            list[tuple[str, tuple[list[Tracks], list[Albums]]]]
+        ] = [
+            unseen_artist_uris[pos : pos + 50]
+            for pos in range(0, len(unseen_artist_uris), 50)
+        ]
 
         print("\nProcessing loaded Artist URIs")
-        for pos in tqdm.tqdm(range(0, len(unseen_artist_uris), 50)):
-            self.process_unseen_artist_uris_batch(unseen_artist_uris[pos : pos + 50])
+        for unseen_artist_uris_batch, artist_objects in tqdm.tqdm(
+            zip(
+                unseen_artist_uris_batches,
+                self.fetcher.map(
+                    self.sp_client.artists,
+                    (
+                        [artist_uri for (artist_uri, _) in unseen_artist_uris_batch]
+                        for unseen_artist_uris_batch in unseen_artist_uris_batches
+                    ),
+                ),
+            ),
+            total=len(unseen_artist_uris_batches),
+        ):
+            self.process_unseen_artist_uris_batch(
+                unseen_artist_uris_batch, artist_objects
+            )
 
     def process_unseen_artist_uris_batch(
         self,
         unseen_artist_uris_batch: list[tuple[str, tuple[list[Tracks], list[Albums]]]],
+        artist_objects: dict | None,
     ) -> None:
         """
         ...
         """
 
-        # List of 50 Artist objects returned by spotify API
-        artist_objects = self.sp_client.artists(
-            [artist_uri for (artist_uri, _) in unseen_artist_uris_batch]
-        )
+        # artist_objects holds the list of 50 Artist objects returned by spotify API
         if artist_objects is None:
             return
 
@@ -334,24 +626,22 @@ class Populator:
             )
 
             db.session.add(new_artist_record)
-            db.session.commit()
 
             new_artist_record.tracks.extend(tracks)
             new_artist_record.albums.extend(albums)
-            db.session.commit()
 
             for genre_name in artist_object["genres"]:
                 genre: Genres | None = self.current_genre_records.get(genre_name)
 
                 if genre is None:
-                    if genre_name not in self.loaded_genre_names:
-                        self.loaded_genre_names[genre_name] = []
-
-                    self.loaded_genre_names[genre_name].append(new_artist_record)
+                    self.queue_pending_work("genres", genre_name, new_artist_record)
                     continue
 
                 genre.artists.append(new_artist_record)
-                db.session.commit()
+
+        self.commit_batch(
+            "artists", [artist_uri for (artist_uri, _) in unseen_artist_uris_batch]
+        )
 
     def process_loaded_label_names(self) -> None:
         """
@@ -359,7 +649,7 @@ class Populator:
         """
 
         unseen_label_names: list[tuple[str, list[Albums]]] = list(
-            self.loaded_label_names.items()
+            self.load_pending_work("labels").items()
         )
 
         print("\nProcessing loaded Label names")
@@ -367,10 +657,11 @@ class Populator:
             new_label_record: Labels = Labels(name=label_name)
 
             db.session.add(new_label_record)
-            db.session.commit()
-
             new_label_record.albums.extend(albums)
-            db.session.commit()
+
+        self.commit_batch(
+            "labels", [label_name for (label_name, _) in unseen_label_names]
+        )
 
     def process_loaded_genre_names(self) -> None:
         """
@@ -378,7 +669,7 @@ class Populator:
         """
 
         unseen_genre_names: list[tuple[str, list[Artists]]] = list(
-            self.loaded_genre_names.items()
+            self.load_pending_work("genres").items()
         )
 
         print("\nProcessing loaded Genre names")
@@ -386,10 +677,136 @@ class Populator:
             new_genre_record: Genres = Genres(name=genre_name)
 
             db.session.add(new_genre_record)
-            db.session.commit()
-
             new_genre_record.artists.extend(artists)
-            db.session.commit()
+
+        self.commit_batch(
+            "genres", [genre_name for (genre_name, _) in unseen_genre_names]
+        )
+
+    def queue_pending_work(
+        self, phase: str, key: str, record: Tracks | Albums | Artists
+    ) -> None:
+        """
+        Queues record to be linked to key once phase has created it, the queue
+        entry is saved by the next commit_batch
+        """
+
+        self.new_pending_work.append((phase, key, record))
+
+    def load_pending_work(
+        self, phase: str
+    ) -> dict[str, list[Tracks | Albums | Artists]]:
+        """
+        Returns the records waiting on each key of a phase's pending work queue
+        """
+
+        models: dict[str, type[db.Model]] = {
+            "tracks": Tracks,
+            "albums": Albums,
+            "artists": Artists,
+        }
+
+        pending_rows: list[tuple[str, str, int]] = (
+            db.session.query(
+                PendingWork.key, PendingWork.record_type, PendingWork.record_id
+            )
+            .filter(PendingWork.phase == phase)
+            .order_by(PendingWork.id)
+            .all()
+        )
+
+        records: dict[tuple[str, int], Tracks | Albums | Artists] = {}
+        for record_type, model in models.items():
+            record_ids: list[int] = list(
+                {
+                    record_id
+                    for (_, pending_type, record_id) in pending_rows
+                    if pending_type == record_type
+                }
+            )
+            for pos in range(0, len(record_ids), 500):
+                records.update(
+                    ((record_type, record.id), record)
+                    for record in db.session.query(model).filter(
+                        model.id.in_(record_ids[pos : pos + 500])
+                    )
+                )
+
+        pending_work: dict[str, list[Tracks | Albums | Artists]] = {}
+        for key, record_type, record_id in pending_rows:
+            pending_work.setdefault(key, []).append(records[(record_type, record_id)])
+
+        return pending_work
+
+    def commit_batch(
+        self, phase: str | None = None, keys: list[str] | None = None
+    ) -> None:
+        """
+        Commits the current batch together with its track URIs and queued
+        pending work, removing the keys it processed from phase's queue.
+
+        A single flush gives the whole batch its ids and writes its association
+        rows, and the single commit makes the batch a durable checkpoint.
+        """
+
+        new_records: list = list(db.session.new)
+        db.session.flush()
+
+        # Names are indexed in the same transaction their records are saved in
+        new_search_rows: list[dict] = search_index_rows(new_records)
+        if new_search_rows:
+            db.session.execute(search_index.insert(), new_search_rows)
+
+        if self.new_trackuri_records:
+            db.session.execute(
+                TrackUris.__table__.insert(),
+                [
+                    {"uri": track_uri, "track_id": track.id}
+                    for track_uri, track in self.new_trackuri_records
+                ],
+            )
+        if self.new_pending_work:
+            db.session.execute(
+                PendingWork.__table__.insert(),
+                [
+                    {
+                        "phase": pending_phase,
+                        "key": key,
+                        "record_type": record.__tablename__,
+                        "record_id": record.id,
+                    }
+                    for pending_phase, key, record in self.new_pending_work
+                ],
+            )
+        keys = keys or []
+        for pos in range(0, len(keys), 500):
+            db.session.query(PendingWork).filter(
+                PendingWork.phase == phase, PendingWork.key.in_(keys[pos : pos + 500])
+            ).delete(synchronize_session=False)
+
+        self.commit_data()
+
+        self.new_trackuri_records = []
+        self.new_pending_work = []
+
+    def commit_data(self) -> None:
+        """
+        Commits data served by the API, bumping the data generation in the same
+        transaction so cached API responses are invalidated along with it
+        """
+
+        now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
+        updated: int = db.session.query(DataGeneration).update(
+            {
+                DataGeneration.generation: DataGeneration.generation + 1,
+                DataGeneration.modified_date: now,
+            },
+            synchronize_session=False,
+        )
+        if not updated:
+            db.session.add(DataGeneration(id=1, generation=1, modified_date=now))
+
+        db.session.commit()
 
     def parse_release_date(
         self, release_date: str, release_date_precision: str
@@ -411,22 +828,100 @@ class Populator:
 
         return datetime.datetime.now()
 
+    def link_artists(self) -> None:
+        """
+        Links every track to its artists and to the artists of its album, the
+        artists its streams are credited to, so that the artists of a stream
+        are a single join on its track_id.
+
+        Links already made are kept, which makes it safe to recompute them all
+        on each run from the track and album links made so far.
+        """
+
+        print("\nLinking Artists")
+        start: float = time.perf_counter()
+        # UNION drops the duplicates of artists credited on both track and album
+        track_artists = db.union(
+            db.select(artists_tracks.c.artist_id, artists_tracks.c.track_id)
+            # SQLite needs a WHERE clause to tell ON CONFLICT apart from a join
+            .where(db.true()),
+            db.select(artists_albums.c.artist_id, Tracks.id)
+            .join(Tracks, Tracks.album_id == artists_albums.c.album_id)
+            .where(db.true()),
+        )
+
+        rows: int = db.session.execute(
+            sqlite_insert(stream_artists)
+            .from_select(["artist_id", "track_id"], track_artists)
+            .on_conflict_do_nothing()
+        ).rowcount
+
+        self.commit_data()
+        print_phase_rate("Linking Artists", rows, time.perf_counter() - start)
+
+    def link_genres(self) -> None:
+        """
+        Links every album to the genres of its artists, and every track to the
+        genres of the artists its streams are credited to, so that the genres
+        of a stream are a single join on its track_id.
+
+        Links already made are kept, which makes it safe to recompute them all
+        on each run from the artist links made so far.
+        """
+
+        print("\nLinking Genres")
+        start: float = time.perf_counter()
+        rows: int = 0
+        for table, key, artist_links in (
+            (genres_albums, "album_id", artists_albums),
+            (genres_tracks, "track_id", stream_artists),
+        ):
+            genres = (
+                db.select(genres_artists.c.genre_id, artist_links.c[key])
+                .distinct()
+                .join(
+                    artist_links,
+                    artist_links.c.artist_id == genres_artists.c.artist_id,
+                )
+                .where(db.true())
+            )
+            rows += db.session.execute(
+                sqlite_insert(table)
+                .from_select(["genre_id", key], genres)
+                .on_conflict_do_nothing()
+            ).rowcount
+
+        self.commit_data()
+        print_phase_rate("Linking Genres", rows, time.perf_counter() - start)
+
     def get_track_features(self) -> None:
         """
         ...
         """
 
-        tracks: list[Tracks] = list(self.current_trackuri_records.values())
+        # Tracks that already have their features are not requested again
+        tracks: list[Tracks] = [
+            track
+            for track in dict.fromkeys(self.current_trackuri_records.values())
+            if track.acousticness is None
+        ]
         track_uris: list[str] = [track.uri for track in tracks]
 
         print("\nGetting Track Features")
-        for pos in tqdm.tqdm(range(0, len(tracks), 100)):
-            track_uris_batch = track_uris[pos : pos + 100]
-
-            features_batch = self.sp_client.audio_features(track_uris_batch)
+        for pos, features_batch in tqdm.tqdm(
+            zip(
+                range(0, len(tracks), 100),
+                self.fetcher.map(
+                    self.sp_client.audio_features,
+                    (track_uris[pos : pos + 100] for pos in range(0, len(tracks), 100)),
+                ),
+            ),
+            total=(len(tracks) + 99) // 100,
+        ):
             if features_batch is None:
                 return
 
+            now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
             for i, features in enumerate(features_batch):
                 if not features:
                     continue
@@ -443,74 +938,444 @@ class Populator:
                 track.tempo = features["tempo"]
                 track.time_signature = features["time_signature"]
                 track.valence = features["valence"]
+                track.modified_date = now
 
-            db.session.commit()
+            self.commit_data()
 
     def create_streams(self) -> None:
         """
         ...
         """
 
-        new_stream_records: list[Streams] = []
+        # Plain values of every known track so that building rows does not
+        # touch the expired ORM objects after each chunk is committed
+        track_values: dict[str, tuple[int, int, int]] = {
+            track_uri: (track.id, track.album_id, track.duration_ms)
+            for track_uri, track in self.current_trackuri_records.items()
+        }
+
+        # Shared by every new stream, so converted to epoch seconds only once
+        now: int = int(time.time())
+        new_stream_rows: list[dict] = []
+        timings: dict[str, list] = {"build": [0, 0.0], "insert": [0, 0.0]}
+        # Every stream inserted by this run gets an id above this one, kept in
+        # the checkpoint so a resumed run also rolls up what the interrupted one saved
+        checkpoint: PopulateCheckpoints = self.get_checkpoint("create_streams")
+        if checkpoint.position is None:
+            checkpoint.position = (
+                db.session.query(db.func.max(Streams.id)).scalar() or 0
+            )
+            db.session.commit()
+        last_stream_id: int = checkpoint.position
 
         print("\nCreating Streams")
-        for stream_object in tqdm.tqdm(self.loaded_stream_objects):
-            if stream_object["spotify_track_uri"] is not None:
-                track = self.current_trackuri_records.get(
-                    stream_object["spotify_track_uri"]
+        start: float = time.perf_counter()
+        for (
+            track_uri,
+            stream_date,
+            ms_played,
+            reason_start,
+            reason_end,
+            shuffle,
+        ) in tqdm.tqdm(self.iter_loaded_stream_records()):
+            track = track_values.get(track_uri)
+            if track is None:
+                continue
+
+            track_id, album_id, duration_ms = track
+            new_stream_rows.append(
+                {
+                    "track_id": track_id,
+                    "album_id": album_id,
+                    "stream_date": stream_date,
+                    "ms_played": ms_played,
+                    "ratio_played": min(ms_played / duration_ms, 1.0)
+                    if duration_ms > 0
+                    else 0.0,
+                    "reason_start_id": self.get_reason_id(reason_start),
+                    "reason_end_id": self.get_reason_id(reason_end),
+                    "shuffle": shuffle,
+                    "created_date": now,
+                    "modified_date": now,
+                }
+            )
+
+            if len(new_stream_rows) >= STREAMS_CHUNK_SIZE:
+                self.save_streams(new_stream_rows, timings)
+                new_stream_rows = []
+
+        self.save_streams(new_stream_rows, timings)
+        elapsed: float = time.perf_counter() - start
+
+        timings["build"][1] = elapsed - timings["insert"][1]
+
+        print_phase_rate("Building Streams", *timings["build"])
+        print_phase_rate("Inserting Streams", *timings["insert"])
+        print(
+            f"Skipped {timings['build'][0] - timings['insert'][0]} already ingested"
+            " Streams"
+        )
+
+        start = time.perf_counter()
+        rolled_up_rows: int = self.update_daily_stats(last_stream_id)
+        print_phase_rate(
+            "Updating daily stats", rolled_up_rows, time.perf_counter() - start
+        )
+
+        start = time.perf_counter()
+        hourly_rows: int = self.update_hourly_stats(last_stream_id)
+        print_phase_rate(
+            "Updating hourly stats", hourly_rows, time.perf_counter() - start
+        )
+
+        start = time.perf_counter()
+        session_rows: int = self.update_sessions(last_stream_id)
+        print_phase_rate("Updating sessions", session_rows, time.perf_counter() - start)
+
+        # Stats and sessions are committed together with the new
+        # position, so a resumed run never applies them twice to the same streams
+        checkpoint.position = db.session.query(db.func.max(Streams.id)).scalar() or 0
+        self.commit_data()
+
+    def get_reason_id(self, reason: str) -> int:
+        """
+        Returns the id of reason in the reasons dictionary, adding it to the
+        current transaction if it is new
+        """
+
+        reason_id: int | None = self.current_reason_ids.get(reason)
+        if reason_id is None:
+            reason_id = db.session.execute(
+                Reasons.__table__.insert().values(name=reason)
+            ).inserted_primary_key[0]
+            self.current_reason_ids[reason] = reason_id
+
+        return reason_id
+
+    def skipped(self):
+        """
+        Returns 1 for a skipped stream and 0 otherwise, as a SQL expression
+        """
+
+        return db.case(
+            (Streams.reason_end_id == self.current_reason_ids.get(SKIP_REASON_END), 1),
+            else_=0,
+        )
+
+    def save_streams(
+        self, new_stream_rows: list[dict], timings: dict[str, list]
+    ) -> None:
+        """
+        Inserts a chunk of Stream rows with a single executemany, adding the
+        row counts and duration to timings
+        """
+
+        if not new_stream_rows:
+            return
+
+        timings["build"][0] += len(new_stream_rows)
+
+        start: float = time.perf_counter()
+        # Plays that were already ingested hit the natural key and are skipped
+        result = db.session.execute(
+            sqlite_insert(Streams.__table__).on_conflict_do_nothing(), new_stream_rows
+        )
+        self.commit_data()
+        timings["insert"][0] += result.rowcount
+        timings["insert"][1] += time.perf_counter() - start
+
+    def update_daily_stats(self, last_stream_id: int) -> int:
+        """
+        Adds the plays, ms_played and skips of every stream with an id above
+        last_stream_id to the daily track, album, artist and genre stats,
+        returning the number of rows created or updated
+        """
+
+        new_streams = (
+            db.select(
+                Streams.id,
+                db.func.date(Streams.stream_date, "unixepoch").label("day"),
+                Streams.track_id,
+                Streams.album_id,
+                Streams.ms_played,
+                self.skipped().label("skipped"),
+            )
+            .where(Streams.id > last_stream_id)
+            .subquery()
+        )
+        artist_streams = (
+            db.select(new_streams, stream_artists.c.artist_id)
+            .join(stream_artists, stream_artists.c.track_id == new_streams.c.track_id)
+            .subquery()
+        )
+        genre_streams = (
+            db.select(new_streams, genres_tracks.c.genre_id)
+            .join(genres_tracks, genres_tracks.c.track_id == new_streams.c.track_id)
+            .subquery()
+        )
+
+        rows: int = 0
+        for model, streams, key in (
+            (TrackDailyStats, new_streams, "track_id"),
+            (AlbumDailyStats, new_streams, "album_id"),
+            (ArtistDailyStats, artist_streams, "artist_id"),
+            (GenreDailyStats, genre_streams, "genre_id"),
+        ):
+            daily_stats = (
+                db.select(
+                    streams.c.day,
+                    streams.c[key],
+                    db.func.count(),
+                    db.func.sum(streams.c.ms_played),
+                    db.func.sum(streams.c.skipped),
                 )
-                if track is None:
-                    continue
+                # SQLite needs a WHERE clause to tell ON CONFLICT apart from a join
+                .where(db.true()).group_by(streams.c.day, streams.c[key])
+            )
+            statement = sqlite_insert(model.__table__).from_select(
+                ["day", key, "plays", "ms_played", "skips"], daily_stats
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=["day", key],
+                set_={
+                    "plays": model.plays + statement.excluded.plays,
+                    "ms_played": model.ms_played + statement.excluded.ms_played,
+                    "skips": model.skips + statement.excluded.skips,
+                },
+            )
+            rows += db.session.execute(statement).rowcount
 
-                new_stream_records.append(
-                    Streams(
-                        track_id=track.id,
-                        track_name=track.name,
-                        album_id=track.album_id,
-                        album_name=track.album.name,
-                        stream_date=datetime.datetime.strptime(
-                            stream_object["ts"], "%Y-%m-%dT%H:%M:%SZ"
-                        ),
-                        ms_played=stream_object["ms_played"],
-                        ratio_played=min(
-                            stream_object["ms_played"] / track.duration_ms, 1.0
-                        )
-                        if track.duration_ms > 0
-                        else 0.0,
-                        reason_start=stream_object["reason_start"],
-                        reason_end=stream_object["reason_end"],
-                        shuffle=stream_object["shuffle"],
-                        created_date=datetime.datetime.now(datetime.timezone.utc),
-                        modified_date=datetime.datetime.now(datetime.timezone.utc),
-                    )
+        return rows
+
+    def update_hourly_stats(self, last_stream_id: int) -> int:
+        """
+        Adds the plays and ms_played of every stream with an id above
+        last_stream_id to the hourly stats of all streams and of their album,
+        artists and genres, returning the number of rows created or updated.
+
+        Hours are local to stats_timezone, converted once here so that
+        heatmaps and series only sum precomputed rows. Without any hourly
+        stats yet, every stream is added.
+        """
+
+        if db.session.query(HourlyStats.hour).first() is None:
+            last_stream_id = 0
+
+        new_streams = (
+            db.select(
+                Streams.id,
+                (
+                    db.type_coerce(Streams.stream_date, db.Integer)
+                    // QUARTER_HOUR_SECONDS
+                ).label("quarter"),
+                Streams.track_id,
+                Streams.album_id,
+                db.type_coerce(Streams.shuffle, db.Integer).label("shuffle"),
+                Streams.ms_played,
+            )
+            .where(Streams.id > last_stream_id)
+            .subquery()
+        )
+        artist_streams = (
+            db.select(new_streams, stream_artists.c.artist_id)
+            .join(stream_artists, stream_artists.c.track_id == new_streams.c.track_id)
+            .subquery()
+        )
+        genre_streams = (
+            db.select(new_streams, genres_tracks.c.genre_id)
+            .join(genres_tracks, genres_tracks.c.track_id == new_streams.c.track_id)
+            .subquery()
+        )
+
+        @functools.lru_cache(maxsize=None)
+        def local_hour(quarter: int) -> datetime.datetime:
+            return datetime.datetime.fromtimestamp(
+                quarter * QUARTER_HOUR_SECONDS, self.stats_timezone
+            ).replace(minute=0, second=0, tzinfo=None)
+
+        rows: int = 0
+        for model, streams, key in (
+            (HourlyStats, new_streams, None),
+            (AlbumHourlyStats, new_streams, "album_id"),
+            (ArtistHourlyStats, artist_streams, "artist_id"),
+            (GenreHourlyStats, genre_streams, "genre_id"),
+        ):
+            keys: list = [streams.c.quarter, streams.c.shuffle]
+            if key is not None:
+                keys.append(streams.c[key])
+
+            # Quarter hours falling in the same local hour are summed together
+            hourly_stats: dict[tuple, list[int]] = {}
+            for quarter, shuffle, *entity, plays, ms_played in (
+                db.session.connection()
+                .execute(
+                    db.select(
+                        *keys, db.func.count(), db.func.sum(streams.c.ms_played)
+                    ).group_by(*keys)
                 )
+                .all()
+            ):
+                sums = hourly_stats.setdefault(
+                    (local_hour(quarter), bool(shuffle), *entity), [0, 0]
+                )
+                sums[0] += plays
+                sums[1] += ms_played
 
-        # Batch insertion of streams
-        print("Saving...", end="")
-        db.session.add_all(new_stream_records)
-        db.session.commit()
-        print("DONE!")
+            if not hourly_stats:
+                continue
 
-        print("\nLinking Streams")
-        for stream in tqdm.tqdm(new_stream_records):
-            stream.artists.extend(
-                {
-                    artist.uri: artist
-                    for artist in stream.track.artists + stream.album.artists
-                }.values()
+            columns: list[str] = ["hour", "shuffle"] + ([key] if key else [])
+            statement = sqlite_insert(model.__table__)
+            statement = statement.on_conflict_do_update(
+                index_elements=columns,
+                set_={
+                    "plays": model.plays + statement.excluded.plays,
+                    "ms_played": model.ms_played + statement.excluded.ms_played,
+                },
             )
+            db.session.execute(
+                statement,
+                [
+                    {
+                        **dict(zip(columns, bucket)),
+                        "plays": plays,
+                        "ms_played": ms_played,
+                    }
+                    for bucket, (plays, ms_played) in hourly_stats.items()
+                ],
+            )
+            rows += len(hourly_stats)
 
-        db.session.commit()
+        return rows
+
+    def update_sessions(self, last_stream_id: int) -> int:
+        """
+        Recomputes the sessions that streams with an id above last_stream_id
+        fall in or next to, returning the number of sessions written.
+
+        Only sessions ending less than SESSION_GAP_SECONDS before the new
+        streams start, and starting less than SESSION_GAP_SECONDS after they
+        end, can change. They are deleted and the streams they span, along
+        with the new ones, are split into sessions again. Without any session
+        yet, every stream is.
+        """
+
+        epoch_seconds = db.type_coerce(Streams.stream_date, db.Integer)
+        first_start, last_end = db.session.execute(
+            db.select(
+                db.func.min(epoch_seconds - Streams.ms_played // 1000),
+                db.func.max(epoch_seconds),
+            ).where(Streams.id > last_stream_id)
+        ).one()
+        if first_start is None:
+            return 0
+
+        streams = db.select(
+            Streams.id,
+            epoch_seconds,
+            Streams.ms_played,
+            Streams.track_id,
+            self.skipped(),
+        ).order_by(Streams.stream_date, Streams.id)
+
+        if db.session.query(Sessions.id).first() is not None:
+            first_start_date, last_end_date = (
+                datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(
+                    tzinfo=None
+                )
+                for epoch in (first_start, last_end)
+            )
+            gap: datetime.timedelta = datetime.timedelta(seconds=SESSION_GAP_SECONDS)
+            # Sessions never overlap, so the changed ones are a contiguous run
+            changed: tuple = (
+                Sessions.end_date >= first_start_date - gap,
+                Sessions.start_date <= last_end_date + gap,
+            )
+            changed_start_date, changed_end_date = db.session.execute(
+                db.select(
+                    db.func.min(Sessions.start_date), db.func.max(Sessions.end_date)
+                ).where(*changed)
+            ).one()
+            db.session.execute(db.delete(Sessions).where(*changed))
+            streams = streams.where(
+                Streams.stream_date
+                >= min(changed_start_date or first_start_date, first_start_date),
+                Streams.stream_date
+                <= max(changed_end_date or last_end_date, last_end_date),
+            )
+
+        # Plain rows from the connection skip the ORM result processing
+        stream_ids, stream_dates, ms_played, track_ids, skipped = (
+            np.array(column, dtype=np.int64)
+            for column in zip(*db.session.connection().execute(streams).all())
+        )
+        sessions: dict[str, list] = {
+            column: values.tolist()
+            for column, values in find_sessions(
+                stream_ids, stream_dates, ms_played, track_ids, skipped
+            ).items()
+        }
+        for column in ("start_date", "end_date"):
+            sessions[column] = [
+                datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc)
+                for epoch in sessions[column]
+            ]
+
+        db.session.execute(
+            Sessions.__table__.insert(),
+            [dict(zip(sessions, row)) for row in zip(*sessions.values())],
+        )
+
+        return len(sessions["plays"])
+
+    def get_checkpoint(
+        self, phase: str, create: bool = True
+    ) -> PopulateCheckpoints | None:
+        """
+        Returns the checkpoint of phase, creating and committing it if needed
+        """
+
+        checkpoint: PopulateCheckpoints | None = (
+            db.session.query(PopulateCheckpoints)
+            .filter(PopulateCheckpoints.phase == phase)
+            .first()
+        )
+
+        if checkpoint is None and create:
+            now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
+            checkpoint = PopulateCheckpoints(
+                phase=phase, completed=False, created_date=now, modified_date=now
+            )
+            db.session.add(checkpoint)
+            db.session.commit()
+
+        return checkpoint
 
     def populate_db(self) -> None:
         """
         ...
         """
 
-        self.process_loaded_track_uris()
-        self.process_loaded_album_uris()
-        self.process_loaded_artist_uris()
-        self.process_loaded_label_names()
-        self.process_loaded_genre_names()
-        self.get_track_features()
-        self.create_streams()
+        # Marks a run as in progress until every phase has completed
+        self.get_checkpoint("populate_db")
+
+        for phase in POPULATE_PHASES:
+            checkpoint: PopulateCheckpoints = self.get_checkpoint(phase)
+            if checkpoint.completed:
+                print(f"\nSkipping {phase}, completed by the interrupted run")
+                continue
+
+            populate_phase: Callable[[], None] = getattr(self, phase)
+            populate_phase()
+
+            checkpoint.completed = True
+            checkpoint.modified_date = datetime.datetime.now(datetime.timezone.utc)
+            db.session.commit()
+
+        self.record_ingested_files()
+
+        db.session.query(PopulateCheckpoints).delete()
+        db.session.commit()
+
+        if isinstance(self.sp_client, CachedSpotifyClient):
+            print(f"\nSpotify API cache: {self.sp_client.cache.stats()}")
@@ -0,0 +1,50 @@
+"""
+Vectorized detection of listening sessions over streams sorted by date
+"""
+
+import numpy as np
+
+# Silence in seconds after which the next stream starts a new session
+SESSION_GAP_SECONDS: int = 30 * 60
+
+
+def find_sessions(
+    stream_ids: np.ndarray,
+    stream_dates: np.ndarray,
+    ms_played: np.ndarray,
+    track_ids: np.ndarray,
+    skipped: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """
+    Splits streams ordered by stream_date, given in epoch seconds, into
+    sessions and returns one array per Sessions column, with one entry per
+    session.
+
+    stream_date is when a stream ended, so a stream starts ms_played before
+    it. A session ends when the next stream starts more than
+    SESSION_GAP_SECONDS after every earlier stream ended.
+    """
+
+    if not len(stream_ids):
+        return {}
+
+    starts: np.ndarray = stream_dates - ms_played // 1000
+    # Streams can overlap, the end of a session is the latest end so far
+    ends: np.ndarray = np.maximum.accumulate(stream_dates)
+
+    breaks: np.ndarray = (
+        np.flatnonzero(starts[1:] - ends[:-1] > SESSION_GAP_SECONDS) + 1
+    )
+    firsts: np.ndarray = np.concatenate([[0], breaks])
+    lasts: np.ndarray = np.concatenate([breaks, [len(stream_ids)]]) - 1
+
+    return {
+        "start_date": np.minimum.reduceat(starts, firsts),
+        "end_date": ends[lasts],
+        "plays": lasts - firsts + 1,
+        "ms_played": np.add.reduceat(ms_played, firsts),
+        "skips": np.add.reduceat(skipped, firsts),
+        "first_stream_id": stream_ids[firsts],
+        "first_track_id": track_ids[firsts],
+        "last_stream_id": stream_ids[lasts],
+    }
@@ -0,0 +1,401 @@
+"""
+Synthetic Spotify extended streaming history exports, and a fake Spotify API
+client serving the catalog they were generated from, to run the populator
+offline
+"""
+
+import datetime
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+# Entities are numbered, and their number is written in the last characters
+# of their 22 character id. Tracks also played under a relinked URI get a
+# second id, which the API resolves to the same track like Spotify does.
+TRACK_ID_PREFIX: str = "T"
+RELINKED_TRACK_ID_PREFIX: str = "R"
+ALBUM_ID_PREFIX: str = "A"
+ARTIST_ID_PREFIX: str = "P"
+EPISODE_ID_PREFIX: str = "E"
+
+TRACKS_PER_ALBUM: int = 12
+ALBUMS_PER_ARTIST: int = 3
+GENRES: int = 300
+LABELS: int = 400
+
+# Words the names of the catalog are made of, so that searching them by
+# prefix matches realistic numbers of names
+NAME_WORDS: tuple[str, ...] = tuple(
+    "blue night summer love city light dream fire heart road moon rain star "
+    "home wild gold river shadow dance echo youth ocean glass storm paper "
+    "sugar winter neon silver garden tokyo radio".split()
+)
+
+# Relative frequencies of the reasons found in real exports
+REASONS_START: dict[str, int] = {
+    "trackdone": 55,
+    "fwdbtn": 20,
+    "clickrow": 12,
+    "backbtn": 5,
+    "appload": 4,
+    "playbtn": 3,
+    "remote": 1,
+}
+REASONS_END: dict[str, int] = {
+    "trackdone": 58,
+    "fwdbtn": 27,
+    "endplay": 8,
+    "backbtn": 3,
+    "unexpected-exit-while-paused": 2,
+    "logout": 1,
+    "remote": 1,
+}
+
+# Share of the plays that are podcast episodes, which have no track URI
+EPISODE_SHARE: float = 0.02
+
+# Exports are split into files of about this many plays
+STREAMS_PER_FILE: int = 15000
+
+FIRST_STREAM_DATE: datetime.datetime = datetime.datetime(2016, 1, 1, 8)
+
+
+def synthetic_id(prefix: str, number: int) -> str:
+    """
+    Returns the 22 character id of entity number of a kind
+    """
+
+    return f"{prefix}{number:021d}"
+
+
+def synthetic_uri(entity_type: str, prefix: str, number: int) -> str:
+    """
+    Returns the URI of entity number of a kind, such as spotify:track:<id>
+    """
+
+    return f"spotify:{entity_type}:{synthetic_id(prefix, number)}"
+
+
+def synthetic_number(uri: str) -> tuple[str, int]:
+    """
+    Returns the id prefix and the number of the entity of a synthetic URI
+    """
+
+    entity_id: str = uri.rsplit(":", 1)[-1]
+
+    return entity_id[0], int(entity_id[1:])
+
+
+def synthetic_name(number: int, words: int) -> str:
+    """
+    Returns a name of a few words followed by number
+    """
+
+    return " ".join(
+        [
+            NAME_WORDS[(number + pos * 11) * (pos + 1) % len(NAME_WORDS)].title()
+            for pos in range(words)
+        ]
+        + [str(number)]
+    )
+
+
+def track_duration_ms(number: int) -> int:
+    """
+    Returns the duration of track number, between 2 and 6 minutes
+    """
+
+    return 120000 + number * 7919 % 240000
+
+
+def write_stream_files(
+    streams_file_path: str,
+    streams: int,
+    tracks: int,
+    relinked: int = 0,
+    seed: int = 0,
+    streams_per_file: int = STREAMS_PER_FILE,
+) -> list[str]:
+    """
+    Writes an export of about streams plays of tracks distinct tracks as
+    endsong_<n>.json files, and returns their paths.
+
+    Track popularity follows a Zipf distribution and plays come in listening
+    sessions, one track after the other, with the reasons and play lengths
+    that go with how the previous play ended. relinked of the tracks are also
+    played under a second URI. The same arguments always write the same files.
+    """
+
+    rng: random.Random = random.Random(seed)
+    os.makedirs(streams_file_path, exist_ok=True)
+
+    cum_weights: list[float] = list(
+        itertools.accumulate(1.0 / (rank + 1) ** 1.1 for rank in range(tracks))
+    )
+    relinked_tracks: set[int] = set(rng.sample(range(tracks), min(relinked, tracks)))
+    reasons_start: list[str] = list(REASONS_START)
+    reasons_start_weights: list[int] = list(REASONS_START.values())
+    reasons_end: list[str] = list(REASONS_END)
+    reasons_end_weights: list[int] = list(REASONS_END.values())
+
+    stream_date: datetime.datetime = FIRST_STREAM_DATE
+    session_plays: int = 0
+    reason_end: str = "endplay"
+    file_paths: list[str] = []
+
+    for file_number, pos in enumerate(range(0, streams, streams_per_file)):
+        stream_objects: list[dict] = []
+        for number in rng.choices(
+            range(tracks),
+            cum_weights=cum_weights,
+            k=min(streams_per_file, streams - pos),
+        ):
+            if session_plays == 0:
+                session_plays = rng.randint(3, 40)
+                stream_date += datetime.timedelta(
+                    seconds=rng.expovariate(1 / (10 * 60 * 60))
+                )
+                reason_start: str = rng.choice(("appload", "clickrow", "playbtn"))
+            elif reason_end in ("trackdone", "fwdbtn", "backbtn"):
+                reason_start = reason_end
+            else:
+                reason_start = rng.choices(reasons_start, reasons_start_weights)[0]
+            session_plays -= 1
+
+            reason_end = rng.choices(reasons_end, reasons_end_weights)[0]
+            duration_ms: int = track_duration_ms(number)
+            ms_played: int = (
+                duration_ms
+                if reason_end == "trackdone"
+                else int(duration_ms * rng.random() ** 2)
+            )
+            stream_date += datetime.timedelta(milliseconds=ms_played)
+            stream_object: dict = {
+                # Plays are dated when they ended
+                "ts": stream_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "username": "synthetic",
+                "platform": "Android OS 13 API 33 (Google, Pixel 7)",
+                "ms_played": ms_played,
+                "conn_country": "JP",
+                "ip_addr_decrypted": "192.0.2.1",
+                "user_agent_decrypted": "unknown",
+                "master_metadata_track_name": None,
+                "master_metadata_album_artist_name": None,
+                "master_metadata_album_album_name": None,
+                "spotify_track_uri": None,
+                "episode_name": None,
+                "episode_show_name": None,
+                "spotify_episode_uri": None,
+                "reason_start": reason_start,
+                "reason_end": reason_end,
+                "shuffle": rng.random() < 0.4,
+                "skipped": reason_end == "fwdbtn" or None,
+                "offline": False,
+                "offline_timestamp": int(
+                    stream_date.replace(tzinfo=datetime.timezone.utc).timestamp()
+                ),
+                "incognito_mode": False,
+            }
+            if rng.random() < EPISODE_SHARE:
+                stream_object["episode_name"] = synthetic_name(number, 2)
+                stream_object["episode_show_name"] = synthetic_name(number % 50, 1)
+                stream_object["spotify_episode_uri"] = synthetic_uri(
+                    "episode", EPISODE_ID_PREFIX, number
+                )
+            else:
+                prefix: str = (
+                    RELINKED_TRACK_ID_PREFIX
+                    if number in relinked_tracks and rng.random() < 0.5
+                    else TRACK_ID_PREFIX
+                )
+                stream_object["master_metadata_track_name"] = synthetic_name(number, 2)
+                stream_object["master_metadata_album_artist_name"] = synthetic_name(
+                    number // TRACKS_PER_ALBUM // ALBUMS_PER_ARTIST, 1
+                )
+                stream_object["master_metadata_album_album_name"] = synthetic_name(
+                    number // TRACKS_PER_ALBUM, 3
+                )
+                stream_object["spotify_track_uri"] = synthetic_uri(
+                    "track", prefix, number
+                )
+            stream_objects.append(stream_object)
+
+        file_path: str = os.path.join(streams_file_path, f"endsong_{file_number}.json")
+        with open(file_path, "w", encoding="UTF-8") as json_file:
+            json.dump(stream_objects, json_file, ensure_ascii=False)
+        file_paths.append(file_path)
+
+    return file_paths
+
+
+class FakeSpotifyClient:
+    """
+    Stands in for spotipy.Spotify, answering tracks, albums, artists and
+    audio_features calls about the catalog write_stream_files plays from.
+
+    Every call waits latency seconds like a request to the API would, and is
+    counted per method in calls.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """
+        ...
+        """
+
+        self.latency: float = latency
+        self.calls: dict[str, int] = {
+            "tracks": 0,
+            "albums": 0,
+            "artists": 0,
+            "audio_features": 0,
+        }
+        # The Fetcher calls the client from several threads
+        self.lock: threading.Lock = threading.Lock()
+
+    def request(self, method: str) -> None:
+        """
+        Counts a call to method and waits as long as a request takes
+        """
+
+        with self.lock:
+            self.calls[method] += 1
+
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def tracks(self, tracks: list[str], market: str | None = None) -> dict:
+        """
+        ...
+        """
+
+        self.request("tracks")
+
+        return {"tracks": [self.track(uri) for uri in tracks]}
+
+    def albums(self, albums: list[str], market: str | None = None) -> dict:
+        """
+        ...
+        """
+
+        self.request("albums")
+
+        return {"albums": [self.album(uri) for uri in albums]}
+
+    def artists(self, artists: list[str]) -> dict:
+        """
+        ...
+        """
+
+        self.request("artists")
+
+        return {"artists": [self.artist(uri) for uri in artists]}
+
+    def audio_features(self, tracks: list[str]) -> list[dict]:
+        """
+        ...
+        """
+
+        self.request("audio_features")
+
+        return [self.features(uri) for uri in tracks]
+
+    def track(self, uri: str) -> dict:
+        """
+        Returns the Track object of a track URI, relinked URIs resolving to
+        the track they were relinked from
+        """
+
+        _, number = synthetic_number(uri)
+        album_number: int = number // TRACKS_PER_ALBUM
+        artist_number: int = album_number // ALBUMS_PER_ARTIST
+
+        artist_numbers: list[int] = [artist_number]
+        # Every fifth track features another artist
+        if number % 5 == 0:
+            artist_numbers.append(artist_number + 1 + number % 7)
+
+        return {
+            "uri": synthetic_uri("track", TRACK_ID_PREFIX, number),
+            "album": {"uri": synthetic_uri("album", ALBUM_ID_PREFIX, album_number)},
+            "artists": [
+                {"uri": synthetic_uri("artist", ARTIST_ID_PREFIX, artist)}
+                for artist in artist_numbers
+            ],
+            "disc_number": 1,
+            "duration_ms": track_duration_ms(number),
+            "explicit": number % 9 == 0,
+            "name": synthetic_name(number, 2),
+            "popularity": number * 31 % 101,
+            "preview_url": None,
+            "track_number": number % TRACKS_PER_ALBUM + 1,
+        }
+
+    def album(self, uri: str) -> dict:
+        """
+        Returns the Album object of an album URI
+        """
+
+        _, number = synthetic_number(uri)
+        artist_number: int = number // ALBUMS_PER_ARTIST
+
+        return {
+            "uri": uri,
+            "album_type": ("album", "single", "compilation")[number % 3],
+            "total_tracks": TRACKS_PER_ALBUM,
+            "name": synthetic_name(number, 3),
+            "release_date": f"{1970 + number % 54}-{number % 12 + 1:02d}-"
+            f"{number % 28 + 1:02d}",
+            "release_date_precision": "day",
+            "label": f"{synthetic_name(number % LABELS, 1)} Records",
+            "popularity": number * 17 % 101,
+            "images": [{"url": f"https://i.scdn.co/image/{uri.rsplit(':', 1)[-1]}"}],
+            "artists": [
+                {"uri": synthetic_uri("artist", ARTIST_ID_PREFIX, artist_number)}
+            ],
+        }
+
+    def artist(self, uri: str) -> dict:
+        """
+        Returns the Artist object of an artist URI
+        """
+
+        _, number = synthetic_number(uri)
+
+        return {
+            "uri": uri,
+            "followers": {"total": number * 7919 % 1000000},
+            "genres": [
+                synthetic_name(genre, 1).lower()
+                for genre in range(number % GENRES, number % GENRES + number % 4)
+            ],
+            "name": synthetic_name(number, 1),
+            "popularity": number * 13 % 101,
+            "images": [],
+        }
+
+    def features(self, uri: str) -> dict:
+        """
+        Returns the Audio Features object of a track URI
+        """
+
+        _, number = synthetic_number(uri)
+        rng: random.Random = random.Random(number)
+
+        return {
+            "uri": uri,
+            "acousticness": rng.random(),
+            "danceability": rng.random(),
+            "energy": rng.random(),
+            "instrumentalness": rng.random() ** 4,
+            "key": rng.randrange(12),
+            "liveness": rng.random() ** 2,
+            "loudness": -rng.uniform(2.0, 20.0),
+            "mode": rng.randrange(2),
+            "speechiness": rng.random() ** 3,
+            "tempo": rng.uniform(60.0, 180.0),
+            "time_signature": rng.choice((3, 4, 4, 4, 5)),
+            "valence": rng.random(),
+        }
@@ -0,0 +1,83 @@
+"""
+SQLite FTS5 full text index over the names of tracks, albums, artists, labels
+and genres
+"""
+
+import re
+
+from sqlalchemy import Integer, String, column, table
+
+# The virtual table is created by a migration, FTS5 keeps its index in shadow
+# tables named after it
+SEARCH_TABLE: str = "search_index"
+
+# Tables whose names are indexed, as the entity_type of their rows
+SEARCH_ENTITY_TYPES: tuple[str, ...] = (
+    "tracks",
+    "albums",
+    "artists",
+    "labels",
+    "genres",
+)
+
+# Not part of the models metadata, so create_all and autogenerate leave it alone
+search_index = table(
+    SEARCH_TABLE,
+    column("name", String),
+    column("entity_type", String),
+    column("entity_id", Integer),
+)
+
+# Matches ranked per query. bm25 has to be computed for every match before the
+# best ones are known, which takes far too long for the thousands of names a
+# one or two letter prefix matches, so only this many are ranked. Queries with
+# fewer matches, which is nearly all of them past the first letters, are
+# ranked exactly.
+SEARCH_CANDIDATES: int = 1000
+
+SEARCH_QUERY: str = (
+    f"SELECT entity_type, entity_id, name, rank FROM {SEARCH_TABLE} "
+    f"WHERE {SEARCH_TABLE} MATCH :match"
+)
+
+# Runs of letters and digits, anything else would be FTS5 query syntax
+SEARCH_TOKEN: re.Pattern = re.compile(r"[^\W_]+")
+
+
+def search_index_rows(records: list) -> list[dict]:
+    """
+    Returns the search_index rows of records of the indexed models, which must
+    have been flushed to have their ids
+    """
+
+    return [
+        {
+            "name": record.name,
+            "entity_type": record.__tablename__,
+            "entity_id": record.id,
+        }
+        for record in records
+        if record.__tablename__ in SEARCH_ENTITY_TYPES and record.name is not None
+    ]
+
+
+def build_match_query(query: str) -> str | None:
+    """
+    Returns the FTS5 query matching names with a word starting with each word
+    of query, or None if query has no words
+    """
+
+    tokens: list[str] = SEARCH_TOKEN.findall(query)
+    if not tokens:
+        return None
+
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """
+    Keeps autogenerate from dropping the search index, which it only sees by
+    reflecting the database
+    """
+
+    return not (type_ == "table" and reflected and name.startswith(SEARCH_TABLE))
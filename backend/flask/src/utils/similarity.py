@@ -0,0 +1,206 @@
+"""
+In-memory nearest neighbour index of the tracks over their audio features
+"""
+
+import threading
+
+import numpy as np
+from flask import Flask, current_app
+from flask_sqlalchemy import SQLAlchemy
+
+from src.utils.http_cache import data_generation
+
+# Audio features of a track and the range Spotify documents for each of them,
+# features are scaled to [0, 1] over these fixed ranges so that the scale of a
+# track does not change when other tracks are added to the index
+FEATURE_RANGES: dict[str, tuple[float, float]] = {
+    "acousticness": (0.0, 1.0),
+    "danceability": (0.0, 1.0),
+    "energy": (0.0, 1.0),
+    "instrumentalness": (0.0, 1.0),
+    "key": (-1.0, 11.0),
+    "liveness": (0.0, 1.0),
+    "loudness": (-60.0, 0.0),
+    "mode": (0.0, 1.0),
+    "speechiness": (0.0, 1.0),
+    "tempo": (0.0, 250.0),
+    "time_signature": (3.0, 7.0),
+    "valence": (0.0, 1.0),
+}
+
+# Tracks queried at once by a batch request
+MAX_BATCH_SIZE: int = 100
+
+
+class TrackFeatures:
+    """
+    Scaled audio features of every track that has them, as the rows of a
+    float32 matrix, along with the id and name of the track of each row.
+    """
+
+    def __init__(self) -> None:
+        """
+        ...
+        """
+
+        self.ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.names: list[str] = []
+        self.matrix: np.ndarray = np.empty((0, len(FEATURE_RANGES)), dtype=np.float32)
+        # Squared norms of the rows, reused by every distance computation
+        self.norms: np.ndarray = np.empty(0, dtype=np.float32)
+        self.rows: dict[int, int] = {}
+
+        # Newest modified_date loaded, tracks modified after it are loaded on refresh
+        self.last_modified: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def update(self, tracks: list[tuple]) -> "TrackFeatures":
+        """
+        Returns features with the rows of (id, name, *features) tracks added,
+        or replaced for tracks already in the index
+        """
+
+        features: TrackFeatures = TrackFeatures()
+        features.last_modified = self.last_modified
+        ids: np.ndarray = np.array([track[0] for track in tracks], dtype=np.int64)
+        minimums, maximums = np.array(list(FEATURE_RANGES.values())).T
+        matrix: np.ndarray = (
+            (np.array([track[2:] for track in tracks], dtype=np.float64) - minimums)
+            / (maximums - minimums)
+        ).astype(np.float32)
+
+        # Previous rows of the updated tracks are left out
+        kept: np.ndarray = ~np.isin(self.ids, ids)
+        features.ids = np.concatenate([self.ids[kept], ids])
+        features.names = [name for name, keep in zip(self.names, kept) if keep] + [
+            track[1] for track in tracks
+        ]
+        features.matrix = np.concatenate([self.matrix[kept], matrix])
+        features.norms = np.einsum("ij,ij->i", features.matrix, features.matrix)
+        features.rows = {
+            int(track_id): row for row, track_id in enumerate(features.ids)
+        }
+
+        return features
+
+    def similar(self, track_ids: list[int], limit: int) -> list[list[dict]]:
+        """
+        Returns the limit tracks nearest to each of track_ids, by euclidean
+        distance between their scaled features, nearest first
+        """
+
+        rows: np.ndarray = np.array([self.rows[track_id] for track_id in track_ids])
+        queries: np.ndarray = self.matrix[rows]
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2, a single product for the whole batch
+        distances: np.ndarray = (
+            self.norms[np.newaxis, :]
+            - 2 * queries @ self.matrix.T
+            + self.norms[rows][:, np.newaxis]
+        )
+        # The queried tracks are not similar to themselves
+        distances[np.arange(len(rows)), rows] = np.inf
+
+        limit = min(limit, len(self) - 1)
+        if limit <= 0:
+            return [[] for _ in track_ids]
+
+        nearest: np.ndarray = np.argpartition(distances, limit - 1, axis=1)[:, :limit]
+        results: list[list[dict]] = []
+        for query, candidates in enumerate(nearest):
+            candidates = candidates[np.argsort(distances[query, candidates])]
+            results.append(
+                [
+                    {
+                        "id": int(self.ids[row]),
+                        "name": self.names[row],
+                        "distance": float(np.sqrt(max(distances[query, row], 0.0))),
+                    }
+                    for row in candidates
+                ]
+            )
+
+        return results
+
+
+class TrackSimilarity:
+    """
+    Flask extension keeping a TrackFeatures index of the tracks per app.
+
+    The populator stamps the modified_date of a track when it sets its
+    features and bumps the data generation when it commits them, so the
+    index is refreshed whenever the generation changes, and only the tracks
+    modified since are loaded. Responses are cached by generation, so they
+    are never computed from an index older than the generation they are
+    cached under.
+    """
+
+    def __init__(self, app: Flask | None = None, db: SQLAlchemy | None = None) -> None:
+        """
+        ...
+        """
+
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app: Flask, db: SQLAlchemy) -> None:
+        """
+        ...
+        """
+
+        app.extensions["similarity"] = {
+            "db": db,
+            "features": TrackFeatures(),
+            # Data generation the features were refreshed at
+            "generation": None,
+            "lock": threading.Lock(),
+        }
+
+    @property
+    def features(self) -> TrackFeatures:
+        """
+        The up to date index of the current app
+        """
+
+        state: dict = current_app.extensions["similarity"]
+        # Read before refreshing, so the index is at least as new as it
+        current = data_generation(state["db"])
+        generation: int | None = current[0] if current is not None else None
+
+        with state["lock"]:
+            # Without a generation, only the newest modified_date is checked
+            if generation is None or generation != state["generation"]:
+                state["features"] = self.refresh(state["db"], state["features"])
+                state["generation"] = generation
+
+            return state["features"]
+
+    def refresh(self, db: SQLAlchemy, features: TrackFeatures) -> TrackFeatures:
+        """
+        Returns features with every track whose features were set since they
+        were loaded
+        """
+
+        last_modified: str | None = db.session.execute(
+            db.text("SELECT max(modified_date) FROM tracks")
+        ).scalar()
+        if last_modified is None or last_modified == features.last_modified:
+            return features
+
+        # Queries still running keep reading the index they were handed
+        query: str = (
+            f"SELECT id, name, {', '.join(FEATURE_RANGES)} FROM tracks "
+            f"WHERE {' AND '.join(f'{name} IS NOT NULL' for name in FEATURE_RANGES)}"
+        )
+        parameters: dict[str, str] = {}
+        if features.last_modified is not None:
+            query += " AND modified_date > :last_modified"
+            parameters["last_modified"] = features.last_modified
+
+        tracks: list = db.session.execute(db.text(query), parameters).all()
+        if tracks:
+            features = features.update(tracks)
+        features.last_modified = last_modified
+
+        return features
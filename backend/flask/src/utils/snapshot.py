@@ -0,0 +1,482 @@
+"""
+Denormalized columnar snapshots of the streams, written as Parquet or Arrow files
+"""
+
+import contextlib
+import fcntl
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.server.extensions import db
+from src.models.associations import artists_albums, artists_tracks, genres_artists
+from src.models.models import Albums, Artists, Genres, Reasons, Streams, Tracks
+
+# File extension of every snapshot format
+SNAPSHOT_FORMATS: dict[str, str] = {"parquet": "parquet", "arrow": "arrow"}
+
+# Codec snapshot files are compressed with, in both formats
+SNAPSHOT_COMPRESSION: str = "zstd"
+
+# Streams read from the database and joined at a time
+SNAPSHOT_BATCH_SIZE: int = 100000
+
+# Audio features of a track, copied to every stream of it
+FEATURE_COLUMNS: tuple[str, ...] = (
+    "acousticness",
+    "danceability",
+    "energy",
+    "instrumentalness",
+    "liveness",
+    "loudness",
+    "speechiness",
+    "tempo",
+    "valence",
+)
+
+STRING: pa.DataType = pa.dictionary(pa.int32(), pa.string())
+
+SNAPSHOT_SCHEMA: pa.Schema = pa.schema(
+    [
+        ("stream_id", pa.int64()),
+        ("stream_date", pa.timestamp("s", tz="UTC")),
+        ("ms_played", pa.int32()),
+        ("ratio_played", pa.float32()),
+        ("reason_start", STRING),
+        ("reason_end", STRING),
+        ("shuffle", pa.bool_()),
+        ("track_id", pa.int32()),
+        ("track_uri", STRING),
+        ("track_name", STRING),
+        ("duration_ms", pa.int32()),
+        ("explicit", pa.bool_()),
+        ("track_popularity", pa.int16()),
+        *[(column, pa.float32()) for column in FEATURE_COLUMNS],
+        ("key", pa.int8()),
+        ("mode", pa.int8()),
+        ("time_signature", pa.float32()),
+        ("artist_names", pa.list_(STRING)),
+        ("genre_names", pa.list_(STRING)),
+        ("album_id", pa.int32()),
+        ("album_name", STRING),
+        ("album_type", STRING),
+        ("release_date", pa.date32()),
+        ("label_name", STRING),
+    ]
+)
+
+
+def dictionary_array(values: list[str | None]) -> pa.DictionaryArray:
+    """
+    Dictionary encodes a column of strings
+    """
+
+    return pa.array(values, pa.string()).dictionary_encode()
+
+
+def list_array(lists: list[list[str]]) -> pa.ListArray:
+    """
+    Builds a column of lists of strings sharing a single dictionary
+    """
+
+    offsets: np.ndarray = np.zeros(len(lists) + 1, dtype=np.int32)
+    np.cumsum([len(values) for values in lists], out=offsets[1:])
+
+    return pa.ListArray.from_arrays(
+        pa.array(offsets),
+        dictionary_array([value for values in lists for value in values]),
+    )
+
+
+def positions(ids: list[int]) -> np.ndarray:
+    """
+    Returns an array mapping every id to its position in ids
+    """
+
+    id_positions: np.ndarray = np.zeros(max(ids, default=0) + 1, dtype=np.int64)
+    id_positions[ids] = np.arange(len(ids))
+
+    return id_positions
+
+
+def build_tracks_table() -> tuple[pa.Table, np.ndarray]:
+    """
+    Returns the snapshot columns of every track, one row per track, and the
+    row of each track id.
+
+    A track is credited to the artists of the track and of its album, the
+    same ones stream_artists credits its streams to, and to their genres.
+    """
+
+    artist_names: dict[int, str] = dict(
+        db.session.execute(db.select(Artists.id, Artists.name)).all()
+    )
+    artist_genres: dict[int, list[str]] = {}
+    for artist_id, genre_name in db.session.execute(
+        db.select(genres_artists.c.artist_id, Genres.name).join(
+            Genres, Genres.id == genres_artists.c.genre_id
+        )
+    ):
+        artist_genres.setdefault(artist_id, []).append(genre_name)
+
+    track_artists: dict[int, list[int]] = {}
+    for artist_id, track_id in db.session.execute(
+        db.select(artists_tracks.c.artist_id, artists_tracks.c.track_id)
+    ):
+        track_artists.setdefault(track_id, []).append(artist_id)
+    album_artists: dict[int, list[int]] = {}
+    for artist_id, album_id in db.session.execute(
+        db.select(artists_albums.c.artist_id, artists_albums.c.album_id)
+    ):
+        album_artists.setdefault(album_id, []).append(artist_id)
+
+    tracks: list = db.session.execute(
+        db.select(
+            Tracks.id,
+            Tracks.uri,
+            Tracks.name,
+            Tracks.album_id,
+            Tracks.duration_ms,
+            Tracks.explicit,
+            Tracks.popularity,
+            *[getattr(Tracks, column) for column in FEATURE_COLUMNS],
+            Tracks.key,
+            Tracks.mode,
+            Tracks.time_signature,
+        ).order_by(Tracks.id)
+    ).all()
+
+    artists: list[list[int]] = [
+        list(
+            dict.fromkeys(
+                track_artists.get(track.id, []) + album_artists.get(track.album_id, [])
+            )
+        )
+        for track in tracks
+    ]
+    columns: dict[str, pa.Array] = {
+        "track_uri": dictionary_array([track.uri for track in tracks]),
+        "track_name": dictionary_array([track.name for track in tracks]),
+        "duration_ms": pa.array([track.duration_ms for track in tracks], pa.int32()),
+        "explicit": pa.array([track.explicit for track in tracks], pa.bool_()),
+        "track_popularity": pa.array(
+            [track.popularity for track in tracks], pa.int16()
+        ),
+        **{
+            column: pa.array([getattr(track, column) for track in tracks], pa.float32())
+            for column in FEATURE_COLUMNS
+        },
+        "key": pa.array([track.key for track in tracks], pa.int8()),
+        "mode": pa.array([track.mode for track in tracks], pa.int8()),
+        "time_signature": pa.array(
+            [track.time_signature for track in tracks], pa.float32()
+        ),
+        "artist_names": list_array(
+            [[artist_names[artist_id] for artist_id in ids] for ids in artists]
+        ),
+        "genre_names": list_array(
+            [
+                sorted(
+                    {
+                        genre
+                        for artist_id in ids
+                        for genre in artist_genres.get(artist_id, [])
+                    }
+                )
+                for ids in artists
+            ]
+        ),
+    }
+
+    return pa.table(columns), positions([track.id for track in tracks])
+
+
+def build_albums_table() -> tuple[pa.Table, np.ndarray]:
+    """
+    Returns the snapshot columns of every album, one row per album, and the
+    row of each album id
+    """
+
+    albums: list = db.session.execute(
+        db.select(
+            Albums.id,
+            Albums.name,
+            Albums.album_type,
+            Albums.release_date,
+            Albums.label_name,
+        ).order_by(Albums.id)
+    ).all()
+
+    columns: dict[str, pa.Array] = {
+        "album_name": dictionary_array([album.name for album in albums]),
+        "album_type": dictionary_array([album.album_type for album in albums]),
+        "release_date": pa.array(
+            [album.release_date.date() for album in albums], pa.date32()
+        ),
+        "label_name": dictionary_array([album.label_name for album in albums]),
+    }
+
+    return pa.table(columns), positions([album.id for album in albums])
+
+
+def iter_snapshot_batches(batch_size: int) -> Iterator[tuple[int, pa.RecordBatch]]:
+    """
+    Yields the snapshot rows of every stream in (stream_date, id) order, in
+    batches of streams played in the same year along with that year.
+
+    Track and album columns are gathered from tables holding one row per
+    track and album, so every batch shares their dictionaries.
+    """
+
+    tracks_table, track_positions = build_tracks_table()
+    albums_table, album_positions = build_albums_table()
+
+    # Both reason columns share the reasons dictionary
+    reason_rows: list = db.session.execute(
+        db.select(Reasons.id, Reasons.name).order_by(Reasons.id)
+    ).all()
+    reasons: pa.Array = pa.array([name for _, name in reason_rows], pa.string())
+    reason_positions: np.ndarray = positions(
+        [reason_id for reason_id, _ in reason_rows]
+    )
+
+    result = (
+        db.session.connection()
+        .execution_options(yield_per=batch_size)
+        .execute(
+            db.select(
+                Streams.id,
+                db.type_coerce(Streams.stream_date, db.Integer),
+                Streams.ms_played,
+                db.type_coerce(Streams.ratio_played, db.Float),
+                Streams.reason_start_id,
+                Streams.reason_end_id,
+                db.type_coerce(Streams.shuffle, db.Integer),
+                Streams.track_id,
+                Streams.album_id,
+            ).order_by(Streams.stream_date, Streams.id)
+        )
+    )
+
+    for rows in result.partitions():
+        (
+            stream_ids,
+            stream_dates,
+            ms_played,
+            ratio_played,
+            reason_starts,
+            reason_ends,
+            shuffles,
+            track_ids,
+            album_ids,
+        ) = zip(*rows)
+
+        epoch_seconds: np.ndarray = np.array(stream_dates, dtype=np.int64)
+        years: np.ndarray = (
+            epoch_seconds.astype("datetime64[s]").astype("datetime64[Y]").astype(int)
+            + 1970
+        )
+        track_rows: pa.Table = tracks_table.take(
+            track_positions[np.array(track_ids, dtype=np.int64)]
+        )
+        album_rows: pa.Table = albums_table.take(
+            album_positions[np.array(album_ids, dtype=np.int64)]
+        )
+
+        columns: dict[str, pa.Array] = {
+            "stream_id": pa.array(stream_ids, pa.int64()),
+            "stream_date": pa.array(epoch_seconds, pa.timestamp("s", tz="UTC")),
+            "ms_played": pa.array(ms_played, pa.int32()),
+            "ratio_played": pa.array(ratio_played, pa.float32()),
+            "shuffle": pa.array(np.array(shuffles, dtype=bool)),
+            "track_id": pa.array(track_ids, pa.int32()),
+            "album_id": pa.array(album_ids, pa.int32()),
+        }
+        for column, values in (
+            ("reason_start", reason_starts),
+            ("reason_end", reason_ends),
+        ):
+            columns[column] = pa.DictionaryArray.from_arrays(
+                pa.array(
+                    reason_positions[np.array(values, dtype=np.int64)], pa.int32()
+                ),
+                reasons,
+            )
+        for table in (track_rows, album_rows):
+            for column in table.column_names:
+                columns[column] = table.column(column).combine_chunks()
+
+        batch: pa.RecordBatch = pa.RecordBatch.from_arrays(
+            [columns[field.name] for field in SNAPSHOT_SCHEMA],
+            schema=SNAPSHOT_SCHEMA,
+        )
+
+        # Streams are sorted by date, so every year is a contiguous run
+        year_starts: np.ndarray = np.flatnonzero(np.diff(years, prepend=-1))
+        for start, end in zip(year_starts, [*year_starts[1:], len(years)]):
+            yield int(years[start]), batch.slice(start, end - start)
+
+
+def open_snapshot_file(
+    file_path: str, snapshot_format: str
+) -> pq.ParquetWriter | pa.ipc.RecordBatchFileWriter:
+    """
+    Opens a writer of SNAPSHOT_SCHEMA batches in the given format
+    """
+
+    if snapshot_format == "parquet":
+        return pq.ParquetWriter(
+            file_path, SNAPSHOT_SCHEMA, compression=SNAPSHOT_COMPRESSION
+        )
+
+    return pa.ipc.new_file(
+        file_path,
+        SNAPSHOT_SCHEMA,
+        options=pa.ipc.IpcWriteOptions(compression=SNAPSHOT_COMPRESSION),
+    )
+
+
+def write_snapshot(
+    output_folder: str,
+    snapshot_format: str = "parquet",
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+) -> list[str]:
+    """
+    Writes a snapshot of every stream to output_folder, partitioned by year
+    into year=YYYY/streams.<extension> files, and returns the paths of the
+    files relative to output_folder.
+
+    The snapshot is written next to output_folder first and then moved in
+    place, so readers never see a partial snapshot.
+    """
+
+    extension: str = SNAPSHOT_FORMATS[snapshot_format]
+    parent_folder: str = os.path.dirname(os.path.abspath(output_folder))
+    os.makedirs(parent_folder, exist_ok=True)
+    partial_folder: str = tempfile.mkdtemp(dir=parent_folder, prefix=".snapshot-")
+
+    written: list[str] = []
+    writer: pq.ParquetWriter | pa.ipc.RecordBatchFileWriter | None = None
+    current_year: int | None = None
+    try:
+        # Years arrive in order, so only one file is open at a time
+        for year, batch in iter_snapshot_batches(batch_size):
+            if year != current_year:
+                if writer is not None:
+                    writer.close()
+                file_path: str = os.path.join(f"year={year}", f"streams.{extension}")
+                os.makedirs(os.path.join(partial_folder, f"year={year}"))
+                writer = open_snapshot_file(
+                    os.path.join(partial_folder, file_path), snapshot_format
+                )
+                written.append(file_path)
+                current_year = year
+
+            writer.write_batch(batch)
+
+        if writer is not None:
+            writer.close()
+            writer = None
+
+        if os.path.exists(output_folder):
+            shutil.rmtree(output_folder)
+        os.replace(partial_folder, output_folder)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        shutil.rmtree(partial_folder, ignore_errors=True)
+        raise
+
+    return written
+
+
+def generation_folder(
+    snapshot_folder: str, snapshot_format: str, generation: int
+) -> str:
+    """
+    Returns the folder the snapshot of the given data generation is written to
+    """
+
+    return os.path.join(snapshot_folder, f"{snapshot_format}-{generation}")
+
+
+def snapshot_generations(snapshot_folder: str, snapshot_format: str) -> list[int]:
+    """
+    Returns the data generations snapshot_folder holds a snapshot of, newest first
+    """
+
+    if not os.path.isdir(snapshot_folder):
+        return []
+
+    generations: list[int] = []
+    for name in os.listdir(snapshot_folder):
+        name_format, _, name_generation = name.partition("-")
+        if name_format == snapshot_format and name_generation.isdigit():
+            generations.append(int(name_generation))
+
+    return sorted(generations, reverse=True)
+
+
+@contextlib.contextmanager
+def snapshot_folder_lock(snapshot_folder: str) -> Iterator[None]:
+    """
+    Holds an exclusive lock on snapshot_folder, serializing the snapshots
+    written to it by every process and thread
+    """
+
+    os.makedirs(snapshot_folder, exist_ok=True)
+    folder_fd: int = os.open(snapshot_folder, os.O_RDONLY)
+    try:
+        fcntl.flock(folder_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(folder_fd)
+
+
+def write_generation_snapshot(
+    snapshot_folder: str,
+    snapshot_format: str,
+    generation: int,
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+) -> str:
+    """
+    Writes the snapshot of the given data generation to snapshot_folder,
+    removes the snapshots of older generations and returns its folder
+    """
+
+    output_folder: str = generation_folder(snapshot_folder, snapshot_format, generation)
+    with snapshot_folder_lock(snapshot_folder):
+        write_snapshot(output_folder, snapshot_format, batch_size)
+
+        for older in snapshot_generations(snapshot_folder, snapshot_format):
+            if older < generation:
+                shutil.rmtree(
+                    generation_folder(snapshot_folder, snapshot_format, older),
+                    ignore_errors=True,
+                )
+
+    return output_folder
+
+
+def latest_snapshot(
+    snapshot_folder: str, snapshot_format: str, generation: int
+) -> tuple[int, str] | None:
+    """
+    Returns the newest snapshot written up to the given data generation and
+    its generation, or None if none was written yet.
+
+    Snapshots are only read here, never written, so an older generation is
+    returned until the snapshot of the current one is written.
+    """
+
+    for written in snapshot_generations(snapshot_folder, snapshot_format):
+        if written <= generation:
+            return written, generation_folder(snapshot_folder, snapshot_format, written)
+
+    return None
@@ -0,0 +1,110 @@
+"""
+SQLite connection setup, and routing of API reads to a read only engine
+"""
+
+import functools
+
+import sqlalchemy as sa
+from flask import Flask, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+# Bind key of the engine serving API requests
+READ_BIND: str = "read"
+
+# Request methods answered without writing to the database
+READ_METHODS: frozenset[str] = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class RoutingSession(Session):
+    """
+    Session sending every statement of a GET, HEAD or OPTIONS request to the
+    read engine, and everything else, the populator and migrations included,
+    to the default engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        """
+        ...
+        """
+
+        engines: dict = self._db.engines
+        if (
+            bind is None
+            and READ_BIND in engines
+            and not self._flushing
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            return engines[READ_BIND]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def is_sqlite_file(url: str | sa.engine.URL) -> bool:
+    """
+    Whether url points to an SQLite database stored in a file
+    """
+
+    url = sa.engine.make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def configure_read_bind(app: Flask) -> None:
+    """
+    Adds the read engine to the binds of app, on the same database file as the
+    default engine but with its own pool. In memory databases are private to
+    their engine, so they keep a single one.
+    """
+
+    database_uri: str = app.config["SQLALCHEMY_DATABASE_URI"]
+    if not is_sqlite_file(database_uri):
+        return
+
+    binds: dict = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds.setdefault(
+        READ_BIND,
+        {"url": database_uri, **app.config["SQLALCHEMY_READ_ENGINE_OPTIONS"]},
+    )
+    app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def set_pragmas(
+    dbapi_connection, connection_record, pragmas: dict, read_only: bool
+) -> None:
+    """
+    Applies pragmas to a new SQLite connection, and makes connections of the
+    read engine refuse to write
+    """
+
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def apply_pragmas(app: Flask, db: SQLAlchemy) -> None:
+    """
+    Applies SQLITE_PRAGMAS to every connection of the SQLite file engines of app
+    """
+
+    with app.app_context():
+        engines: dict = db.engines
+
+    for bind_key, engine in engines.items():
+        if is_sqlite_file(engine.url):
+            sa.event.listen(
+                engine,
+                "connect",
+                functools.partial(
+                    set_pragmas,
+                    pragmas=app.config["SQLITE_PRAGMAS"],
+                    read_only=bind_key == READ_BIND,
+                ),
+            )
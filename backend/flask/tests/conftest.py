@@ -0,0 +1,90 @@
+import contextlib
+import os
+
+import flask_migrate
+import pytest
+from flask import Flask
+
+from src.server import create_app
+from src.server.config import Config
+from src.utils.populate_db.populator import Populator
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+
+MIGRATIONS_FOLDER: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"
+)
+
+# Size of the synthetic export the shared database is populated from, about
+# half a year of plays
+STREAMS: int = 10000
+TRACKS: int = 1000
+RELINKED: int = 50
+
+
+def create_test_app(directory: str) -> Flask:
+    """
+    Returns an app using a database in directory built from the migrations
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI: str = f"sqlite:///{os.path.join(directory, 'data.db')}"
+        SNAPSHOT_FOLDER: str = os.path.join(directory, "snapshots")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        flask_migrate.upgrade(directory=MIGRATIONS_FOLDER)
+
+    return app
+
+
+def populate(
+    app: Flask,
+    streams_file_path: str,
+    spotify_client: FakeSpotifyClient,
+    resume: bool = False,
+) -> Populator:
+    """
+    Populates the database of app from the export in streams_file_path
+    """
+
+    with app.app_context(), open(os.devnull, "w", encoding="UTF-8") as output:
+        # Progress bars of the populator are left out of the test output
+        with contextlib.redirect_stderr(output):
+            populator: Populator = Populator(
+                None,
+                streams_file_path,
+                stats_timezone=app.config["STATS_TIMEZONE"],
+                resume=resume,
+                spotify_client=spotify_client,
+            )
+            populator.populate_db()
+
+    return populator
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory: pytest.TempPathFactory) -> Flask:
+    """
+    App whose database is populated from a synthetic export, shared by the
+    tests that only read it
+    """
+
+    directory: str = str(tmp_path_factory.mktemp("app"))
+    streams_file_path: str = os.path.join(directory, "input")
+    write_stream_files(streams_file_path, STREAMS, TRACKS, relinked=RELINKED)
+
+    app = create_test_app(directory)
+    populate(app, streams_file_path, FakeSpotifyClient())
+
+    return app
+
+
+@pytest.fixture
+def client(app: Flask):
+    """
+    Test client of the shared app
+    """
+
+    return app.test_client()
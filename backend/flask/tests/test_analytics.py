@@ -0,0 +1,101 @@
+import datetime
+import os
+
+import numpy as np
+from flask.testing import FlaskClient
+
+from src.server.extensions import db
+from src.models.models import DataGeneration
+from src.utils.analytics import StreamColumns, group_by
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+from tests.conftest import create_test_app, populate
+
+
+def test_time_buckets_format_dates_like_stats_series(client: FlaskClient) -> None:
+    """
+    Weekly time buckets are the weekly series of the stats, which are
+    bucketed in UTC in the tests, down to their naive UTC start datetimes
+    """
+
+    window: str = "start=2016-02-01&end=2016-05-02"
+    buckets: list[dict] = client.get(
+        f"/api/analytics/time-buckets?bucket=week&{window}"
+    ).json
+    series: dict = client.get(f"/api/stats/series?bucket=week&{window}").json
+
+    assert buckets
+    assert buckets == series["items"]
+    for bucket in buckets:
+        assert datetime.datetime.fromisoformat(bucket["start"]).tzinfo is None
+
+
+def stream_columns(track_ids: list[int], ms_played: list[int]) -> StreamColumns:
+    """
+    Returns the columns of streams of the given tracks, played a second apart
+    """
+
+    columns = StreamColumns()
+    columns.id = np.arange(1, len(track_ids) + 1, dtype=np.int64)
+    columns.stream_date = np.arange(len(track_ids), dtype=np.int64)
+    columns.track_id = np.array(track_ids, dtype=np.int32)
+    columns.ms_played = np.array(ms_played, dtype=np.int32)
+    columns.ratio_played = columns.ms_played / 200000
+
+    return columns
+
+
+def test_group_by_ranks_played_keys_of_no_ms_played() -> None:
+    """
+    A track played for 0 ms ranks after the tracks played longer, and ahead
+    of every track that was never played
+    """
+
+    columns: StreamColumns = stream_columns([5, 3, 7, 3], [0, 1000, 2000, 500])
+
+    groups: list[dict] = group_by(columns, "track_id", order="ms_played", limit=10)
+
+    assert [group["key"] for group in groups] == [7, 3, 5]
+    assert groups[-1] == {
+        "key": 5,
+        "plays": 1,
+        "ms_played": 0,
+        "mean_ratio_played": 0.0,
+    }
+
+
+def test_analytics_follow_the_data_generation(tmp_path) -> None:
+    """
+    Streams committed along with a new data generation are counted by the
+    next request, however soon after the previous one it comes
+    """
+
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 500, 50)
+    app = create_test_app(str(tmp_path))
+    populate(app, streams_file_path, FakeSpotifyClient())
+    client = app.test_client()
+
+    url: str = "/api/analytics/time-buckets?bucket=week"
+    before: int = sum(bucket["plays"] for bucket in client.get(url).json)
+
+    # What the populator does when it commits new streams
+    with app.app_context():
+        db.session.execute(
+            db.text(
+                "INSERT INTO streams SELECT id + 1000000, track_id, album_id, "
+                "stream_date + 1, ms_played, ratio_played, reason_start_id, "
+                "reason_end_id, shuffle, created_date, modified_date "
+                "FROM streams ORDER BY id DESC LIMIT 1"
+            )
+        )
+        db.session.query(DataGeneration).update(
+            {
+                DataGeneration.generation: DataGeneration.generation + 1,
+                DataGeneration.modified_date: datetime.datetime.now(
+                    datetime.timezone.utc
+                ),
+            }
+        )
+        db.session.commit()
+
+    assert sum(bucket["plays"] for bucket in client.get(url).json) == before + 1
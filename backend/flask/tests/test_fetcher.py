@@ -0,0 +1,118 @@
+import email.utils
+import time
+
+import pytest
+import spotipy
+
+from src.utils.populate_db.fetcher import Fetcher, TokenBucket, retry_after_seconds
+
+
+class RateLimitedFunction:
+    """
+    Answers 429 to the first calls, with the given headers, then echoes the
+    batch it is called with
+    """
+
+    def __init__(self, rate_limited_calls: int, headers: dict[str, str]) -> None:
+        self.rate_limited_calls: int = rate_limited_calls
+        self.headers: dict[str, str] = headers
+        self.call_times: list[float] = []
+
+    def __call__(self, batch: list[str]) -> list[str]:
+        self.call_times.append(time.monotonic())
+        if len(self.call_times) <= self.rate_limited_calls:
+            raise spotipy.SpotifyException(
+                429, -1, "API rate limit exceeded", headers=self.headers
+            )
+
+        return batch
+
+
+@pytest.mark.parametrize("rate", [0, -1.0, float("nan")])
+def test_token_bucket_rejects_rates_that_are_not_positive(rate: float) -> None:
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
+
+
+def test_token_bucket_paces_requests_after_a_burst() -> None:
+    bucket = TokenBucket(rate=50.0, capacity=5)
+
+    started: float = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+
+    # The first 5 requests are the burst, the next 10 wait 20ms each
+    assert time.monotonic() - started >= 0.19
+
+
+def test_token_bucket_pause_holds_back_requests() -> None:
+    bucket = TokenBucket(rate=1000.0)
+
+    bucket.pause(0.2)
+    started: float = time.monotonic()
+    bucket.acquire()
+
+    assert time.monotonic() - started >= 0.19
+
+
+@pytest.mark.parametrize(
+    "retry_after, seconds",
+    [
+        (None, None),
+        ("3", 3.0),
+        ("0.5", 0.5),
+        ("-2", 0.0),
+        ("soon", None),
+        ("inf", None),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ],
+)
+def test_retry_after_seconds(retry_after: str | None, seconds: float | None) -> None:
+    assert retry_after_seconds(retry_after) == seconds
+
+
+def test_retry_after_seconds_of_an_http_date() -> None:
+    retry_after: str = email.utils.formatdate(time.time() + 30, usegmt=True)
+
+    assert retry_after_seconds(retry_after) == pytest.approx(30, abs=1.5)
+
+
+def test_fetcher_waits_retry_after_between_429_responses() -> None:
+    function = RateLimitedFunction(2, {"Retry-After": "0.2"})
+    fetcher = Fetcher(requests_per_second=1000.0)
+
+    assert fetcher.call(function, ["a"]) == ["a"]
+    assert len(function.call_times) == 3
+    for previous, current in zip(function.call_times, function.call_times[1:]):
+        assert current - previous >= 0.19
+
+
+def test_fetcher_backs_off_exponentially_without_retry_after() -> None:
+    function = RateLimitedFunction(2, {})
+    fetcher = Fetcher(requests_per_second=1000.0)
+
+    assert fetcher.call(function, ["a"]) == ["a"]
+    assert len(function.call_times) == 3
+    first_wait: float = function.call_times[1] - function.call_times[0]
+    second_wait: float = function.call_times[2] - function.call_times[1]
+    assert first_wait >= 0.99
+    assert second_wait >= 1.99
+
+
+def test_fetcher_backs_off_when_retry_after_cannot_be_parsed() -> None:
+    function = RateLimitedFunction(1, {"Retry-After": "later"})
+    fetcher = Fetcher(requests_per_second=1000.0)
+
+    assert fetcher.call(function, ["a"]) == ["a"]
+    assert function.call_times[1] - function.call_times[0] >= 0.99
+
+
+def test_fetcher_gives_up_after_max_retries() -> None:
+    function = RateLimitedFunction(3, {"Retry-After": "0"})
+    fetcher = Fetcher(requests_per_second=1000.0, max_retries=2)
+
+    with pytest.raises(spotipy.SpotifyException) as error:
+        fetcher.call(function, ["a"])
+
+    assert error.value.http_status == 429
+    assert len(function.call_times) == 3
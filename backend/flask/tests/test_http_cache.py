@@ -0,0 +1,43 @@
+import datetime
+import os
+
+from src.server.extensions import db
+from src.models.models import DataGeneration
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+from tests.conftest import create_test_app, populate
+
+URL: str = "/api/stats/series?bucket=month"
+
+
+def test_etag_follows_the_data_generation(tmp_path) -> None:
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 500, 50)
+    app = create_test_app(str(tmp_path))
+    populate(app, streams_file_path, FakeSpotifyClient())
+    client = app.test_client()
+
+    response = client.get(URL)
+    etag: str = response.headers["ETag"]
+    assert response.status_code == 200
+
+    revalidated = client.get(URL, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert not revalidated.data
+
+    # What the populator does when it commits new data
+    with app.app_context():
+        db.session.query(DataGeneration).update(
+            {
+                DataGeneration.generation: DataGeneration.generation + 1,
+                DataGeneration.modified_date: datetime.datetime.now(
+                    datetime.timezone.utc
+                ),
+            }
+        )
+        db.session.commit()
+
+    changed = client.get(URL, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json == response.json
@@ -0,0 +1,117 @@
+import datetime
+import os
+
+import pytest
+from flask import Flask
+
+from src.server.extensions import db
+from src.models.models import PopulateCheckpoints
+from src.utils.populate_db.populator import InterruptedRunError, Populator
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+from tests.conftest import create_test_app, populate
+
+# Tables holding what the populator ingested and fetched
+POPULATED_TABLES: tuple[str, ...] = (
+    "streams",
+    "tracks",
+    "track_uris",
+    "albums",
+    "artists",
+    "labels",
+    "genres",
+    "artists_tracks",
+    "artists_albums",
+    "genres_artists",
+    "genres_tracks",
+    "genres_albums",
+    "stream_artists",
+    "track_daily_stats",
+    "hourly_stats",
+    "sessions",
+    "ingested_files",
+)
+
+
+def test_interrupted_run_has_to_be_resumed(tmp_path) -> None:
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 100, 20)
+    app = create_test_app(str(tmp_path))
+
+    with app.app_context():
+        # What populate_db leaves behind when it is interrupted
+        now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
+        db.session.add(
+            PopulateCheckpoints(
+                phase="populate_db",
+                completed=False,
+                created_date=now,
+                modified_date=now,
+            )
+        )
+        db.session.commit()
+
+        with pytest.raises(InterruptedRunError):
+            Populator(None, streams_file_path, spotify_client=FakeSpotifyClient())
+
+        Populator(
+            None, streams_file_path, resume=True, spotify_client=FakeSpotifyClient()
+        )
+
+
+def table_counts(app: Flask) -> dict[str, int]:
+    """
+    Returns the number of rows of every table populated from the export
+    """
+
+    with app.app_context():
+        return {
+            table: db.session.execute(db.text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in POPULATED_TABLES
+        }
+
+
+def test_rerun_is_idempotent_and_calls_no_api(tmp_path) -> None:
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 1000, 100, relinked=5)
+    app = create_test_app(str(tmp_path))
+
+    first_client = FakeSpotifyClient()
+    populate(app, streams_file_path, first_client)
+    counts: dict[str, int] = table_counts(app)
+    assert all(first_client.calls.values())
+    assert counts["streams"] > 0
+
+    rerun_client = FakeSpotifyClient()
+    populate(app, streams_file_path, rerun_client)
+
+    assert sum(rerun_client.calls.values()) == 0
+    assert table_counts(app) == counts
+
+
+def test_resumed_run_matches_an_uninterrupted_run(tmp_path, monkeypatch) -> None:
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 1000, 100, relinked=5)
+
+    uninterrupted_app = create_test_app(str(tmp_path / "uninterrupted"))
+    populate(uninterrupted_app, streams_file_path, FakeSpotifyClient())
+
+    app = create_test_app(str(tmp_path / "interrupted"))
+    create_streams = Populator.create_streams
+
+    def interrupted_create_streams(populator: Populator) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(Populator, "create_streams", interrupted_create_streams)
+    with pytest.raises(KeyboardInterrupt):
+        populate(app, streams_file_path, FakeSpotifyClient())
+
+    monkeypatch.setattr(Populator, "create_streams", create_streams)
+    with pytest.raises(InterruptedRunError):
+        populate(app, streams_file_path, FakeSpotifyClient())
+
+    resumed_client = FakeSpotifyClient()
+    populate(app, streams_file_path, resumed_client, resume=True)
+
+    # Metadata fetched before the interruption is not fetched again
+    assert sum(resumed_client.calls.values()) == 0
+    assert table_counts(app) == table_counts(uninterrupted_app)
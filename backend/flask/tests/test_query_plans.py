@@ -0,0 +1,120 @@
+import datetime
+import re
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from src.routes.streams import encode_cursor
+from src.server.extensions import analytics, db
+
+# Requests covering every query the API runs against an indexed lookup.
+# GET /api/streams/ is left out on purpose, its OFFSET pages scan by design,
+# and so are stats and exports without a window, which read every row. So
+# are similar tracks, whose index reads the features of every track once
+# and then answers from memory.
+API_REQUESTS: list[str] = [
+    "/api/streams/1",
+    "/api/streams/cursor?limit=10",
+    "/api/streams/cursor?limit=10&cursor={cursor}",
+    "/api/streams/cursor?start=2016-03-01&end=2016-04-01&total=true",
+    "/api/stats/top/tracks?start=2016-03-01&end=2016-04-01",
+    "/api/stats/top/albums?start=2016-03-01&end=2016-04-01&order=ms_played",
+    "/api/stats/top/artists?start=2016-07-01",
+    "/api/stats/top/genres?start=2016-03-01&end=2016-04-01",
+    "/api/analytics/group/track_id?start=2016-07-01",
+    "/api/streams/export?start=2016-03-01&end=2016-04-01",
+    "/api/streams/cursor?genre_id=1&start=2016-07-01&total=true",
+    "/api/streams/export?genre_id=1",
+    "/api/streams/cursor?artist_id=1&start=2016-07-01&total=true",
+    "/api/streams/export?artist_id=1&start=2016-07-01",
+    "/api/sessions/?start=2016-03-01&end=2016-04-01",
+    "/api/stats/series?start=2016-03-01&end=2016-06-01&bucket=week",
+    "/api/stats/series?artist_id=1&shuffle=false",
+    "/api/stats/heatmap?start=2016-03-01&end=2016-06-01",
+    "/api/stats/heatmap?genre_id=1&start=2016-07-01",
+    "/api/sessions/?limit=10&cursor={cursor}",
+    "/api/search/?q=blu",
+    "/api/search/?q=blue%20ni&type=tracks,albums",
+]
+
+# Plan steps that read a whole table without using an index
+FULL_SCAN: re.Pattern = re.compile(r"^SCAN (TABLE )?\w+$")
+
+# Dictionary tables of a handful of rows, which are read whole on purpose
+SCANNED_TABLES: frozenset[str] = frozenset({"reasons"})
+
+
+@pytest.fixture(scope="module")
+def analyzed_app(app: Flask) -> Flask:
+    """
+    The shared app once the query planner has gathered statistics of its
+    tables, so queries are planned as they are against a populated database
+    """
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+
+    return app
+
+
+@pytest.fixture
+def uncached_app(analyzed_app: Flask) -> Flask:
+    """
+    The analyzed app without responses cached or streams loaded by earlier
+    requests, so requests run their queries
+    """
+
+    state: dict = analyzed_app.extensions["http_cache"]
+    with state["lock"]:
+        state["responses"].clear()
+    analytics.init_app(analyzed_app, db)
+
+    return analyzed_app
+
+
+@pytest.mark.parametrize("url", API_REQUESTS)
+def test_query_plan_uses_indexes(uncached_app: Flask, url: str) -> None:
+    """
+    The plan of no query the request issues contains a full table scan
+    """
+
+    statements: list[tuple[str, tuple]] = []
+
+    def record_statement(conn, cursor, statement, parameters, context, many):
+        # Every cached request reads the data generation by its primary key
+        if statement.lstrip().upper().startswith(
+            "SELECT"
+        ) and not statement.rstrip().endswith("FROM data_generation WHERE id = 1"):
+            statements.append((statement, parameters))
+
+    cursor: str = encode_cursor(datetime.datetime(2016, 3, 1), 1)
+    with uncached_app.app_context():
+        # GET requests read through the read engine
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            response = uncached_app.test_client().get(url.format(cursor=cursor))
+        finally:
+            for engine in db.engines.values():
+                event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert response.status_code == 200
+        # A request running no query would pass without checking anything
+        assert statements
+
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                plan: list[str] = [
+                    row[-1]
+                    for row in connection.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )
+                ]
+                scans: list[str] = [
+                    step
+                    for step in plan
+                    if FULL_SCAN.match(step) and step.split()[-1] not in SCANNED_TABLES
+                ]
+                assert not scans, " ".join(statement.split())
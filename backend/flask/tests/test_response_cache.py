@@ -0,0 +1,29 @@
+import os
+import time
+
+from src.utils.populate_db.cache import ResponseCache
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache_file_path: str = os.path.join(tmp_path, "cache.sqlite3")
+    cache = ResponseCache(cache_file_path, max_entries=3)
+
+    cache.put_many("tracks", {"a": {"id": "a"}, "b": {"id": "b"}})
+    time.sleep(0.01)
+    cache.put_many("tracks", {"c": {"id": "c"}})
+    time.sleep(0.01)
+    # Replacing a cached object does not count it twice
+    cache.put_many("tracks", {"a": {"id": "a", "name": "A"}})
+    assert cache.count == 3
+
+    time.sleep(0.01)
+    cache.put_many("tracks", {"d": {"id": "d"}})
+    assert cache.count == 3
+    assert cache.get_many("tracks", ["a", "b", "c", "d"]) == {
+        "a": {"id": "a", "name": "A"},
+        "c": {"id": "c"},
+        "d": {"id": "d"},
+    }
+
+    # The count is read back when the cache is opened again
+    assert ResponseCache(cache_file_path, max_entries=3).count == 3
@@ -0,0 +1,34 @@
+import pytest
+from flask.testing import FlaskClient
+
+from src.utils.search import build_match_query
+
+
+@pytest.mark.parametrize(
+    "query, match",
+    [
+        ("blue", '"blue"*'),
+        ("Blue  night", '"Blue"* "night"*'),
+        ('blue" OR name:*', '"blue"* "OR"* "name"*'),
+        ("NEAR(blue night)", '"NEAR"* "blue"* "night"*'),
+        ("-blue ^night", '"blue"* "night"*'),
+        ("東京 radio", '"東京"* "radio"*'),
+        ("_*()\"'", None),
+        ("", None),
+    ],
+)
+def test_build_match_query_keeps_only_words(query: str, match: str | None) -> None:
+    assert build_match_query(query) == match
+
+
+@pytest.mark.parametrize("query", ['blue" OR', "name:blue", "(blue", "blue*night"])
+def test_search_accepts_fts_syntax_as_words(client: FlaskClient, query: str) -> None:
+    response = client.get("/api/search/", query_string={"q": query})
+
+    assert response.status_code == 200
+
+
+def test_search_without_words_is_a_bad_request(client: FlaskClient) -> None:
+    response = client.get("/api/search/", query_string={"q": '"*"'})
+
+    assert response.status_code == 400
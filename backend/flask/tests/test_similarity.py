@@ -0,0 +1,64 @@
+import datetime
+import os
+
+import pytest
+
+from src.server.extensions import db
+from src.models.models import DataGeneration, Tracks
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+from tests.conftest import create_test_app, populate
+
+
+def test_similar_tracks_follow_the_data_generation(tmp_path) -> None:
+    """
+    Features committed along with a new data generation are used by the
+    next request, however soon after the previous one it comes
+    """
+
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 500, 50)
+    app = create_test_app(str(tmp_path))
+    populate(app, streams_file_path, FakeSpotifyClient())
+    client = app.test_client()
+
+    with app.app_context():
+        query, target = db.session.scalars(
+            db.select(Tracks).where(Tracks.energy.is_not(None)).limit(2)
+        ).all()
+        query_id, target_id = query.id, target.id
+
+    before: dict = client.get(f"/api/tracks/{query_id}/similar?limit=1").json
+    assert before["similar"][0]["id"] != target_id
+
+    # What the populator does when it sets features and commits them
+    with app.app_context():
+        now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
+        query = db.session.get(Tracks, query_id)
+        target = db.session.get(Tracks, target_id)
+        for feature in (
+            "acousticness",
+            "danceability",
+            "energy",
+            "instrumentalness",
+            "key",
+            "liveness",
+            "loudness",
+            "mode",
+            "speechiness",
+            "tempo",
+            "time_signature",
+            "valence",
+        ):
+            setattr(target, feature, getattr(query, feature))
+        target.modified_date = now
+        db.session.query(DataGeneration).update(
+            {
+                DataGeneration.generation: DataGeneration.generation + 1,
+                DataGeneration.modified_date: now,
+            }
+        )
+        db.session.commit()
+
+    after: dict = client.get(f"/api/tracks/{query_id}/similar?limit=1").json
+    assert after["similar"][0]["id"] == target_id
+    assert after["similar"][0]["distance"] == pytest.approx(0.0, abs=1e-3)
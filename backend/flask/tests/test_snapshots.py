@@ -0,0 +1,84 @@
+import datetime
+import os
+
+from src.server.extensions import db
+from src.models.models import DataGeneration
+from src.utils.populate_db.synthetic import FakeSpotifyClient, write_stream_files
+from src.utils.snapshot import write_generation_snapshot
+from tests.conftest import create_test_app, populate
+
+
+def test_snapshots_are_only_served_once_written(tmp_path) -> None:
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 500, 50)
+    app = create_test_app(str(tmp_path))
+    populate(app, streams_file_path, FakeSpotifyClient())
+    client = app.test_client()
+
+    # Requests never write snapshots
+    assert client.get("/api/snapshots/").status_code == 404
+    assert not os.path.exists(app.config["SNAPSHOT_FOLDER"])
+
+    with app.app_context():
+        generation: int = db.session.get(DataGeneration, 1).generation
+        write_generation_snapshot(app.config["SNAPSHOT_FOLDER"], "parquet", generation)
+
+        # The snapshot of the next generation is not written yet
+        db.session.query(DataGeneration).update(
+            {
+                DataGeneration.generation: generation + 1,
+                DataGeneration.modified_date: datetime.datetime.now(
+                    datetime.timezone.utc
+                ),
+            }
+        )
+        db.session.commit()
+
+    snapshot: dict = client.get("/api/snapshots/").json
+    assert snapshot["generation"] == generation
+    assert [item["year"] for item in snapshot["files"]] == [2016]
+
+    response = client.get("/api/snapshots/2016")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"parquet-{generation}-2016"'
+    assert client.get("/api/snapshots/2015").status_code == 404
+    assert client.get("/api/snapshots/?format=arrow").status_code == 404
+
+    with app.app_context():
+        write_generation_snapshot(
+            app.config["SNAPSHOT_FOLDER"], "parquet", generation + 1
+        )
+
+    assert client.get("/api/snapshots/").json["generation"] == generation + 1
+    assert os.listdir(app.config["SNAPSHOT_FOLDER"]) == [f"parquet-{generation + 1}"]
+
+
+def test_snapshots_removed_while_read_are_read_again(tmp_path, monkeypatch) -> None:
+    streams_file_path: str = os.path.join(tmp_path, "input")
+    write_stream_files(streams_file_path, 500, 50)
+    app = create_test_app(str(tmp_path))
+    populate(app, streams_file_path, FakeSpotifyClient())
+    client = app.test_client()
+
+    with app.app_context():
+        generation: int = db.session.get(DataGeneration, 1).generation
+        write_generation_snapshot(app.config["SNAPSHOT_FOLDER"], "parquet", generation)
+        db.session.query(DataGeneration).update(
+            {DataGeneration.generation: generation + 1}
+        )
+        db.session.commit()
+
+    getsize = os.path.getsize
+
+    def write_newer_snapshot(file_path: str) -> int:
+        # Another process writes the next snapshot after the files were listed
+        if f"parquet-{generation}{os.sep}" in file_path:
+            write_generation_snapshot(
+                app.config["SNAPSHOT_FOLDER"], "parquet", generation + 1
+            )
+        return getsize(file_path)
+
+    monkeypatch.setattr(os.path, "getsize", write_newer_snapshot)
+    response = client.get("/api/snapshots/")
+    assert response.status_code == 200
+    assert response.json["generation"] == generation + 1
@@ -0,0 +1,90 @@
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from src.server.extensions import db
+from src.models.associations import stream_artists
+from src.models.models import (
+    AlbumDailyStats,
+    AlbumHourlyStats,
+    ArtistDailyStats,
+    ArtistHourlyStats,
+    HourlyStats,
+    Streams,
+    TrackDailyStats,
+)
+
+
+def test_heatmap_bounds_with_an_offset_are_converted_to_local_hours(
+    app: Flask, client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Bounds with an offset are converted to STATS_TIMEZONE, the time zone the
+    hourly stats are keyed in, and bounds without one are local already
+    """
+
+    monkeypatch.setitem(app.config, "STATS_TIMEZONE", "Asia/Tokyo")
+
+    with_offset: dict = client.get(
+        "/api/stats/heatmap?start=2016-03-01T00:00:00%2B00:00"
+        "&end=2016-03-08T00:00:00Z"
+    ).json
+    local: dict = client.get(
+        "/api/stats/heatmap?start=2016-03-01T09:00:00&end=2016-03-08T09:00:00"
+    ).json
+    utc: dict = client.get(
+        "/api/stats/heatmap?start=2016-03-01T00:00:00&end=2016-03-08T00:00:00"
+    ).json
+
+    assert with_offset == local
+    assert with_offset["cells"] != utc["cells"]
+
+
+@pytest.mark.parametrize(
+    "stats_model",
+    [TrackDailyStats, AlbumDailyStats, HourlyStats, AlbumHourlyStats],
+)
+def test_rollups_sum_to_the_streams(app: Flask, stats_model: db.Model) -> None:
+    """
+    Every stream is counted once in the rollups keyed by a single track or
+    album of the stream
+    """
+
+    with app.app_context():
+        streams: tuple[int, int] = db.session.execute(
+            db.select(db.func.count(Streams.id), db.func.sum(Streams.ms_played))
+        ).one()
+        rollups: tuple[int, int] = db.session.execute(
+            db.select(
+                db.func.sum(stats_model.plays), db.func.sum(stats_model.ms_played)
+            )
+        ).one()
+
+    assert streams[0] > 0
+    assert tuple(rollups) == tuple(streams)
+
+
+def test_artist_rollups_sum_to_the_stream_artists(app: Flask) -> None:
+    """
+    Streams are counted once for each of the artists they are credited to
+    """
+
+    with app.app_context():
+        credits: int = db.session.execute(
+            db.select(db.func.count()).select_from(
+                db.join(
+                    Streams,
+                    stream_artists,
+                    Streams.track_id == stream_artists.c.track_id,
+                )
+            )
+        ).scalar()
+        daily: int = db.session.execute(
+            db.select(db.func.sum(ArtistDailyStats.plays))
+        ).scalar()
+        hourly: int = db.session.execute(
+            db.select(db.func.sum(ArtistHourlyStats.plays))
+        ).scalar()
+
+    assert credits > 0
+    assert daily == hourly == credits
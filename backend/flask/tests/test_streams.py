@@ -0,0 +1,67 @@
+import base64
+import datetime
+import json
+
+import pytest
+from flask.testing import FlaskClient
+
+from src.routes.streams import decode_cursor, encode_cursor
+
+
+def test_exported_lines_match_the_api(client: FlaskClient) -> None:
+    """
+    Every NDJSON line of an export is the compact encoding of the stream
+    GET /api/streams/<id> returns, including ratio_played of whole plays
+    """
+
+    lines: list[str] = client.get(
+        "/api/streams/export?start=2016-03-01&end=2016-03-03"
+    ).text.splitlines()
+    assert lines
+
+    whole_plays: int = 0
+    for line in lines:
+        stream: dict = client.get(f"/api/streams/{json.loads(line)['id']}").json
+        assert line == json.dumps(stream, separators=(",", ":"))
+        whole_plays += stream["ratio_played"] == 1.0
+
+    assert whole_plays
+
+
+def test_cursor_round_trip() -> None:
+    position: tuple[datetime.datetime, int] = (
+        datetime.datetime(2016, 3, 1, 12, 30, 5),
+        42,
+    )
+
+    assert decode_cursor(encode_cursor(*position)) == position
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "not a cursor", base64.urlsafe_b64encode(b'["2016", 1]').decode()]
+)
+def test_invalid_cursor_raises_value_error(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_pages_cover_the_window_once(client: FlaskClient) -> None:
+    window: str = "start=2016-03-01&end=2016-03-15"
+    first_page: dict = client.get(f"/api/streams/cursor?{window}&total=true").json
+
+    ids: list[int] = []
+    page: dict = first_page
+    while True:
+        ids.extend(stream["id"] for stream in page["items"])
+        if page["next_cursor"] is None:
+            break
+        page = client.get(
+            f"/api/streams/cursor?{window}&cursor={page['next_cursor']}"
+        ).json
+
+    exported: list[int] = [
+        json.loads(line)["id"]
+        for line in client.get(f"/api/streams/export?{window}").text.splitlines()
+    ]
+    assert ids == exported
+    assert len(ids) == first_page["total"]
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+from flask import Flask
+
+from src.server.extensions import db
+from src.models.models import Streams
+from src.models.types import EpochDateTime
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime.datetime(1970, 1, 1),
+        datetime.datetime(2016, 2, 29, 23, 59, 59),
+        datetime.datetime(2038, 1, 19, 3, 14, 8),
+    ],
+)
+def test_epoch_datetime_round_trip(value: datetime.datetime) -> None:
+    column_type = EpochDateTime()
+    seconds: int = column_type.process_bind_param(value, None)
+
+    assert seconds == int(value.replace(tzinfo=datetime.timezone.utc).timestamp())
+    assert column_type.process_result_value(seconds, None) == value
+
+
+def test_epoch_datetime_binds_aware_datetimes_as_utc() -> None:
+    value = datetime.datetime(
+        2016, 3, 1, 9, tzinfo=datetime.timezone(datetime.timedelta(hours=9))
+    )
+
+    assert EpochDateTime().process_bind_param(
+        value, None
+    ) == EpochDateTime().process_bind_param(datetime.datetime(2016, 3, 1), None)
+
+
+def test_epoch_datetime_binds_integers_and_none_as_they_are() -> None:
+    assert EpochDateTime().process_bind_param(1456790400, None) == 1456790400
+    assert EpochDateTime().process_bind_param(None, None) is None
+    assert EpochDateTime().process_result_value(None, None) is None
+
+
+def test_stream_dates_are_stored_as_epoch_seconds(app: Flask) -> None:
+    with app.app_context():
+        stream: Streams = db.session.get(Streams, 1)
+        stored: int = db.session.execute(
+            db.text("SELECT stream_date FROM streams WHERE id = 1")
+        ).scalar()
+
+        assert isinstance(stored, int)
+        assert EpochDateTime().process_bind_param(stream.stream_date, None) == stored
+        # Filtering by datetimes compares epoch seconds
+        assert (
+            db.session.query(Streams.id)
+            .filter(Streams.stream_date == stream.stream_date, Streams.id == 1)
+            .scalar()
+            == 1
+        )